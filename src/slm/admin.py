@@ -316,6 +316,13 @@ class SiteAdmin(admin.ModelAdmin):
     list_display = ("name", "status")
     list_filter = ("status",)
 
+    actions = ["publish"]
+
+    def publish(self, request, queryset):
+        queryset.publish(request=request)
+
+    publish.short_description = _("Publish HEAD edits of site logs.")
+
 
 @admin.register(Network)
 class NetworkAdmin(admin.ModelAdmin):
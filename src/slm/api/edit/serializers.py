@@ -52,6 +52,8 @@ class StationSerializer(serializers.ModelSerializer):
     max_alert = serializers.IntegerField(read_only=True)
 
     can_publish = serializers.SerializerMethodField(read_only=True)
+    needs_publish = serializers.BooleanField(read_only=True)
+    is_publishable = serializers.BooleanField(read_only=True)
 
     publish = serializers.BooleanField(write_only=True, required=False)
     revert = serializers.BooleanField(write_only=True, required=False)
@@ -61,6 +63,8 @@ class StationSerializer(serializers.ModelSerializer):
     )
 
     def get_can_publish(self, obj):
+        if hasattr(obj, "can_publish_"):
+            return obj.can_publish_
         if "request" in self.context:
             return self.context["request"].user.is_moderator()
         return None
@@ -75,6 +79,10 @@ class StationSerializer(serializers.ModelSerializer):
                 )
             instance.publish(request=self.context["request"])
             # instance.refresh_from_db() - necessary?
+        if validated_data.get("revert", False) or validated_data.get("publish", False):
+            # the annotated publish flags are stale
+            instance.__dict__.pop("needs_publish_", None)
+            instance.__dict__.pop("can_publish_", None)
         return instance
 
     def create(self, validated_data):
@@ -120,6 +128,8 @@ class StationSerializer(serializers.ModelSerializer):
             "last_update",
             "last_user",
             "can_publish",
+            "needs_publish",
+            "is_publishable",
             "publish",
             "revert",
             "review_requested",
@@ -137,6 +147,8 @@ class StationSerializer(serializers.ModelSerializer):
                 "agencies",
                 "networks",
                 "can_publish",
+                "needs_publish",
+                "is_publishable",
             }
         }
 
@@ -288,6 +288,7 @@ class StationListViewSet(
     def get_queryset(self):
         return (
             Site.objects.editable_by(self.request.user)
+            .annotate_publish_flags(self.request.user)
             .prefetch_related(
                 "agencies", "networks", "owner__agencies", "last_user__agencies"
             )
@@ -651,6 +652,7 @@ class SectionViewSet(type):
                                 ModelClass.objects.filter(site=site)
                                 .order_by("-edited")
                                 .select_for_update()
+                                .track_changes()
                                 .first()
                             )
                         # this is a subsection - if the subsection IDs are not
@@ -660,12 +662,14 @@ class SectionViewSet(type):
                                 ModelClass.objects.filter(line_filter)
                                 .order_by("-edited")
                                 .select_for_update()
+                                .track_changes()
                                 .first()
                             )
                     else:
                         instance = (
                             ModelClass.objects.filter(pk=instance.pk)
                             .select_for_update()
+                            .track_changes()
                             .first()
                         )
 
@@ -751,7 +755,7 @@ class SectionViewSet(type):
                         # todo this diffing code is getting a bit messy because
                         #   of all the special type cases - consider a refactor
                         #   also needs to be DRYed w/ published_diff function
-                        for field in ModelClass.site_log_fields():
+                        for field in Site.section(ModelClass).site_log_fields:
                             if field in validated_data:
                                 mdl_field = instance._meta.get_field(field)
                                 is_many = isinstance(mdl_field, models.ManyToManyField)
@@ -957,7 +961,7 @@ class SectionViewSet(type):
                     "can_publish",
                     "_flags",
                     "_diff",
-                    *ModelClass.site_log_fields(),
+                    *Site.section(ModelClass).site_log_fields,
                 ] + (
                     ["subsection", "heading", "effective", "is_deleted"]
                     if issubclass(ModelClass, SiteSubSection)
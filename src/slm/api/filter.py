@@ -33,6 +33,7 @@ from slm.models import (
     SatelliteSystem,
     Site,
     SiteAntenna,
+    SiteFrequencyStandard,
     SiteIdentification,
     SiteMoreInformation,
     SiteReceiver,
@@ -114,10 +115,7 @@ class SiteSearchFilter(SearchFilter):
                         )
                         | Q(firmware__icontains=search_term)
                         | Q(serial_number__icontains=search_term)
-                        & (
-                            (Q(installed__lte=epoch) | Q(installed__isnull=True))
-                            & (Q(removed__gt=epoch) | Q(removed__isnull=True))
-                        )
+                        & SiteReceiver.valid_at(epoch)
                     )
                 ).order_by()
                 site_antennas = SiteAntenna.objects.filter(
@@ -133,10 +131,7 @@ class SiteSearchFilter(SearchFilter):
                                 model__icontains=search_term
                             )
                         )
-                        & (
-                            (Q(installed__lte=epoch) | Q(installed__isnull=True))
-                            & (Q(removed__gt=epoch) | Q(removed__isnull=True))
-                        )
+                        & SiteAntenna.valid_at(epoch)
                     )
                 ).order_by()
 
@@ -300,16 +295,14 @@ class InitialValueFilterSet(FilterSet):
 
 
 class BaseStationFilter(CrispyFormCompat, AcceptListArguments, FilterSet):
-    EQLookup = namedtuple("EQLookup", "relation field start end")
+    EQLookup = namedtuple("EQLookup", "relation field model")
     EQUIPMENT_TABLE = {
-        "satellite_system": EQLookup(
-            "sitereceiver", "satellite_system", "installed", "removed"
-        ),
-        "receiver": EQLookup("sitereceiver", "receiver_type", "installed", "removed"),
-        "antenna": EQLookup("siteantenna", "antenna_type", "installed", "removed"),
-        "radome": EQLookup("siteantenna", "radome_type", "installed", "removed"),
+        "satellite_system": EQLookup("sitereceiver", "satellite_system", SiteReceiver),
+        "receiver": EQLookup("sitereceiver", "receiver_type", SiteReceiver),
+        "antenna": EQLookup("siteantenna", "antenna_type", SiteAntenna),
+        "radome": EQLookup("siteantenna", "radome_type", SiteAntenna),
         "frequency_standard": EQLookup(
-            "sitefrequencystandard", "standard_type", "effective_start", "effective_end"
+            "sitefrequencystandard", "standard_type", SiteFrequencyStandard
         ),
     }
 
@@ -336,13 +329,8 @@ class BaseStationFilter(CrispyFormCompat, AcceptListArguments, FilterSet):
         Fetch the mapping of alert names to related fields.
         """
 
-        def get_related_field(alert):
-            for obj in Site._meta.related_objects:
-                if obj.related_model is alert:
-                    return obj.name
-
         return {
-            alert.__name__.lower(): get_related_field(alert)
+            alert.__name__.lower(): Site.alert_relations.get(alert, None)
             for alert in Alert.objects.site_alerts()
         }
 
@@ -462,17 +450,8 @@ class BaseStationFilter(CrispyFormCompat, AcceptListArguments, FilterSet):
                 return queryset.filter(
                     Q(**{f"{lookup.relation}__{lookup.field}__in": value})
                     & self.published_q(lookup.relation)
-                    & (
-                        Q(
-                            **{
-                                f"{lookup.relation}__{lookup.start}__lte": self.query_epoch
-                            }
-                        )
-                        | Q(**{f"{lookup.relation}__{lookup.start}__isnull": True})
-                    )
-                    & (
-                        Q(**{f"{lookup.relation}__{lookup.end}__gt": self.query_epoch})
-                        | Q(**{f"{lookup.relation}__{lookup.end}__isnull": True})
+                    & lookup.model.valid_at(
+                        self.query_epoch, prefix=f"{lookup.relation}__"
                     )
                 ).distinct()
             else:
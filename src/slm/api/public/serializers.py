@@ -3,6 +3,7 @@ from rest_framework import serializers
 from slm.models import (
     Agency,
     Antenna,
+    ArchiveChange,
     ArchivedSiteLog,
     Equipment,
     Manufacturer,
@@ -247,3 +248,25 @@ class ArchiveSerializer(serializers.ModelSerializer):
         model = ArchivedSiteLog
         fields = ["id", "site", "name", "timestamp", "mimetype", "log_format", "size"]
         read_only_fields = fields
+
+
+class ArchiveChangeSerializer(serializers.ModelSerializer):
+    token = serializers.CharField()
+    site = serializers.CharField(source="site_name")
+    event = serializers.CharField(source="event.name")
+    begin = serializers.DateTimeField(source="valid_range.lower", allow_null=True)
+    end = serializers.DateTimeField(source="valid_range.upper", allow_null=True)
+
+    class Meta:
+        model = ArchiveChange
+        fields = [
+            "token",
+            "event",
+            "site",
+            "index",
+            "log_format",
+            "begin",
+            "end",
+            "timestamp",
+        ]
+        read_only_fields = fields
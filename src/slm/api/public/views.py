@@ -5,13 +5,16 @@ import django_filters
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Div, Field, Fieldset, Layout, Submit
 from django import forms
+from django.conf import settings
 from django.db.models import Prefetch, Q
 from django.http import FileResponse
 from django.utils.translation import gettext as _
 from django_enum.filters import EnumFilter
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet
 from rest_framework import mixins, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
 
 from slm.api.filter import (
     BaseStationFilter,
@@ -24,6 +27,7 @@ from slm.api.pagination import DataTablesPagination
 from slm.api.public.serializers import (  # DOMESSerializer
     AgencySerializer,
     AntennaSerializer,
+    ArchiveChangeSerializer,
     ArchiveSerializer,
     ManufacturerSerializer,
     NetworkSerializer,
@@ -40,6 +44,7 @@ from slm.forms import StationFilterForm as BaseStationFilterForm
 from slm.models import (
     Agency,
     Antenna,
+    ArchiveChange,
     ArchivedSiteLog,
     Equipment,
     Manufacturer,
@@ -217,43 +222,70 @@ class StationListViewSet(
     ordering = ("name",)
 
     def get_queryset(self):
-        return (
-            Site.objects.prefetch_related(
-                "agencies",
-                "networks",
-                Prefetch(
-                    "sitereceiver_set",
-                    queryset=SiteReceiver.objects.published()
-                    .prefetch_related("satellite_system")
-                    .order_by("-installed"),
-                ),
-                Prefetch(
-                    "tide_gauge_distances",
-                    queryset=SiteTideGauge.objects.prefetch_related("gauge").order_by(
-                        "-distance"
-                    ),
+        queryset = Site.objects.prefetch_related(
+            "agencies",
+            "networks",
+            Prefetch(
+                "sitereceiver_set",
+                queryset=SiteReceiver.objects.published()
+                .prefetch_related("satellite_system")
+                .order_by("-installed"),
+            ),
+            Prefetch(
+                "tide_gauge_distances",
+                queryset=SiteTideGauge.objects.prefetch_related("gauge").order_by(
+                    "-distance"
                 ),
-            )
-            .with_location_fields("city", "state", "country", "xyz", "llh")
-            .with_identification_fields("cdp_number", iers_domes_number="domes_number")
-            .with_antenna_fields(
+            ),
+        )
+        if getattr(settings, "SLM_STATION_SUMMARY", False):
+            queryset = queryset.with_summary_fields(
+                "city",
+                "state",
+                "country",
+                "xyz",
+                "llh",
+                "cdp_number",
+                "domes_number",
                 "antcal",
-                antenna_type__model="antenna_type",
-                radome_type__model="radome_type",
-                serial_number="antenna_serial_number",
-                marker_une="antenna_marker_une",
+                "antenna_type",
+                "radome_type",
+                "antenna_serial_number",
+                "antenna_marker_une",
+                "receiver_type",
+                "frequency_standard",
+                "data_center",
+                receiver_firmware="firmware",
+                receiver_serial_number="serial_number",
             )
-            .with_receiver_fields(
-                "firmware",
-                "serial_number",
-                receiver_type__model="receiver_type",
+        else:
+            queryset = (
+                queryset.with_location_fields(
+                    "city", "state", "country", "xyz", "llh", join=True
+                )
+                .with_identification_fields(
+                    "cdp_number", iers_domes_number="domes_number", join=True
+                )
+                .with_antenna_fields(
+                    "antcal",
+                    antenna_type__model="antenna_type",
+                    radome_type__model="radome_type",
+                    serial_number="antenna_serial_number",
+                    marker_une="antenna_marker_une",
+                    join=True,
+                )
+                .with_receiver_fields(
+                    "firmware",
+                    "serial_number",
+                    receiver_type__model="receiver_type",
+                    join=True,
+                )
+                .with_frequency_standard_fields(
+                    standard_type="frequency_standard", join=True
+                )
+                .with_info_fields(primary="data_center", join=True)
             )
-            .with_frequency_standard_fields(standard_type="frequency_standard")
-            .with_info_fields(primary="data_center")
-            .public()
-            .availability()
-            .distinct()
-        )
+        return queryset.public().availability().distinct()
 
 
 class SiteLogDownloadViewSet(BaseSiteLogDownloadViewSet):
@@ -606,3 +638,38 @@ class ArchiveViewSet(
 
     def get_queryset(self):
         return ArchivedSiteLog.objects.select_related("index", "site")
+
+
+class ArchiveChangeViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    A feed of changes to the archive index. Pass the token returned by the
+    last request as the since parameter to fetch only the changes made after
+    it. Tokens are opaque, ordered and stable so clients never need to rescan
+    the archive.
+    """
+
+    serializer_class = ArchiveChangeSerializer
+    permission_classes = []
+
+    MAX_LIMIT = 10000
+
+    def get_queryset(self):
+        return ArchiveChange.objects.all()
+
+    def list(self, request, *args, **kwargs):
+        since = request.query_params.get("since", None)
+        try:
+            limit = int(request.query_params.get("limit", 1000))
+        except ValueError as err:
+            raise ValidationError({"limit": str(err)}) from err
+        try:
+            changes = self.get_queryset().since(since)
+        except ValueError as err:
+            raise ValidationError({"since": str(err)}) from err
+        changes = list(changes[: max(1, min(limit, self.MAX_LIMIT))])
+        return Response(
+            {
+                "token": changes[-1].token if changes else since,
+                "changes": self.get_serializer(changes, many=True).data,
+            }
+        )
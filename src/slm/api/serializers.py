@@ -1,12 +1,19 @@
+import hashlib
 import json
+import time
+import typing as t
 
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import QuerySet
 from django.template.loader import get_template
 from django.utils.functional import cached_property
 from lxml import etree
 from rest_framework import serializers
 
+from slm import __version__
 from slm.defines import GeodesyMLVersion, SiteLogFormat, SiteLogStatus
-from slm.models import Site
+from slm.models import Site, SiteLogSnapshot
 
 
 class _Heading:
@@ -23,6 +30,7 @@ class SiteLogSerializer(serializers.BaseSerializer):
     published_param = True
     is_published = None
     graphic = ""
+    snapshot = None
 
     text_tmpl = get_template("slm/sitelog/legacy.log")
     text_9char_tmpl = get_template("slm/sitelog/ascii_9char.log")
@@ -30,6 +38,12 @@ class SiteLogSerializer(serializers.BaseSerializer):
     xml_parser = etree.XMLParser(remove_blank_text=True)
 
     def __init__(self, *args, instance, epoch=None, published=True, **kwargs):
+        if isinstance(instance, SiteLogSnapshot):
+            # render the sections of a snapshot instead of querying for them
+            self.snapshot = instance
+            instance = instance.site
+            epoch = self.snapshot.epoch
+            published = self.snapshot.published or None
         self.site = instance
         self.epoch_param = epoch
         self.epoch = epoch
@@ -54,9 +68,7 @@ class SiteLogSerializer(serializers.BaseSerializer):
                         "identifier": self.site.get_filename(
                             log_format=SiteLogFormat.GEODESY_ML, epoch=self.epoch_param
                         ).split(".")[0],
-                        "files": self.site.sitefileuploads.public().order_by(
-                            "timestamp"
-                        ),
+                        "files": self.files,
                     }
                 ).encode(),
                 parser=self.xml_parser,
@@ -64,12 +76,118 @@ class SiteLogSerializer(serializers.BaseSerializer):
             pretty_print=True,
         ).decode()
 
+    def prefetch(self) -> "SiteLogSerializer":
+        """
+        Fetch everything the site log templates need from the database now,
+        rendering a snapshot does not touch the database after this so its
+        formats may be rendered on other threads.
+
+        :return: This serializer
+        """
+        for prop in ["context", "files"]:
+            getattr(self, prop)
+        return self
+
+    @cached_property
+    def files(self):
+        """
+        The public file attachments listed in GeodesyML documents.
+        """
+        return list(self.site.sitefileuploads.public().order_by("timestamp"))
+
     @cached_property
     def json(self):
         # todo
         return json.dumps({})
 
+    @staticmethod
+    def render_cache():
+        """
+        The cache published renders are kept in, see :setting:`SLM_RENDER_CACHE`.
+        """
+        return caches[getattr(settings, "SLM_RENDER_CACHE", None) or "default"]
+
+    @staticmethod
+    def generation_key(site) -> str:
+        return f"slm:render:{getattr(site, 'pk', site)}"
+
+    @classmethod
+    def invalidate(cls, site):
+        """
+        Invalidate the cached renders of a site's published log. Renders are
+        keyed by a per-site generation that this replaces.
+
+        :param site: The Site or primary key of the site
+        """
+        cls.render_cache().set(cls.generation_key(site), time.time_ns(), timeout=None)
+
+    def cache_key(self, log_format, version=None) -> t.Optional[str]:
+        """
+        The key this serializer's render of the given format is cached under.
+        Only renders of published logs are cached. Keys include the publication
+        rendered and for GeodesyML the schema version and a hash of the
+        attachments listed.
+
+        :param log_format: The SiteLogFormat to render
+        :param version: The GeodesyMLVersion to render
+        :return: The cache key, or None if the render should not be cached
+        """
+        if (
+            not self.published_param
+            or self.epoch is None
+            or not getattr(settings, "SLM_RENDER_CACHE_TIMEOUT", 0)
+        ):
+            return None
+        parts = [
+            __version__,
+            self.site.pk,
+            self.render_cache().get(self.generation_key(self.site), 0),
+            # renders at an explicit epoch differ from the current render
+            self.epoch.isoformat()
+            if self.epoch_param
+            else f"@{self.epoch.isoformat()}",
+            log_format.value,
+        ]
+        if log_format is SiteLogFormat.GEODESY_ML:
+            parts.append(version.value)
+            parts.append(
+                hashlib.sha1(
+                    repr(
+                        [
+                            [
+                                getattr(file, field.attname)
+                                for field in file._meta.concrete_fields
+                            ]
+                            for file in self.files
+                        ]
+                    ).encode()
+                ).hexdigest()
+            )
+        return ":".join(str(part) for part in ["slm:render", *parts])
+
     def format(self, log_format, version=None):
+        """
+        Render the site log in the given format. Published renders are cached,
+        see :meth:`cache_key`.
+
+        :param log_format: The SiteLogFormat to render
+        :param version: The GeodesyMLVersion to render, default is the latest
+        :return: The rendered site log
+        """
+        log_format = SiteLogFormat(log_format)
+        if log_format is SiteLogFormat.GEODESY_ML:
+            version = version or GeodesyMLVersion.latest()
+        key = self.cache_key(log_format, version=version)
+        if key and (rendered := self.render_cache().get(key)) is not None:
+            return rendered
+        rendered = self.render(log_format, version=version)
+        if key:
+            self.render_cache().set(
+                key, rendered, timeout=getattr(settings, "SLM_RENDER_CACHE_TIMEOUT")
+            )
+        return rendered
+
+    def render(self, log_format, version=None):
         if log_format == SiteLogFormat.LEGACY:
             return self.text
         elif log_format == SiteLogFormat.ASCII_9CHAR:
@@ -87,40 +205,57 @@ class SiteLogSerializer(serializers.BaseSerializer):
 
     @cached_property
     def context(self):
-        def sort(subsections):
-            if subsections:
-                return subsections.sort()
-            return subsections
+        def sort(section):
+            # sections are instances, subsection stacks are fetched once in
+            # stack order
+            if isinstance(section, QuerySet):
+                return list(section.sort())
+            return section
 
-        # todo put this logic on the site model?
-        graphic = ""
-        if self.published_param:
-            ant = self.site.siteantenna_set.published(epoch=self.epoch_param).last()
-            graphic = ant.graphic if ant else ""
-        else:
-            antennas = self.site.siteantenna_set.head(
-                epoch=self.epoch_param, include_deleted=False
-            ).sort(reverse=True)
-            if antennas:
-                graphic = antennas[0].graphic
+        loaded = None
+        if self.snapshot is not None:
+            loaded = self.snapshot.sections
+        elif getattr(self.site, "loaded_sections_", None) == (
+            self.epoch_param,
+            bool(self.published_param),
+        ):
+            # sections were already fetched in bulk by SiteQuerySet.load_sections
+            loaded = {
+                section.field: getattr(self.site, section.field)
+                for section in Site.sections()
+            }
 
-        return {
-            "site": self.site,
-            **{
-                self.section_name(section.field): (
-                    getattr(self.site, section.accessor).published(
-                        epoch=self.epoch_param
-                    )
-                    if self.published_param
-                    else sort(
-                        getattr(self.site, section.accessor).head(
-                            epoch=self.epoch_param, include_deleted=False
-                        )
+        if loaded is not None:
+            antennas = loaded.get("siteantenna", None)
+            return {
+                "site": self.site,
+                **{
+                    self.section_name(section.field): loaded.get(section.field, None)
+                    for section in Site.sections()
+                },
+                "graphic": antennas[-1].graphic if antennas else "",
+            }
+
+        sections = {
+            self.section_name(section.field): (
+                getattr(self.site, section.accessor).published(epoch=self.epoch_param)
+                if self.published_param
+                else sort(
+                    getattr(self.site, section.accessor).head(
+                        epoch=self.epoch_param, include_deleted=False
                     )
                 )
-                for section in Site.sections()
-            },
-            "graphic": graphic,
+            )
+            for section in Site.sections()
+        }
+
+        # todo put this logic on the site model?
+        # fetching the antenna stack here also fetches it for the templates
+        antennas = list(sections["antenna"] or [])
+        return {
+            "site": self.site,
+            **sections,
+            "graphic": antennas[-1].graphic if antennas else "",
         }
 
     @cached_property
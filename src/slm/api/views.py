@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 
-from django.http import FileResponse, Http404
+from django.http import Http404
 from django.utils.translation import gettext as _
 from django_filters import filters
 from django_filters.rest_framework import DjangoFilterBackend
@@ -10,6 +10,7 @@ from rest_framework.generics import get_object_or_404
 from slm.api.filter import InitialValueFilterSet, SLMDateTimeFilter
 from slm.defines import SiteLogFormat
 from slm.models import ArchivedSiteLog, ArchiveIndex
+from slm.utils import archived_file_response
 
 
 class LegacyRenderer(renderers.BaseRenderer):
@@ -167,6 +168,9 @@ class BaseSiteLogDownloadViewSet(mixins.RetrieveModelMixin, viewsets.GenericView
         a new ArchivedSiteLog. If no index is found and allow_unpublished is
         true a new site log will be rendered from the current HEAD state.
 
+        Precompressed variants of the log are served if the client accepts
+        their content coding.
+
         :param request:
         :param args:
         :param kwargs:
@@ -180,8 +184,9 @@ class BaseSiteLogDownloadViewSet(mixins.RetrieveModelMixin, viewsets.GenericView
             raise Http404(
                 f"No log file in format {request.accepted_renderer.format} at index {index.begin}"
             )
-        return FileResponse(
-            archived.file,
+        return archived_file_response(
+            request,
+            archived,
             filename=index.site.get_filename(
                 log_format=archived.log_format,
                 epoch=index.begin,
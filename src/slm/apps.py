@@ -233,6 +233,16 @@ def alert_save(sender, instance, created, raw, using, update_fields, **kwargs):
         alert_issued.send(sender=sender, alert=instance)
 
 
+def section_changed(sender, instance, **kwargs):
+    """
+    Record that the denormalized state of the section's site may be stale.
+    """
+    from slm.models import DirtySite
+
+    if not kwargs.get("raw", False) and instance.site_id:
+        DirtySite.objects.mark(instance.site_id)
+
+
 def cache_realalert(sender, instance, using, **kwargs):
     """
     Cache real alert instance onto the model because we wont be able
@@ -324,6 +334,10 @@ class SLMConfig(AppConfig):
         post_save.connect(user_save, sender=get_user_model())
         post_migrate.connect(populate_groups)
 
+        for section in Site.sections():
+            post_save.connect(section_changed, sender=section.cls)
+            post_delete.connect(section_changed, sender=section.cls)
+
         for alert in Alert.objects.classes():
             post_save.connect(alert_save, sender=alert)
             pre_delete.connect(cache_realalert, sender=Alert)
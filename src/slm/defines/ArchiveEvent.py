@@ -0,0 +1,17 @@
+from django.utils.translation import gettext_lazy as _
+from django_enum import IntegerChoices
+from enum_properties import s
+
+
+class ArchiveEvent(IntegerChoices):
+    _symmetric_builtins_ = [s("name", case_fold=True)]
+
+    # fmt: off
+    INDEXED  = 1, _("Indexed")
+    CLOSED   = 2, _("Closed")
+    ARCHIVED = 3, _("Archived")
+    DELETED  = 4, _("Deleted")
+    # fmt: on
+
+    def __str__(self):
+        return str(self.label)
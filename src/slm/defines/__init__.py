@@ -3,6 +3,7 @@ from slm.defines.AlertLevel import AlertLevel
 from slm.defines.AntennaCalibration import AntennaCalibrationMethod
 from slm.defines.AntennaFeatures import AntennaFeatures
 from slm.defines.AntennaReferencePoint import AntennaReferencePoint
+from slm.defines.ArchiveEvent import ArchiveEvent
 from slm.defines.Aspiration import Aspiration
 from slm.defines.CardinalDirection import CardinalDirection
 from slm.defines.CollocationStatus import CollocationStatus
@@ -28,6 +29,7 @@ __all__ = [
     "AntennaCalibrationMethod",
     "AntennaFeatures",
     "AntennaReferencePoint",
+    "ArchiveEvent",
     "Aspiration",
     "CardinalDirection",
     "CollocationStatus",
@@ -9,20 +9,25 @@ from pathlib import Path
 from django.conf import settings
 from django.core.cache import cache
 from django.core.management import call_command
-from django.db.models import DateTimeField, F, Func, Max, PositiveIntegerField, Q, Value
+from django.db.models import DateTimeField, Func, Max, PositiveIntegerField, Q, Value
 from django.db.models.functions import Length
 from django.http import (
     FileResponse,
     Http404,
     HttpResponse,
+    HttpResponseNotModified,
     JsonResponse,
+    StreamingHttpResponse,
 )
+from django.utils.cache import add_never_cache_headers
 from django.utils.decorators import method_decorator
+from django.utils.http import http_date, parse_http_date_safe
 from django.views.decorators.cache import cache_page
 from django.views.generic import TemplateView
 
 from slm.defines import SiteLogFormat, SiteLogStatus
 from slm.models import ArchivedSiteLog, Site
+from slm.utils import archived_file_response
 
 from .config import Listing
 
@@ -281,7 +286,9 @@ class ArchivedSiteLogView(FileSystemView):
     interace similar to the page at https://files.igs.org/pub/station/log
 
     It allows access to site log text and a wild card/plain text listing
-    interface if the ?list url query parameter is present.
+    interface if the ?list url query parameter is present. If the ?tar or ?tgz
+    query parameters are present the listed logs are streamed as a tar archive
+    instead, see :meth:`tar_response`.
 
     File list views are cached in the default cache for 12 hours, or until the
     cache is cleared by a publish event.
@@ -305,10 +312,15 @@ class ArchivedSiteLogView(FileSystemView):
             "is_dir": "is_dir" if self.builtin_listings else None,
         }.get(key, super().translate_order_key(key))
 
-    def get_context_data(self, filename=None, **kwargs):
-        context = super().get_context_data(**kwargs)
-        listings = self.get_queryset(**kwargs)
-        if patterns := context.get("patterns", []):
+    def match(self, listings, patterns: t.Sequence[str]):
+        """
+        Filter the archived site log listings by glob patterns.
+
+        :param listings: The queryset of listings to filter
+        :param patterns: Glob patterns, listings matching any are kept
+        :return: The filtered queryset
+        """
+        if patterns:
             pattern_filter = Q()
             pattern_key = f"{self.translate_order_key('display')}__iregex"
             for pattern in patterns:
@@ -320,6 +332,11 @@ class ArchivedSiteLogView(FileSystemView):
                     }
                 )
             listings = listings.filter(pattern_filter)
+        return listings
+
+    def get_context_data(self, filename=None, **kwargs):
+        context = super().get_context_data(**kwargs)
+        listings = self.match(self.get_queryset(**kwargs), context.get("patterns", []))
 
         context["download"] = kwargs.get(
             "download", getattr(settings, "SLM_FILE_VIEW_DOWNLOAD", False)
@@ -376,40 +393,23 @@ class ArchivedSiteLogView(FileSystemView):
         :return: A queryset holding :class:`~slm.models.ArchivedSiteLog` objects matching the
             parameters.
         """
-        fltr = Q(index__site__in=self.kwargs.get("sites", self.sites))
-
-        if log_status:
-            fltr &= Q(index__site__status__in=log_status)
-        if log_formats:
-            fltr &= Q(log_format__in=log_formats)
-
-        qry = ArchivedSiteLog.objects.filter(fltr)
-
-        if best_format:
-            qry = qry.best_format()
-
-        if most_recent:
-            qry = qry.most_recent()
-
-        if non_current:
-            # we do it this way because in cases where the latest log has multiple indexes
-            # on the same day the last same day index will appear in the results - if we
-            # exclude the last  indexes in the same query it breaks
-            # the windowing exclusion of older same day logs for that latest index date
-            qry = ArchivedSiteLog.objects.filter(
-                pk__in=qry, index__valid_range__upper_inf=False
-            )
-
         if name_len is not None or lower_case is not None:
             self.lookup_field = "display"
-            qry = qry.annotate_filenames(
-                name_length=name_len or None,
-                lower_case=lower_case,
-                field_name="display",
-            )
         else:
             self.lookup_field = "name"
-            qry = qry.annotate(display=F("name"))
+
+        qry = ArchivedSiteLog.objects.filter(
+            index__site__in=self.kwargs.get("sites", self.sites)
+        ).listing(
+            log_formats=log_formats,
+            log_status=log_status,
+            best_format=best_format,
+            most_recent=most_recent,
+            non_current=non_current,
+            name_len=name_len,
+            lower_case=lower_case,
+            field_name="display",
+        )
 
         return qry.annotate(
             modified=Func(
@@ -422,18 +422,27 @@ class ArchivedSiteLogView(FileSystemView):
     def get(self, request, *args, filename=None, **kwargs):
         from slm.models import ArchivedSiteLog
 
+        if not filename and ("tar" in request.GET or "tgz" in request.GET):
+            return self.tar_response(request, **kwargs)
+
         if filename:
-            try:
-                archived = (
-                    self.get_queryset(**kwargs)
-                    .filter(**{f"{self.lookup_field}__iexact": filename})
-                    .order_by("-timestamp")
-                    .first()
+            # get_queryset determines the lookup field
+            listings = self.get_queryset(**kwargs)
+            lookup = {f"{self.lookup_field}__iexact": filename}
+            if self.lookup_field == "display" and (
+                column := ArchivedSiteLog.filename_field(
+                    kwargs.get("name_len", self.name_len), lower_case=True
                 )
+            ):
+                # an exact match on the stored lower case names can use their index
+                lookup = {column: filename.lower()}
+            try:
+                archived = listings.filter(**lookup).order_by("-timestamp").first()
                 if not archived:
                     raise Http404()
-                return FileResponse(
-                    archived.file,
+                return archived_file_response(
+                    request,
+                    archived,
                     filename=filename,
                     as_attachment=kwargs.get("download", False),
                 )
@@ -442,6 +451,45 @@ class ArchivedSiteLogView(FileSystemView):
 
         return super().get(request, *args, filename=filename, **kwargs)
 
+    def tar_response(self, request, **kwargs):
+        """
+        Stream a tar archive of the listed site logs, gzipped if the tgz query
+        parameter is present. Mirrors may send back the Last-Modified time of
+        their last synchronization as If-Modified-Since to only fetch the logs
+        that have been written to or moved within this listing since then.
+        """
+        listings = self.match(
+            self.get_queryset(**kwargs), request.GET.getlist("match", [])
+        )
+
+        if since := parse_http_date_safe(
+            request.META.get("HTTP_IF_MODIFIED_SINCE", "")
+        ):
+            listings = listings.modified_since(
+                datetime.fromtimestamp(since, tz=timezone.utc)
+            )
+            if not listings.exists():
+                response = HttpResponseNotModified()
+                add_never_cache_headers(response)
+                return response
+
+        # the shipped logs are current to this time, not the time of the request
+        synchronized = http_date(listings.last_modified().timestamp())
+        compress = "tgz" in request.GET
+        name = Path(request.path.rstrip("/")).name or "archive"
+        response = StreamingHttpResponse(
+            listings.order_by("timestamp").tar(compress=compress, field_name="display"),
+            content_type="application/gzip" if compress else "application/x-tar",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{name}.{"tar.gz" if compress else "tar"}"'
+        )
+        response["Last-Modified"] = synchronized
+        # streamed archives are never cached, they are specific to the
+        # requesting mirror's last synchronization
+        add_never_cache_headers(response)
+        return response
+
 
 @cache_page(3600 * 12, key_prefix="file_views")
 def command_output_view(
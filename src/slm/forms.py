@@ -499,7 +499,7 @@ class SectionForm(forms.ModelForm):
                 for field in fields
             ]
 
-        for structure in self.Meta.model.structure():
+        for structure in Site.section(self.Meta.model).structure:
             if isinstance(structure, tuple) or isinstance(structure, list):
                 group_fields = []
                 try:
@@ -582,7 +582,11 @@ class SiteFormForm(SectionForm):
 
     class Meta(SectionForm.Meta):
         model = SiteForm
-        fields = [*SectionForm.Meta.fields, *SiteForm.site_log_fields(), "previous_log"]
+        fields = [
+            *SectionForm.Meta.fields,
+            *Site.section(SiteForm).site_log_fields,
+            "previous_log",
+        ]
         widgets = {"date_prepared": DatePicker}
 
 
@@ -604,7 +608,7 @@ class SiteIdentificationForm(SectionForm):
         model = SiteIdentification
         fields = [
             *SectionForm.Meta.fields,
-            *SiteIdentification.site_log_fields(),
+            *Site.section(SiteIdentification).site_log_fields,
             "nine_character_id",
         ]
         field_classes = {"date_installed": SLMDateTimeField}
@@ -639,13 +643,16 @@ class SiteLocationForm(SectionForm):
 
     class Meta:
         model = SiteLocation
-        fields = [*SectionForm.Meta.fields, *SiteLocation.site_log_fields()]
+        fields = [*SectionForm.Meta.fields, *Site.section(SiteLocation).site_log_fields]
 
 
 class SiteReceiverForm(SubSectionForm):
     COPY_LAST_ON_ADD = [
         field
-        for field in [*SubSectionForm.Meta.fields, *SiteReceiver.site_log_fields()]
+        for field in [
+            *SubSectionForm.Meta.fields,
+            *Site.section(SiteReceiver).site_log_fields,
+        ]
         if field not in {"installed", "removed", "additional_info"}
     ]
 
@@ -685,14 +692,20 @@ class SiteReceiverForm(SubSectionForm):
 
     class Meta(SubSectionForm):
         model = SiteReceiver
-        fields = [*SubSectionForm.Meta.fields, *SiteReceiver.site_log_fields()]
+        fields = [
+            *SubSectionForm.Meta.fields,
+            *Site.section(SiteReceiver).site_log_fields,
+        ]
         field_classes = {"installed": SLMDateTimeField, "removed": SLMDateTimeField}
 
 
 class SiteAntennaForm(SubSectionForm):
     COPY_LAST_ON_ADD = [
         field
-        for field in [*SubSectionForm.Meta.fields, *SiteAntenna.site_log_fields()]
+        for field in [
+            *SubSectionForm.Meta.fields,
+            *Site.section(SiteAntenna).site_log_fields,
+        ]
         if field not in {"installed", "removed", "additional_info"}
     ]
 
@@ -739,7 +752,10 @@ class SiteAntennaForm(SubSectionForm):
 
     class Meta(SubSectionForm):
         model = SiteAntenna
-        fields = [*SubSectionForm.Meta.fields, *SiteAntenna.site_log_fields()]
+        fields = [
+            *SubSectionForm.Meta.fields,
+            *Site.section(SiteAntenna).site_log_fields,
+        ]
         field_classes = {
             "installed": SLMDateTimeField,
             "removed": SLMDateTimeField,
@@ -755,21 +771,30 @@ class SiteSurveyedLocalTiesForm(SubSectionForm):
 
     class Meta(SubSectionForm.Meta):
         model = SiteSurveyedLocalTies
-        fields = [*SubSectionForm.Meta.fields, *SiteSurveyedLocalTies.site_log_fields()]
+        fields = [
+            *SubSectionForm.Meta.fields,
+            *Site.section(SiteSurveyedLocalTies).site_log_fields,
+        ]
         field_classes = {"measured": SLMDateTimeField, "diff_xyz": SLMPointField}
 
 
 class SiteFrequencyStandardForm(SubSectionForm):
     class Meta(SubSectionForm.Meta):
         model = SiteFrequencyStandard
-        fields = [*SubSectionForm.Meta.fields, *SiteFrequencyStandard.site_log_fields()]
+        fields = [
+            *SubSectionForm.Meta.fields,
+            *Site.section(SiteFrequencyStandard).site_log_fields,
+        ]
         widgets = {"effective_start": DatePicker, "effective_end": DatePicker}
 
 
 class SiteCollocationForm(SubSectionForm):
     class Meta(SubSectionForm.Meta):
         model = SiteCollocation
-        fields = [*SubSectionForm.Meta.fields, *SiteCollocation.site_log_fields()]
+        fields = [
+            *SubSectionForm.Meta.fields,
+            *Site.section(SiteCollocation).site_log_fields,
+        ]
         widgets = {"effective_start": DatePicker, "effective_end": DatePicker}
 
 
@@ -790,7 +815,7 @@ class SiteHumiditySensorForm(MeteorologicalForm):
         model = SiteHumiditySensor
         fields = [
             *MeteorologicalForm.Meta.fields,
-            *SiteHumiditySensor.site_log_fields(),
+            *Site.section(SiteHumiditySensor).site_log_fields,
         ]
 
 
@@ -799,7 +824,7 @@ class SitePressureSensorForm(MeteorologicalForm):
         model = SitePressureSensor
         fields = [
             *MeteorologicalForm.Meta.fields,
-            *SitePressureSensor.site_log_fields(),
+            *Site.section(SitePressureSensor).site_log_fields,
         ]
 
 
@@ -808,7 +833,7 @@ class SiteTemperatureSensorForm(MeteorologicalForm):
         model = SiteTemperatureSensor
         fields = [
             *MeteorologicalForm.Meta.fields,
-            *SiteTemperatureSensor.site_log_fields(),
+            *Site.section(SiteTemperatureSensor).site_log_fields,
         ]
 
 
@@ -817,7 +842,7 @@ class SiteWaterVaporRadiometerForm(MeteorologicalForm):
         model = SiteWaterVaporRadiometer
         fields = [
             *MeteorologicalForm.Meta.fields,
-            *SiteWaterVaporRadiometer.site_log_fields(),
+            *Site.section(SiteWaterVaporRadiometer).site_log_fields,
         ]
 
 
@@ -826,7 +851,7 @@ class SiteOtherInstrumentationForm(MeteorologicalForm):
         model = SiteOtherInstrumentation
         fields = [
             *MeteorologicalForm.Meta.fields,
-            *SiteOtherInstrumentation.site_log_fields(),
+            *Site.section(SiteOtherInstrumentation).site_log_fields,
         ]
 
 
@@ -843,7 +868,7 @@ class SiteRadioInterferencesForm(LocalConditionForm):
         model = SiteRadioInterferences
         fields = [
             *LocalConditionForm.Meta.fields,
-            *SiteRadioInterferences.site_log_fields(),
+            *Site.section(SiteRadioInterferences).site_log_fields,
         ]
 
 
@@ -852,7 +877,7 @@ class SiteMultiPathSourcesForm(LocalConditionForm):
         model = SiteMultiPathSources
         fields = [
             *LocalConditionForm.Meta.fields,
-            *SiteMultiPathSources.site_log_fields(),
+            *Site.section(SiteMultiPathSources).site_log_fields,
         ]
 
 
@@ -861,7 +886,7 @@ class SiteSignalObstructionsForm(LocalConditionForm):
         model = SiteSignalObstructions
         fields = [
             *LocalConditionForm.Meta.fields,
-            *SiteSignalObstructions.site_log_fields(),
+            *Site.section(SiteSignalObstructions).site_log_fields,
         ]
 
 
@@ -870,7 +895,7 @@ class SiteLocalEpisodicEffectsForm(SubSectionForm):
         model = SiteLocalEpisodicEffects
         fields = [
             *SubSectionForm.Meta.fields,
-            *SiteLocalEpisodicEffects.site_log_fields(),
+            *Site.section(SiteLocalEpisodicEffects).site_log_fields,
         ]
         widgets = {"effective_start": DatePicker, "effective_end": DatePicker}
 
@@ -887,19 +912,28 @@ class AgencyPOCForm(SectionForm):
 class SiteOperationalContactForm(AgencyPOCForm):
     class Meta(AgencyPOCForm.Meta):
         model = SiteOperationalContact
-        fields = [*AgencyPOCForm.Meta.fields, *SiteOperationalContact.site_log_fields()]
+        fields = [
+            *AgencyPOCForm.Meta.fields,
+            *Site.section(SiteOperationalContact).site_log_fields,
+        ]
 
 
 class SiteResponsibleAgencyForm(AgencyPOCForm):
     class Meta(AgencyPOCForm.Meta):
         model = SiteResponsibleAgency
-        fields = [*AgencyPOCForm.Meta.fields, *SiteResponsibleAgency.site_log_fields()]
+        fields = [
+            *AgencyPOCForm.Meta.fields,
+            *Site.section(SiteResponsibleAgency).site_log_fields,
+        ]
 
 
 class SiteMoreInformationForm(SectionForm):
     class Meta(SectionForm.Meta):
         model = SiteMoreInformation
-        fields = [*SectionForm.Meta.fields, *SiteMoreInformation.site_log_fields()]
+        fields = [
+            *SectionForm.Meta.fields,
+            *Site.section(SiteMoreInformation).site_log_fields,
+        ]
 
 
 class UserForm(forms.ModelForm):
@@ -67,31 +67,41 @@ class Command(TyperCommand):
         if SiteLogFormat.LEGACY in self.formats:
             self.formats.insert(0, SiteLogFormat.ASCII_9CHAR)
 
-        with transaction.atomic():
+        def yes(ipt):
+            return ipt.lower() in {"y", "yes", "true", "continue"}
 
-            def yes(ipt):
-                return ipt.lower() in {"y", "yes", "true", "continue"}
-
-            if rebuild:
-                if yes(
-                    input(
-                        _(
-                            "WARNING: this will delete the current index. This cannot "
-                            "be undone if you do not have an external archive! "
-                            "Proceed? (Y/N): "
-                        )
+        if rebuild:
+            if yes(
+                input(
+                    _(
+                        "WARNING: this will delete the current index. This cannot "
+                        "be undone if you do not have an external archive! "
+                        "Proceed? (Y/N): "
                     )
-                ):
-                    ArchiveIndex.objects.all().delete()
-                else:
-                    return
+                )
+            ):
+                indexes = ArchiveIndex.objects.all()
+                with tqdm(
+                    total=indexes.count(), desc="Deleting", unit="indexes"
+                ) as p_bar:
+                    indexes.prune(progress=lambda count: p_bar.update(n=count))
+            else:
+                return
 
-            sites = Site.objects.public().filter(status=SiteLogStatus.PUBLISHED)
-            # build from current data
-            with tqdm(
-                total=sites.count(), desc="Indexing", unit="sites", postfix={"site": ""}
-            ) as p_bar:
-                for site in sites:
-                    p_bar.set_postfix({"site": site.name})
-                    ArchiveIndex.objects.add_index(site=site, formats=self.formats)
-                    p_bar.update(n=1)
+        # the index is pruned in batches and each site is indexed in its own
+        # transaction so a rebuild does not hold back the archive change feed
+        sites = Site.objects.public().filter(status=SiteLogStatus.PUBLISHED)
+        # build from current data
+        with tqdm(
+            total=sites.count(), desc="Indexing", unit="sites", postfix={"site": ""}
+        ) as p_bar:
+            for snapshot in sites.snapshots():
+                p_bar.set_postfix({"site": snapshot.site.name})
+                with transaction.atomic():
+                    ArchiveIndex.objects.add_index(
+                        site=snapshot.site,
+                        formats=self.formats,
+                        snapshot=snapshot,
+                        defer=False,
+                    )
+                p_bar.update(n=1)
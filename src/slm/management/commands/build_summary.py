@@ -0,0 +1,75 @@
+"""
+Rebuild the materialized station summary table from the published site log
+data. When the ``SLM_STATION_SUMMARY`` setting is enabled the summary is
+maintained whenever a site is published and read by the public APIs and SINEX
+generation. This command only needs to be run when the setting is first
+enabled or if the table becomes out of sync with the site log data (e.g.
+after direct database edits or data imports).
+"""
+
+import typing as t
+
+from django.utils.translation import gettext as _
+from django_typer.management import TyperCommand, model_parser_completer
+from tqdm import tqdm
+from typer import Argument, Option
+from typing_extensions import Annotated
+
+from slm.models import Site, StationSummary
+
+
+class Command(TyperCommand):
+    help = _("Rebuild the station summary table from the published site log data.")
+
+    suppressed_base_arguments = {
+        *TyperCommand.suppressed_base_arguments,
+        "version",
+        "pythonpath",
+        "settings",
+    }
+
+    def handle(
+        self,
+        sites: Annotated[
+            t.Optional[t.List[Site]],
+            Argument(
+                **model_parser_completer(
+                    Site, lookup_field="name", case_insensitive=True
+                ),
+                help=_(
+                    "The station(s) to rebuild summaries for, if unspecified, "
+                    "rebuild all of them."
+                ),
+            ),
+        ] = None,
+        batch_size: Annotated[
+            int,
+            Option(
+                "--batch-size",
+                help=_("The number of sites to rebuild at a time."),
+            ),
+        ] = 500,
+    ):
+        site_ids = list(
+            (
+                Site.objects.filter(pk__in=[site.pk for site in sites])
+                if sites
+                else Site.objects.public()
+            )
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        created = 0
+        with tqdm(total=len(site_ids), desc="Summarizing", unit="sites") as p_bar:
+            for idx in range(0, len(site_ids), batch_size):
+                batch = site_ids[idx : idx + batch_size]
+                created += StationSummary.objects.rebuild(
+                    Site.objects.filter(pk__in=batch)
+                )
+                p_bar.update(n=len(batch))
+        self.secho(
+            _("Created {count} summary rows for {sites} sites.").format(
+                count=created, sites=len(site_ids)
+            ),
+            fg="green",
+        )
@@ -0,0 +1,161 @@
+"""
+Export archived site log files as a tar archive. Logs are selected with the
+same parameters the archive file views use, and files are streamed into the
+archive one chunk at a time so exports of the full archive do not need to fit
+in memory.
+
+Incremental exports may be made by passing ``--since`` the time of the last
+export, only logs that were added to or moved within the selection after that
+time are included.
+"""
+
+import sys
+import typing as t
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.utils.timezone import is_naive, make_aware
+from django.utils.translation import gettext as _
+from django_typer.completers import complete_path, these_strings
+from django_typer.management import TyperCommand
+from typer import Argument, Option
+from typing_extensions import Annotated
+
+from slm.defines import SiteLogFormat, SiteLogStatus
+from slm.models import ArchivedSiteLog, Site
+
+
+class Command(TyperCommand):
+    help = _("Export archived site log files as a tar archive.")
+
+    suppressed_base_arguments = {
+        *TyperCommand.suppressed_base_arguments,
+        "version",
+        "pythonpath",
+        "settings",
+    }
+
+    def handle(
+        self,
+        destination: Annotated[
+            t.Optional[Path],
+            Argument(
+                dir_okay=False,
+                help=_(
+                    "The file to write the archive to, if none provided the "
+                    "archive is written to stdout. Archives written to files "
+                    "ending in .gz or .tgz are gzipped."
+                ),
+                shell_complete=complete_path,
+            ),
+        ] = None,
+        formats: Annotated[
+            t.Optional[t.List[str]],
+            Option(
+                "--format",
+                metavar="FORMAT",
+                help=_("Only export site logs of the specified format(s)."),
+                shell_complete=these_strings(set([fmt.ext for fmt in SiteLogFormat])),
+            ),
+        ] = None,
+        status: Annotated[
+            t.Optional[t.List[str]],
+            Option(
+                "--status",
+                metavar="STATUS",
+                help=_(
+                    "Only export site logs of sites in these states. Defaults to "
+                    "the active states."
+                ),
+                shell_complete=these_strings(
+                    [str(status.label) for status in SiteLogStatus]
+                ),
+            ),
+        ] = None,
+        best_format: Annotated[
+            bool,
+            Option(
+                "--best-format",
+                help=_("Only export the highest ranking format at each timestamp."),
+            ),
+        ] = False,
+        most_recent: Annotated[
+            bool,
+            Option(
+                "--most-recent",
+                help=_("Only export the most recent logs for each site."),
+            ),
+        ] = False,
+        non_current: Annotated[
+            bool,
+            Option(
+                "--non-current",
+                help=_("Only export logs that are no longer current."),
+            ),
+        ] = False,
+        name_len: Annotated[
+            t.Optional[int],
+            Option(
+                "--name-len",
+                help=_(
+                    "Name logs using this many characters from the start of the "
+                    "9 character site name."
+                ),
+            ),
+        ] = None,
+        lower_case: Annotated[
+            t.Optional[bool],
+            Option(
+                "--lower-case/--upper-case",
+                help=_("Name logs in lower or upper case."),
+                show_default=False,
+            ),
+        ] = None,
+        since: Annotated[
+            t.Optional[datetime],
+            Option(
+                "--since",
+                help=_(
+                    "Only export logs added to or moved within the selection at "
+                    "or after this time. Naive times are in UTC."
+                ),
+            ),
+        ] = None,
+        gzip: Annotated[
+            bool,
+            Option("--gzip", help=_("Gzip the archive.")),
+        ] = False,
+    ):
+        formats = formats or []
+        status = status or []
+        logs = ArchivedSiteLog.objects.filter(
+            index__site__in=Site.objects.public()
+        ).listing(
+            log_formats=[SiteLogFormat(fmt) for fmt in formats],
+            log_status=[SiteLogStatus(sts) for sts in status]
+            or SiteLogStatus.active_states(),
+            best_format=best_format,
+            most_recent=most_recent,
+            non_current=non_current,
+            name_len=name_len,
+            lower_case=lower_case,
+        )
+        if since:
+            logs = logs.modified_since(
+                make_aware(since, timezone.utc) if is_naive(since) else since
+            )
+
+        gzip = gzip or (
+            destination is not None and destination.suffix in {".gz", ".tgz"}
+        )
+        stream = destination.open("wb") if destination else sys.stdout.buffer
+        try:
+            for chunk in logs.order_by("timestamp").tar(
+                compress=gzip, field_name="display"
+            ):
+                stream.write(chunk)
+        finally:
+            if destination:
+                stream.close()
+            else:
+                stream.flush()
@@ -52,14 +52,20 @@ from pathlib import Path
 import requests
 from django.conf import settings
 from django.core.management import CommandError
-from django.db.models import Prefetch
 from django.utils.translation import gettext as _
 from django_typer.management import TyperCommand, model_parser_completer
 from typer import Argument, Option
 from typing_extensions import Annotated
 
 from slm.defines import ISOCountry
-from slm.models import Network, Site, SiteAntenna, SiteReceiver
+from slm.models import (
+    Network,
+    Site,
+    SiteAntenna,
+    SiteLogSnapshot,
+    SiteReceiver,
+    StationSummary,
+)
 from slm.utils import dddmmss_ss_parts, lon_180_to_360, transliterate, xyz2llh
 
 
@@ -115,10 +121,12 @@ class Command(TyperCommand):
     atx: dict
     sat_phase_center: dict
     utf8: bool = False
+    summary: bool = False
 
     antex_file: str = "https://files.igs.org/pub/station/general/igs20.atx.gz"
 
     sites: t.Sequence[Site]
+    snapshots: t.Sequence[SiteLogSnapshot]
 
     suppressed_base_arguments = {
         *TyperCommand.suppressed_base_arguments,
@@ -173,6 +181,16 @@ class Command(TyperCommand):
         originating_agency: Annotated[
             str, Option("--origin", help="The originating agency short name.")
         ] = originating_agency,
+        summary: Annotated[
+            bool,
+            Option(
+                "--summary",
+                help=_(
+                    "Read station information from the station summary table "
+                    "instead of the site log sections."
+                ),
+            ),
+        ] = getattr(settings, "SLM_STATION_SUMMARY", False),
     ):
         self.sinex_code = ""
         self.siteAnt = rec_dd()
@@ -182,6 +200,7 @@ class Command(TyperCommand):
         self.utf8 = utf8
         self.creating_agency = creating_agency
         self.originating_agency = originating_agency
+        self.summary = summary
 
         sites = Site.objects.all().order_by("name")
         sites = sites.public() if include_former else sites.active()
@@ -189,6 +208,11 @@ class Command(TyperCommand):
             sites |= sites.filter(networks__in=include_networks)
 
         self.sites = sites.distinct()
+        self.snapshots = (
+            []
+            if self.summary
+            else self.sites.snapshots(sections=[SiteReceiver, SiteAntenna])
+        )
 
         self.used_antennas = set(
             [
@@ -407,7 +431,12 @@ class Command(TyperCommand):
         yield from []
 
     def site_ids(self) -> t.Generator[str, None, None]:
-        sites = self.sites.with_location_fields().with_identification_fields()
+        if self.summary:
+            sites = self.sites.with_summary_fields(
+                "xyz", "city", "state", "country", domes_number="iers_domes_number"
+            )
+        else:
+            sites = self.sites.with_location_fields().with_identification_fields()
         yield "+SITE/ID"
         yield (
             "*CODE PT __DOMES__ T _STATION DESCRIPTION__ _LONGITUDE_ "
@@ -465,17 +494,22 @@ class Command(TyperCommand):
             "_S/N_ _FIRMWARE__"
         )
 
-        for site in self.sites.prefetch_related(
-            Prefetch(
-                "sitereceiver_set",
-                queryset=SiteReceiver.objects.published()
-                .prefetch_related("receiver_type")
-                .order_by("installed"),
-            )
-        ):
-            for receiver in site.sitereceiver_set.all():
+        if self.summary:
+            for four_id, row in self.summary_equipment("receiver"):
                 yield (
-                    f" {site.four_id.lower()}  A ---- P "
+                    f" {four_id}  A ---- P "
+                    f"{sinex_time(row.receiver_installed):<12.12} "
+                    f"{sinex_time(row.receiver_removed):<12.12} "
+                    f"{row.receiver_type:<20.20} "
+                    f"{row.receiver_serial_number:<5.5} {row.receiver_firmware:<11.11}"
+                )
+            yield "-SITE/RECEIVER"
+            return
+
+        for snapshot in self.snapshots:
+            for receiver in snapshot.sitereceiver:
+                yield (
+                    f" {snapshot.site.four_id.lower()}  A ---- P "
                     f"{sinex_time(receiver.installed):<12.12} "
                     f"{sinex_time(receiver.removed):<12.12} "
                     f"{receiver.receiver_type.model:<20.20} "
@@ -488,17 +522,28 @@ class Command(TyperCommand):
         yield (
             "*CODE PT SOLN T _DATA START_ __DATA_END__ ____ANTENNA_TYPE____ _S/N_ _DAZ"
         )
-        for site in self.sites.prefetch_related(
-            Prefetch(
-                "siteantenna_set",
-                queryset=SiteAntenna.objects.published()
-                .prefetch_related("antenna_type", "radome_type")
-                .order_by("installed"),
-            )
-        ):
-            for antenna in site.siteantenna_set.all():
+        if self.summary:
+            for four_id, row in self.summary_equipment("antenna"):
                 yield (
-                    f" {site.four_id.lower()}  A ---- P "
+                    f" {four_id}  A ---- P "
+                    f"{sinex_time(row.antenna_installed):<12.12} "
+                    f"{sinex_time(row.antenna_removed):<12.12} "
+                    f"{row.antenna_type:<15.15} "
+                    f"{row.radome_type:4.4} "
+                    f"{row.antenna_serial_number:<5.5} "
+                    + (
+                        f"{row.antenna_alignment:>4.0f}"
+                        if row.antenna_alignment is not None
+                        else " " * 4
+                    )
+                )
+            yield "-SITE/ANTENNA"
+            return
+
+        for snapshot in self.snapshots:
+            for antenna in snapshot.siteantenna:
+                yield (
+                    f" {snapshot.site.four_id.lower()}  A ---- P "
                     f"{sinex_time(antenna.installed):<12.12} "
                     f"{sinex_time(antenna.removed):<12.12} "
                     f"{antenna.antenna_type.model:<15.15} "
@@ -599,15 +644,29 @@ class Command(TyperCommand):
         yield (
             "*CODE PT SOLN T _DATA START_ __DATA_END__ REF __DX_U__ __DX_N__ __DX_E__"
         )
-        for site in self.sites.prefetch_related(
-            Prefetch(
-                "siteantenna_set",
-                queryset=SiteAntenna.objects.published().order_by("installed"),
-            )
-        ).filter():
-            for antenna in site.siteantenna_set.all():
+        if self.summary:
+            for four_id, row in self.summary_equipment("antenna"):
                 yield (
-                    f" {site.four_id.lower():4.4}  A ---- P "
+                    f" {four_id:4.4}  A ---- P "
+                    f"{sinex_time(row.antenna_installed):12.12} "
+                    f"{sinex_time(row.antenna_removed):12.12} UNE "
+                    + (
+                        (
+                            f"{row.antenna_marker_une[0]:8.4f} "
+                            f"{row.antenna_marker_une[1]:8.4f} "
+                            f"{row.antenna_marker_une[2]:8.4f}"
+                        )
+                        if row.antenna_marker_une
+                        else " " * 26
+                    )
+                )
+            yield "-SITE/ECCENTRICITY"
+            return
+
+        for snapshot in self.snapshots:
+            for antenna in snapshot.siteantenna:
+                yield (
+                    f" {snapshot.site.four_id.lower():4.4}  A ---- P "
                     f"{sinex_time(antenna.installed):12.12} "
                     f"{sinex_time(antenna.removed):12.12} UNE "
                     + (
@@ -622,6 +681,30 @@ class Command(TyperCommand):
                 )
         yield "-SITE/ECCENTRICITY"
 
+    def summary_equipment(
+        self, equipment: str
+    ) -> t.Generator[t.Tuple[str, StationSummary], None, None]:
+        """
+        Yield the station summary rows for each distinct receiver or antenna
+        installation at the sites in time order. Summary rows are split on
+        any equipment change so consecutive rows may share the same receiver
+        or antenna.
+
+        :param equipment: Either "receiver" or "antenna"
+        :yield: 2-tuples of (lower case four character id, summary row)
+        """
+        last = None
+        for row in (
+            StationSummary.objects.filter(site__in=self.sites)
+            .exclude(**{f"{equipment}_type": ""})
+            .select_related("site")
+            .order_by("site__name", "valid_range")
+        ):
+            key = (row.site_id, getattr(row, f"{equipment}_installed"))
+            if key != last:
+                last = key
+                yield row.site.four_id.lower(), row
+
     def satellite_ids(self) -> t.Generator[str, None, None]:
         yield "+SATELLITE/ID"
         yield ("*CNNN PN COSPARID_ T _START_DATE_ __END_DATE__ ____ANTENNA_TYPE____")
@@ -51,6 +51,7 @@ from typing_extensions import Annotated
 
 from slm.defines import SiteLogFormat, SiteLogStatus, SLMFileType
 from slm.models import Agency, ArchivedSiteLog, ArchiveIndex, Site, User
+from slm.parsing import detect_encoding, read_lines
 from slm.parsing.legacy import SiteLogBinder, SiteLogParser
 from slm.parsing.xsd import (
     SiteLogBinder as XSDSiteLogBinder,
@@ -697,6 +698,8 @@ class Command(TyperCommand):
                 return log.absolute()
 
     def process_file(self, file_meta: FileMeta):
+        # each file is imported in its own transaction so a large import does
+        # not hold back the archive change feed
         with transaction.atomic():
             site = Site.objects.filter(name__istartswith=file_meta.name[0:4]).first()
 
@@ -826,14 +829,14 @@ class Command(TyperCommand):
         if configured write the parsing log html file out to the specified directory.
         """
 
-        log_str = self.decode_log(file_meta.contents)
+        lines = read_lines(file_meta.contents)
         if file_meta.format is SiteLogFormat.GEODESY_ML:
             file_meta.bound = XSDSiteLogBinder(
-                XSDSiteLogParser(log_str, site_name=file_meta.site.name)
+                XSDSiteLogParser(lines, site_name=file_meta.site.name)
             )
         else:
             file_meta.bound = SiteLogBinder(
-                SiteLogParser(log_str, site_name=file_meta.site.name)
+                SiteLogParser(lines, site_name=file_meta.site.name)
             )
 
         prep_time = file_meta.get_param((0, None, None), "date_prepared")
@@ -876,12 +879,9 @@ class Command(TyperCommand):
         if isinstance(contents, str):
             return contents
         try:
-            return contents.decode("utf-8")
+            return contents.decode(detect_encoding(contents[: 64 * 1024]))
         except UnicodeDecodeError:
-            try:
-                return contents.decode("ascii")
-            except UnicodeDecodeError:
-                return contents.decode("latin")
+            return contents.decode("latin-1")
 
     def determine_time(self, file_meta: FileMeta) -> datetime:
         """
@@ -0,0 +1,97 @@
+"""
+Render the site log files that were queued for the archive when sites were
+published. Publishing only queues these files when the ``SLM_DEFERRED_ARCHIVE``
+setting is enabled, in which case this command should be run periodically or
+kept running with ``--poll``. Queued files that are requested before they are
+rendered are rendered on demand.
+
+Jobs are claimed with row locks that skip locked rows, so multiple instances
+of this command may drain the queue at the same time.
+"""
+
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.utils.translation import gettext as _
+from django_typer.management import TyperCommand
+from tqdm import tqdm
+from typer import Option
+from typing_extensions import Annotated
+
+from slm.models import ArchiveRenderJob
+
+
+class Command(TyperCommand):
+    help = _("Render the site log files queued for the archive index.")
+
+    suppressed_base_arguments = {
+        *TyperCommand.suppressed_base_arguments,
+        "version",
+        "pythonpath",
+        "settings",
+    }
+
+    def handle(
+        self,
+        workers: Annotated[
+            int,
+            Option(
+                "--workers",
+                help=_("The number of indexes to render concurrently."),
+            ),
+        ] = 1,
+        max_attempts: Annotated[
+            int,
+            Option(
+                "--max-attempts",
+                help=_("Do not retry jobs that have failed this many times."),
+            ),
+        ] = 3,
+        poll: Annotated[
+            t.Optional[float],
+            Option(
+                "--poll",
+                help=_(
+                    "Keep running and check for new jobs at this interval in "
+                    "seconds once the queue is empty."
+                ),
+            ),
+        ] = None,
+    ):
+        def drain(p_bar):
+            try:
+                for _index, formats in ArchiveRenderJob.objects.drain(
+                    max_attempts=max_attempts
+                ):
+                    p_bar.update(n=len(formats))
+            finally:
+                connections.close_all()
+
+        while True:
+            with tqdm(
+                total=ArchiveRenderJob.objects.filter(
+                    attempts__lt=max_attempts
+                ).count(),
+                desc="Rendering",
+                unit="files",
+            ) as p_bar:
+                if workers > 1:
+                    with ThreadPoolExecutor(max_workers=workers) as pool:
+                        for future in [
+                            pool.submit(drain, p_bar) for _worker in range(workers)
+                        ]:
+                            future.result()
+                else:
+                    drain(p_bar)
+            if poll is None:
+                break
+            time.sleep(poll)
+
+        failed = ArchiveRenderJob.objects.filter(attempts__gte=max_attempts).count()
+        if failed:
+            self.secho(
+                _("{count} archive files could not be rendered.").format(count=failed),
+                fg="red",
+            )
@@ -10,7 +10,6 @@ parts of this pipeline.
 
 import typing as t
 from datetime import datetime
-from pathlib import Path
 
 from django.core.management import CommandError
 from django.db.models import Q
@@ -92,7 +91,7 @@ class Command(TyperCommand):
                     )
                 )
 
-            self.stdout.write(Path(log_file.file.path).read_text())
+            self.stdout.write(log_file.contents)
         else:
             self.stdout.write(
                 SiteLogSerializer(
@@ -133,7 +132,7 @@ class Command(TyperCommand):
                     )
                 )
 
-            self.stdout.write(Path(log_file.file.path).read_text())
+            self.stdout.write(log_file.contents)
         else:
             self.stdout.write(
                 SiteLogSerializer(
@@ -10,6 +10,10 @@ Some examples of denormalized state in the SLM include:
     * Counts of validation flags
     * Maximum alert levels for stations
     * Site log status indicators (PUBLISHED/UNPUBLISHED) for stations.
+
+Edits, flag changes and alerts record the sites they affect. Pass ``--dirty``
+to synchronize only those sites. This is much cheaper than a full
+synchronization and is suitable to run periodically.
 """
 
 import typing as t
@@ -18,10 +22,11 @@ from django.db import transaction
 from django.db.models import Q
 from django.utils.translation import gettext as _
 from django_typer.management import TyperCommand, model_parser_completer
-from typer import Argument
+from tqdm import tqdm
+from typer import Argument, Option
 from typing_extensions import Annotated
 
-from slm.models import Site
+from slm.models import DirtySite, Site
 
 
 class Command(TyperCommand):
@@ -52,7 +57,32 @@ class Command(TyperCommand):
                 ),
             ),
         ] = None,
+        dirty: Annotated[
+            bool,
+            Option(
+                "--dirty",
+                help=_(
+                    "Only synchronize sites that have recorded changes since they "
+                    "were last synchronized."
+                ),
+            ),
+        ] = False,
+        batch_size: Annotated[
+            int,
+            Option(
+                "--batch-size",
+                help=_("The number of dirty sites to synchronize at a time."),
+            ),
+        ] = 500,
     ):
+        if dirty:
+            with tqdm(
+                total=DirtySite.objects.count(), desc="Synchronizing", unit="sites"
+            ) as p_bar:
+                for site_ids in DirtySite.objects.drain(batch_size=batch_size):
+                    p_bar.update(n=len(site_ids))
+            return
+
         with transaction.atomic():
             qry = Q()
             if sites:
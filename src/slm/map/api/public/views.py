@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import pagination
 from rest_framework.response import Response
 
@@ -59,6 +60,8 @@ class StationMapViewSet(StationListViewSet):
     pagination_class = FeatureCollectionPagination
 
     def get_queryset(self):
-        return (
-            Site.objects.with_location_fields("llh").public().availability().distinct()
-        )
+        if getattr(settings, "SLM_STATION_SUMMARY", False):
+            queryset = Site.objects.with_summary_fields("llh")
+        else:
+            queryset = Site.objects.with_location_fields("llh")
+        return queryset.public().availability().distinct()
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.20 on 2026-10-17 12:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("slm", "0032_archiveindex_valid_range_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DirtySite",
+            fields=[
+                (
+                    "site",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="dirty",
+                        serialize=False,
+                        to="slm.site",
+                    ),
+                ),
+                (
+                    "timestamp",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+            ],
+        ),
+    ]
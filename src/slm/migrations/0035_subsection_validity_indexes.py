@@ -0,0 +1,243 @@
+# Generated by Django 4.2.20 on 2026-10-17 14:05
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("slm", "0034_stationsummary"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="sitereceiver",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.db.models.expressions.Func(
+                    models.F("installed"),
+                    models.Case(
+                        models.When(
+                            ("removed__lt", models.F("installed")),
+                            then=models.F("installed"),
+                        ),
+                        default=models.F("removed"),
+                    ),
+                    models.Value("[)"),
+                    function="TSTZRANGE",
+                    output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField(),
+                ),
+                name="slm_receiver_validity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="siteantenna",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.db.models.expressions.Func(
+                    models.F("installed"),
+                    models.Case(
+                        models.When(
+                            ("removed__lt", models.F("installed")),
+                            then=models.F("installed"),
+                        ),
+                        default=models.F("removed"),
+                    ),
+                    models.Value("[)"),
+                    function="TSTZRANGE",
+                    output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField(),
+                ),
+                name="slm_antenna_validity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sitefrequencystandard",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.db.models.expressions.Func(
+                    models.F("effective_start"),
+                    models.Case(
+                        models.When(
+                            ("effective_end__lt", models.F("effective_start")),
+                            then=models.F("effective_start"),
+                        ),
+                        default=models.F("effective_end"),
+                    ),
+                    models.Value("[)"),
+                    function="DATERANGE",
+                    output_field=django.contrib.postgres.fields.ranges.DateRangeField(),
+                ),
+                name="slm_frequency_validity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sitecollocation",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.db.models.expressions.Func(
+                    models.F("effective_start"),
+                    models.Case(
+                        models.When(
+                            ("effective_end__lt", models.F("effective_start")),
+                            then=models.F("effective_start"),
+                        ),
+                        default=models.F("effective_end"),
+                    ),
+                    models.Value("[)"),
+                    function="DATERANGE",
+                    output_field=django.contrib.postgres.fields.ranges.DateRangeField(),
+                ),
+                name="slm_collocation_validity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sitehumiditysensor",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.db.models.expressions.Func(
+                    models.F("effective_start"),
+                    models.Case(
+                        models.When(
+                            ("effective_end__lt", models.F("effective_start")),
+                            then=models.F("effective_start"),
+                        ),
+                        default=models.F("effective_end"),
+                    ),
+                    models.Value("[)"),
+                    function="DATERANGE",
+                    output_field=django.contrib.postgres.fields.ranges.DateRangeField(),
+                ),
+                name="slm_humidity_validity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sitepressuresensor",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.db.models.expressions.Func(
+                    models.F("effective_start"),
+                    models.Case(
+                        models.When(
+                            ("effective_end__lt", models.F("effective_start")),
+                            then=models.F("effective_start"),
+                        ),
+                        default=models.F("effective_end"),
+                    ),
+                    models.Value("[)"),
+                    function="DATERANGE",
+                    output_field=django.contrib.postgres.fields.ranges.DateRangeField(),
+                ),
+                name="slm_pressure_validity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sitetemperaturesensor",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.db.models.expressions.Func(
+                    models.F("effective_start"),
+                    models.Case(
+                        models.When(
+                            ("effective_end__lt", models.F("effective_start")),
+                            then=models.F("effective_start"),
+                        ),
+                        default=models.F("effective_end"),
+                    ),
+                    models.Value("[)"),
+                    function="DATERANGE",
+                    output_field=django.contrib.postgres.fields.ranges.DateRangeField(),
+                ),
+                name="slm_temperature_validity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sitewatervaporradiometer",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.db.models.expressions.Func(
+                    models.F("effective_start"),
+                    models.Case(
+                        models.When(
+                            ("effective_end__lt", models.F("effective_start")),
+                            then=models.F("effective_start"),
+                        ),
+                        default=models.F("effective_end"),
+                    ),
+                    models.Value("[)"),
+                    function="DATERANGE",
+                    output_field=django.contrib.postgres.fields.ranges.DateRangeField(),
+                ),
+                name="slm_water_vapor_validity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="siteradiointerferences",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.db.models.expressions.Func(
+                    models.F("effective_start"),
+                    models.Case(
+                        models.When(
+                            ("effective_end__lt", models.F("effective_start")),
+                            then=models.F("effective_start"),
+                        ),
+                        default=models.F("effective_end"),
+                    ),
+                    models.Value("[)"),
+                    function="DATERANGE",
+                    output_field=django.contrib.postgres.fields.ranges.DateRangeField(),
+                ),
+                name="slm_interference_validity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sitemultipathsources",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.db.models.expressions.Func(
+                    models.F("effective_start"),
+                    models.Case(
+                        models.When(
+                            ("effective_end__lt", models.F("effective_start")),
+                            then=models.F("effective_start"),
+                        ),
+                        default=models.F("effective_end"),
+                    ),
+                    models.Value("[)"),
+                    function="DATERANGE",
+                    output_field=django.contrib.postgres.fields.ranges.DateRangeField(),
+                ),
+                name="slm_multipath_validity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sitesignalobstructions",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.db.models.expressions.Func(
+                    models.F("effective_start"),
+                    models.Case(
+                        models.When(
+                            ("effective_end__lt", models.F("effective_start")),
+                            then=models.F("effective_start"),
+                        ),
+                        default=models.F("effective_end"),
+                    ),
+                    models.Value("[)"),
+                    function="DATERANGE",
+                    output_field=django.contrib.postgres.fields.ranges.DateRangeField(),
+                ),
+                name="slm_obstruction_validity",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sitelocalepisodiceffects",
+            index=django.contrib.postgres.indexes.GistIndex(
+                django.db.models.expressions.Func(
+                    models.F("effective_start"),
+                    models.Case(
+                        models.When(
+                            ("effective_end__lt", models.F("effective_start")),
+                            then=models.F("effective_start"),
+                        ),
+                        default=models.F("effective_end"),
+                    ),
+                    models.Value("[)"),
+                    function="DATERANGE",
+                    output_field=django.contrib.postgres.fields.ranges.DateRangeField(),
+                ),
+                name="slm_episodic_validity",
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.20 on 2026-10-17 15:20
+
+import django.db.models.deletion
+import django.utils.timezone
+import django_enum.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("slm", "0035_subsection_validity_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchiveRenderJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "log_format",
+                    django_enum.fields.EnumPositiveSmallIntegerField(
+                        choices=[
+                            (1, "Legacy (ASCII)"),
+                            (2, "GeodesyML"),
+                            (3, "JSON"),
+                            (4, "ASCII (9-Char)"),
+                        ]
+                    ),
+                ),
+                (
+                    "queued",
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("error", models.TextField(blank=True, default="")),
+                (
+                    "index",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="render_jobs",
+                        to="slm.archiveindex",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("index", "log_format")},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.20 on 2026-10-17 16:05
+
+from django.db import migrations, models
+
+import slm.models.system
+import slm.storage
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("slm", "0036_archiverenderjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="archivedsitelog",
+            name="file",
+            field=models.FileField(
+                help_text="A pointer to the uploaded file on disk.",
+                max_length=255,
+                storage=slm.storage.archive_storage,
+                unique=True,
+                upload_to=slm.models.system.site_upload_path,
+            ),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 4.2.20 on 2026-10-17 16:40
+
+import django.contrib.postgres.fields.ranges
+import django.db.models.deletion
+import django.utils.timezone
+import django_enum.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("slm", "0037_archivedsitelog_storage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchiveChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "event",
+                    django_enum.fields.EnumPositiveSmallIntegerField(
+                        choices=[
+                            (1, "Indexed"),
+                            (2, "Closed"),
+                            (3, "Archived"),
+                            (4, "Deleted"),
+                        ]
+                    ),
+                ),
+                (
+                    "log_format",
+                    django_enum.fields.EnumPositiveSmallIntegerField(
+                        blank=True,
+                        choices=[
+                            (1, "Legacy (ASCII)"),
+                            (2, "GeodesyML"),
+                            (3, "JSON"),
+                            (4, "ASCII (9-Char)"),
+                        ],
+                        default=None,
+                        null=True,
+                    ),
+                ),
+                (
+                    "valid_range",
+                    django.contrib.postgres.fields.ranges.DateTimeRangeField(
+                        blank=True, default_bounds="[)", null=True
+                    ),
+                ),
+                ("transaction", models.BigIntegerField()),
+                (
+                    "timestamp",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "index",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="changes",
+                        to="slm.archiveindex",
+                    ),
+                ),
+                (
+                    "site",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archive_changes",
+                        to="slm.site",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["transaction", "id"],
+                        name="slm_archivechange_token",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 4.2.20 on 2026-10-17 18:05
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_filenames(apps, schema_editor):
+    """
+    Store the listing names of the logs that are already archived. These are
+    built the same way ArchivedSiteLog.set_filenames builds them.
+    """
+    ArchivedSiteLog = apps.get_model("slm", "ArchivedSiteLog")
+    ArchiveIndex = apps.get_model("slm", "ArchiveIndex")
+    Site = apps.get_model("slm", "Site")
+
+    extensions = getattr(settings, "SLM_FORMAT_EXTENSIONS", {})
+    ext_sql = (
+        "CASE log.log_format "
+        + " ".join("WHEN %s THEN %s" for _ in extensions)
+        + " ELSE '' END"
+        if extensions
+        else "''"
+    )
+    ext_params = []
+    for log_format, ext in extensions.items():
+        ext_params.extend([int(log_format), f".{ext}"])
+
+    columns = []
+    params = []
+    for name_len in [4, 9]:
+        filename = (
+            f"substr(site.name, 1, {name_len}) || '_' || "
+            f"to_char(lower(idx.valid_range) AT TIME ZONE %s, 'YYYYMMDD') || "
+            f"{ext_sql}"
+        )
+        columns.append(f"filename_{name_len} = {filename}")
+        columns.append(f"filename_{name_len}_lower = lower({filename})")
+        params.extend([settings.TIME_ZONE, *ext_params] * 2)
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {ArchivedSiteLog._meta.db_table} AS log "
+            f"SET {', '.join(columns)} "
+            f"FROM {ArchiveIndex._meta.db_table} AS idx, {Site._meta.db_table} AS site "
+            f"WHERE log.index_id = idx.id AND log.site_id = site.id",
+            params,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("slm", "0038_archivechange"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedsitelog",
+            name="filename_4",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="The listing name using 4 characters of the site name.",
+                max_length=50,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedsitelog",
+            name="filename_4_lower",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="The lower case listing name using 4 characters of the site name.",
+                max_length=50,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedsitelog",
+            name="filename_9",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="The listing name using 9 characters of the site name.",
+                max_length=50,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedsitelog",
+            name="filename_9_lower",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="The lower case listing name using 9 characters of the site name.",
+                max_length=50,
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivedsitelog",
+            index=models.Index(
+                django.db.models.functions.text.Upper("name"),
+                name="slm_archivedsitelog_name_upper",
+            ),
+        ),
+        migrations.RunPython(
+            populate_filenames, migrations.RunPython.noop, elidable=True
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.20 on 2026-10-17 18:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def flag_best_format(apps, schema_editor):
+    """
+    Flag the best format of the most recent logs of each site on each day, this
+    is the ranking of ArchivedSiteLogQuerySet.rank_formats.
+    """
+    ArchivedSiteLog = apps.get_model("slm", "ArchivedSiteLog")
+    ArchiveIndex = apps.get_model("slm", "ArchiveIndex")
+
+    params = [settings.TIME_ZONE]
+    format_order = "log.log_format DESC"
+    if priorities := getattr(settings, "SLM_FORMAT_PRIORITY", None):
+        format_order = (
+            "CASE log.log_format "
+            + " ".join("WHEN %s THEN %s" for _ in priorities)
+            + " ELSE 999 END ASC"
+        )
+        for log_format, priority in priorities.items():
+            params.extend([int(log_format), int(priority)])
+
+    log_table = ArchivedSiteLog._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {log_table} SET is_best_format = (ranked.best_fmt = 1) "
+            f"FROM ("
+            f"SELECT log.id, ROW_NUMBER() OVER ("
+            f"PARTITION BY idx.site_id, (log.timestamp AT TIME ZONE %s)::date "
+            f"ORDER BY log.timestamp DESC, {format_order}"
+            f") AS best_fmt "
+            f"FROM {log_table} AS log "
+            f"JOIN {ArchiveIndex._meta.db_table} AS idx ON log.index_id = idx.id"
+            f") AS ranked "
+            f"WHERE {log_table}.id = ranked.id AND ranked.best_fmt = 1",
+            params,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("slm", "0039_archivedsitelog_filenames"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedsitelog",
+            name="is_best_format",
+            field=models.BooleanField(
+                db_index=True,
+                default=False,
+                help_text="True if this is the best format of the most recent logs of its site on the day it was archived.",
+            ),
+        ),
+        migrations.RunPython(
+            flag_best_format, migrations.RunPython.noop, elidable=True
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.20 on 2026-10-17 22:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def stamp_written(apps, schema_editor):
+    """
+    Existing files were written when their index began as far as mirrors are
+    concerned.
+    """
+    apps.get_model("slm", "ArchivedSiteLog").objects.update(
+        written=models.F("timestamp")
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("slm", "0040_archivedsitelog_is_best_format"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedsitelog",
+            name="written",
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                help_text="When the file was written to the archive. Files that are rendered again are written again.",
+            ),
+        ),
+        migrations.RunPython(stamp_written, migrations.RunPython.noop, elidable=True),
+    ]
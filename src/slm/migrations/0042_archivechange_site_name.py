@@ -0,0 +1,43 @@
+# Generated by Django 4.2.20 on 2026-10-17 23:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_site_names(apps, schema_editor):
+    Site = apps.get_model("slm", "Site")
+    apps.get_model("slm", "ArchiveChange").objects.update(
+        site_name=models.Subquery(
+            Site.objects.filter(pk=models.OuterRef("site_id")).values("name")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("slm", "0041_archivedsitelog_written"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivechange",
+            name="site_name",
+            field=models.CharField(
+                default="",
+                help_text="The name of the site when the change was made.",
+                max_length=50,
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_site_names, migrations.RunPython.noop, elidable=True),
+        migrations.AlterField(
+            model_name="archivechange",
+            name="site",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="archive_changes",
+                to="slm.site",
+            ),
+        ),
+    ]
@@ -22,8 +22,14 @@ from slm.models.equipment import (
     SatelliteSystem,
 )
 from slm.models.help import Help
-from slm.models.index import ArchivedSiteLog, ArchiveIndex
+from slm.models.index import (
+    ArchiveChange,
+    ArchivedSiteLog,
+    ArchiveIndex,
+    ArchiveRenderJob,
+)
 from slm.models.sitelog import (
+    DirtySite,
     Site,
     SiteAntenna,
     SiteCollocation,
@@ -48,6 +54,8 @@ from slm.models.sitelog import (
     SiteTemperatureSensor,
     SiteWaterVaporRadiometer,
 )
+from slm.models.snapshot import SiteLogSnapshot
+from slm.models.summary import StationSummary
 from slm.models.system import (
     Agency,
     LogEntry,
@@ -80,8 +88,11 @@ __all__ = [
     "SatelliteSystem",
     "DataAvailability",
     "DataCenter",
+    "ArchiveChange",
     "ArchivedSiteLog",
     "ArchiveIndex",
+    "ArchiveRenderJob",
+    "DirtySite",
     "Site",
     "SiteAntenna",
     "SiteCollocation",
@@ -105,6 +116,8 @@ __all__ = [
     "SiteSurveyedLocalTies",
     "SiteTemperatureSensor",
     "SiteWaterVaporRadiometer",
+    "SiteLogSnapshot",
+    "StationSummary",
     "Agency",
     "LogEntry",
     "Network",
@@ -1,24 +1,33 @@
+import gzip
 import os
+import tarfile
 import typing as t
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from logging import getLogger
+from pathlib import Path
 
 from django.conf import settings
 from django.contrib.postgres.constraints import ExclusionConstraint
 from django.contrib.postgres.fields import DateTimeRangeField
 from django.contrib.postgres.fields.ranges import DateTimeTZRange, RangeOperators
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.core.files.base import ContentFile
-from django.db import models, transaction
+from django.db import connections, models, transaction
 from django.db.models import (
     Case,
     CharField,
     DateTimeField,
     Deferrable,
+    Exists,
     F,
     Func,
     IntegerField,
+    Max,
     OuterRef,
     Q,
+    RawSQL,
     Subquery,
     Value,
     When,
@@ -26,23 +35,28 @@ from django.db.models import (
 )
 from django.db.models.functions import (
     Cast,
+    Coalesce,
     Concat,
     ExtractDay,
     ExtractMonth,
     ExtractYear,
+    Greatest,
     Lower,
     LPad,
     Now,
     RowNumber,
     Substr,
     TruncDate,
+    Upper,
 )
 from django.urls import reverse
 from django.utils.functional import cached_property
-from django.utils.timezone import now
+from django.utils.timezone import localtime, now
 from django.utils.translation import gettext_lazy as _
+from django_enum import EnumField
 
 from slm.defines import (
+    ArchiveEvent,
     GeodesyMLVersion,
     RinexVersion,
     SiteLogFormat,
@@ -50,10 +64,11 @@ from slm.defines import (
     SLMFileType,
 )
 from slm.models.data import DataAvailability
-from slm.models.system import SiteFile
-from slm.parsing import BaseBinder
+from slm.models.system import SiteFile, site_upload_path
+from slm.parsing import BaseBinder, detect_encoding, read_lines
 from slm.parsing import legacy as legacy_parsing
 from slm.parsing import xsd as xsd_parsing
+from slm.storage import archive_storage
 
 
 class ArchiveIndexManager(models.Manager):
@@ -88,7 +103,20 @@ class ArchiveIndexManager(models.Manager):
         )
         return new_file
 
-    def add_index(self, site, formats=list(SiteLogFormat)):
+    def add_index(self, site, formats=list(SiteLogFormat), snapshot=None, defer=None):
+        """
+        Add a new index for the site's current publication and archive its
+        serialized site log files.
+
+        :param site: The site to index, last_publish must be set
+        :param formats: The SiteLogFormats to archive
+        :param snapshot: The site's published SiteLogSnapshot if it was
+            already loaded
+        :param defer: If True, queue the files to be rendered by the
+            render_archives command instead of rendering them now. Defaults
+            to the SLM_DEFERRED_ARCHIVE setting.
+        :return: The new (or existing) ArchiveIndex
+        """
         assert site.last_publish, "last_publish must be set before calling add_index"
         existing = self.filter(
             site=site, valid_range__startswith=site.last_publish
@@ -100,10 +128,14 @@ class ArchiveIndexManager(models.Manager):
 
         new_index = self.create(site=site, begin=site.last_publish, end=None)
 
-        for log_format in formats:
-            if log_format in {SiteLogFormat.JSON}:
-                continue  # todo - remove
-            ArchivedSiteLog.objects.from_site(site=site, log_format=log_format)
+        # todo - remove JSON exclusion
+        formats = [fmt for fmt in formats if fmt not in {SiteLogFormat.JSON}]
+        if getattr(settings, "SLM_DEFERRED_ARCHIVE", False) if defer is None else defer:
+            ArchiveRenderJob.objects.enqueue(new_index, formats)
+        else:
+            ArchivedSiteLog.objects.from_snapshot(
+                new_index, formats=formats, snapshot=snapshot
+            )
 
         return new_index
 
@@ -117,6 +149,7 @@ class ArchiveIndexManager(models.Manager):
             if last:
                 last.valid_range = DateTimeTZRange(last.begin, site.last_publish)
                 last.save()
+                ArchiveChange.objects.record(ArchiveEvent.CLOSED, [last])
 
     def create(self, **kwargs):
         return self.insert_index(**kwargs)
@@ -156,7 +189,10 @@ class ArchiveIndexManager(models.Manager):
         if prev_index:
             prev_index.valid_range = DateTimeTZRange(prev_index.begin, begin)
             prev_index.save()
-        return super().create(begin=begin, site=site, **kwargs)
+            ArchiveChange.objects.record(ArchiveEvent.CLOSED, [prev_index])
+        index = super().create(begin=begin, site=site, **kwargs)
+        ArchiveChange.objects.record(ArchiveEvent.INDEXED, [index])
+        return index
 
 
 class ArchiveIndexQuerySet(models.QuerySet):
@@ -176,6 +212,52 @@ class ArchiveIndexQuerySet(models.QuerySet):
         """
         return self.order_by(Func("valid_range", function="lower"), *fields)
 
+    # Extend each remaining index that immediately precedes a deleted index
+    # over the run of adjacent deleted indexes that follow it. Indexes of a
+    # site are grouped by a running count of the remaining indexes and of the
+    # gaps between indexes - each group is a remaining index (or an index that
+    # follows a gap) followed by the adjacent deleted indexes up to the next
+    # remaining index or gap. Gaps are never closed, deleted indexes that
+    # follow a gap or that have no predecessor leave their range uncovered.
+    BOOKEND_SQL = """
+        WITH indexes AS (
+            SELECT
+                id,
+                site_id,
+                valid_range,
+                id = ANY(%(deleted)s) AS deleted,
+                lower(valid_range) IS DISTINCT FROM LAG(upper(valid_range)) OVER (
+                    PARTITION BY site_id ORDER BY lower(valid_range), id
+                ) AS gap
+            FROM {table}
+            WHERE site_id = ANY(%(sites)s)
+        ),
+        ordered AS (
+            SELECT
+                id,
+                site_id,
+                valid_range,
+                deleted,
+                SUM(CASE WHEN deleted AND NOT gap THEN 0 ELSE 1 END) OVER (
+                    PARTITION BY site_id ORDER BY lower(valid_range), id
+                ) AS grp
+            FROM indexes
+        ),
+        bookends AS (
+            SELECT DISTINCT ON (site_id, grp) site_id, grp, upper(valid_range) AS new_end
+            FROM ordered
+            WHERE deleted
+            ORDER BY site_id, grp, lower(valid_range) DESC, id DESC
+        )
+        UPDATE {table} AS idx
+        SET valid_range = tstzrange(lower(ordered.valid_range), bookends.new_end, '[)')
+        FROM ordered
+        JOIN bookends
+            ON bookends.site_id = ordered.site_id AND bookends.grp = ordered.grp
+        WHERE idx.id = ordered.id AND NOT ordered.deleted
+        RETURNING idx.id
+    """
+
     def delete(self):
         """
         We can't just delete an archive to remove it - we also have to
@@ -186,65 +268,112 @@ class ArchiveIndexQuerySet(models.QuerySet):
 
             The logic in this delete will only stich together immediately adjacent
             index entries - that is entries that have no time gaps between their
-            ranges.
+            ranges. A remaining index is extended up to the first gap that
+            follows it, deleted indexes after the gap are not bookended.
+
+        Indexes are deleted in batches by :meth:`prune`, each batch in its own
+        transaction, so a large delete does not hold back the change feed
+        (see :meth:`ArchiveChangeQuerySet.visible`) until it finishes.
+        """
+        return self.prune()
+
+    def prune(
+        self,
+        batch_size: t.Optional[int] = 500,
+        progress: t.Optional[t.Callable[[int], None]] = None,
+    ) -> t.Tuple[int, t.Dict[str, int]]:
+        """
+        Delete the indexes in this queryset, repairing the ranges of the
+        indexes that remain. Each index that immediately preceded a deleted
+        index is extended over the adjacent deleted indexes that followed it
+        with one set based update. Gaps between indexes are preserved - the
+        extension stops at the first gap, so the ranges of deleted indexes
+        that follow a gap, or that have no preceding index, are left
+        uncovered.
+
+        Published sites whose current index is deleted are set to updated, by
+        adding an unpublished copy of their site form, and are resynchronized.
+        Only these sites are resynchronized.
+
+        Indexes are deleted site by site in time order in batches of
+        batch_size, each batch in its own transaction, so pruning a large
+        number of indexes does not hold locks for the whole operation.
+
+        :param batch_size: The number of indexes to delete in each
+            transaction, or None to delete them all in one transaction.
+        :param progress: A callable that is passed the number of indexes
+            deleted after each batch.
+        :return: The number of objects deleted and a dictionary with the
+            number of deletions per object type, like delete()
         """
         from slm.models import Site, SiteForm
 
-        with transaction.atomic():
-            # also, sites where the deleted index is the current index
-            # (end=null) that are in the published state should be set to
-            # updated
-            # we trigger unpublished state by updating the SiteForm
-            # prepared date and synchronizing
-            published_sites = Site.objects.filter(
-                Q(indexes__in=self.filter(end__isnull=True))
-                & Q(status=SiteLogStatus.PUBLISHED)
-            ).distinct()
-
-            # these are the indexes that remain that must be updated - that
-            # includes any non-deleted index immediately preceding a deleted
-            # index, indexes immediately following a deleted index do not
-            # need to be updated
-            after = self.filter(Q(site=OuterRef("site")) & Q(begin=OuterRef("end")))
-            before = self.filter(Q(site=OuterRef("site")) & Q(end=OuterRef("begin")))
-            new_bookends = (
-                ArchiveIndex.objects.annotate(before=Subquery(before.values("pk")[:1]))
-                .filter(
-                    Q(site=OuterRef("site"))
-                    & Q(begin__gte=OuterRef("end"))
-                    & ~Q(pk__in=self.values("pk"))
-                    & Q(before__isnull=False)
+        pks = list(self.order_by("site_id", "valid_range").values_list("pk", flat=True))
+        batch_size = batch_size or len(pks) or 1
+        table = connections[self.db].ops.quote_name(self.model._meta.db_table)
+        total, counts = 0, {}
+        for start in range(0, len(pks), batch_size):
+            batch = pks[start : start + batch_size]
+            with transaction.atomic(using=self.db):
+                deleted = ArchiveIndex.objects.using(self.db).filter(pk__in=batch)
+                sites = list(
+                    deleted.order_by().values_list("site_id", flat=True).distinct()
                 )
-                .oldest_first()
-            )
-            adjacent_indexes = ArchiveIndex.objects.annotate(
-                adjacent=Subquery(after.values("pk")[:1]),
-                new_valid_range=Func(
-                    Func(
-                        F("valid_range"), function="lower", output_field=DateTimeField()
-                    ),
-                    Subquery(new_bookends.values("begin")[:1]),
-                    function="tstzrange",
-                    output_field=DateTimeRangeField(),
-                ),
-            ).filter(Q(adjacent__isnull=False) & ~Q(pk__in=self.values("pk")))
-
-            # we use the new last indexes' old last end date
-            # TODO - to really do this right would have to set published state to unpublished
-            # where appropri
-            forms = []
-            for form in SiteForm.objects.filter(site__in=published_sites):
-                form.pk = None
-                form.published = False
-                form.date_prepared = now().date()
-                forms.append(form)
-
-            SiteForm.objects.bulk_create(forms)
-            published_sites.synchronize_denormalized_state()
 
-            adjacent_indexes.update(valid_range=F("new_valid_range"))
-            deleted = super().delete()
-            return deleted
+                # sites where the deleted index is the current index (end=null)
+                # that are in the published state should be set to updated -
+                # we add an unpublished copy of their site form and resynchronize
+                published_sites = Site.objects.filter(
+                    pk__in=list(
+                        Site.objects.filter(
+                            Q(pk__in=deleted.filter(end__isnull=True).values("site_id"))
+                            & Q(status=SiteLogStatus.PUBLISHED)
+                        ).values_list("pk", flat=True)
+                    )
+                )
+                forms = []
+                for form in SiteForm.objects.filter(
+                    site__in=published_sites, published=True
+                ).exclude(
+                    site__in=SiteForm.objects.filter(published=False).values("site")
+                ):
+                    form.pk = None
+                    form.published = False
+                    form.date_prepared = now().date()
+                    forms.append(form)
+                SiteForm.objects.bulk_create(forms)
+                published_sites.synchronize_denormalized_state()
+
+                with connections[self.db].cursor() as cursor:
+                    cursor.execute(
+                        self.BOOKEND_SQL.format(table=table),
+                        {"deleted": batch, "sites": sites},
+                    )
+                    extended = [row[0] for row in cursor.fetchall()]
+
+                ArchiveChange.objects.record(ArchiveEvent.DELETED, deleted)
+                ArchiveChange.objects.record(
+                    ArchiveEvent.CLOSED,
+                    ArchiveIndex.objects.using(self.db).filter(pk__in=extended),
+                )
+                # the logs of the deleted indexes are deleted with them, logs
+                # of other indexes on the same days may now be the best format
+                site_days = (
+                    ArchivedSiteLog.objects.using(self.db)
+                    .filter(index__in=batch)
+                    .site_days()
+                )
+                count, per_model = models.QuerySet.delete(deleted)
+                if site_days is not None:
+                    ArchivedSiteLog.objects.using(self.db).filter(
+                        site_days
+                    ).flag_best_format()
+            total += count
+            for label, num in per_model.items():
+                counts[label] = counts.get(label, 0) + num
+            if progress:
+                progress(len(batch))
+        return total, counts
 
     @staticmethod
     def epoch_q(epoch=None):
@@ -431,6 +560,12 @@ class ArchivedSiteLogManager(models.Manager):
             elif file:
                 file.delete()
 
+            if not file and not generate and index.end is None:
+                # files queued for deferred rendering are rendered on demand,
+                # the published state is only that of the index while it is
+                # current
+                generate = index.render_jobs.filter(log_format=log_format).exists()
+
             if not file and not generate:
                 # if we are not allowed to generate, pull out the closest format we can find
                 # out of the supersedes list
@@ -440,31 +575,106 @@ class ArchivedSiteLogManager(models.Manager):
                         return file
                 return None
 
-            filename = index.site.get_filename(
-                log_format=log_format, epoch=index.begin, lower_case=True
+            archived = self.archived(
+                index,
+                log_format,
+                SiteLogSerializer(instance=index.site).format(log_format),
             )
-            return self.model.objects.create(
-                site=index.site,
-                log_format=log_format,
-                index=index,
-                timestamp=index.begin,
-                mimetype=log_format.mimetype,
-                file_type=SLMFileType.SITE_LOG,
-                name=filename,
-                file=ContentFile(
-                    SiteLogSerializer(instance=index.site)
-                    .format(log_format)
-                    .encode("utf-8"),
-                    name=filename,
-                ),
-                gml_version=(
-                    GeodesyMLVersion.latest()
-                    if log_format is SiteLogFormat.GEODESY_ML
-                    else None
-                ),
+            archived.save()
+            archived.precompress()
+            ArchiveChange.objects.record(
+                ArchiveEvent.ARCHIVED, [index], [archived.log_format]
             )
+            index.render_jobs.filter(log_format=log_format).delete()
+            return archived
         return None
 
+    def archived(self, index: ArchiveIndex, log_format: SiteLogFormat, content: str):
+        """
+        Build an (unsaved) archived site log file for the index.
+
+        :param index: The ArchiveIndex the file belongs to
+        :param log_format: The SiteLogFormat of the content
+        :param content: The serialized site log
+        :return: An unsaved ArchivedSiteLog
+        """
+        filename = index.site.get_filename(
+            log_format=log_format, epoch=index.begin, lower_case=True
+        )
+        content = content.encode("utf-8")
+        archive = self.model(
+            site=index.site,
+            log_format=log_format,
+            index=index,
+            timestamp=index.begin,
+            mimetype=log_format.mimetype,
+            file_type=SLMFileType.SITE_LOG,
+            name=filename,
+            size=len(content),
+            file=ContentFile(content, name=filename),
+            gml_version=(
+                GeodesyMLVersion.latest()
+                if log_format is SiteLogFormat.GEODESY_ML
+                else None
+            ),
+        )
+        archive.set_filenames()
+        return archive
+
+    def from_snapshot(
+        self,
+        index: ArchiveIndex,
+        formats: t.Sequence[SiteLogFormat],
+        snapshot=None,
+        workers: t.Optional[int] = None,
+    ):
+        """
+        Render and archive site log files of several formats for an index.
+        The site log is loaded into a single snapshot that every format is
+        rendered from, and the files and their rows are written in bulk.
+
+        :param index: The ArchiveIndex to archive files for
+        :param formats: The SiteLogFormats to render
+        :param snapshot: The SiteLogSnapshot to render, if not given the
+            current published snapshot of the index's site is loaded
+        :param workers: The number of threads to render formats on, default
+            is the SLM_ARCHIVE_RENDER_WORKERS setting. Formats are rendered
+            serially if this is 1 or less.
+        :return: A list of the created ArchivedSiteLog instances
+        """
+        from slm.api.serializers import SiteLogSerializer
+        from slm.models import Site
+
+        if snapshot is None:
+            snapshot = Site.objects.filter(pk=index.site_id).snapshots()[0]
+        # fetch everything the templates need from the database on this
+        # thread, rendering does not touch the database after this
+        serializer = SiteLogSerializer(instance=snapshot).prefetch()
+
+        if workers is None:
+            workers = getattr(settings, "SLM_ARCHIVE_RENDER_WORKERS", 1)
+        if workers > 1 and len(formats) > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, len(formats))) as pool:
+                rendered = list(pool.map(serializer.format, formats))
+        else:
+            rendered = [serializer.format(log_format) for log_format in formats]
+
+        archived = self.bulk_create(
+            [
+                self.archived(index, log_format, content)
+                for log_format, content in zip(formats, rendered)
+            ]
+        )
+        self.filter(pk__in=[archive.pk for archive in archived]).flag_best_format()
+        for archive in archived:
+            archive.precompress()
+        ArchiveChange.objects.record(
+            ArchiveEvent.ARCHIVED,
+            [index] * len(archived),
+            [archive.log_format for archive in archived],
+        )
+        return archived
+
     def from_site(self, site, log_format=SiteLogFormat.LEGACY, epoch=None):
         index = ArchiveIndex.objects.filter(site=site).at_epoch(epoch=epoch).first()
         if index:
@@ -491,6 +701,12 @@ class ArchivedSiteLogQuerySet(models.QuerySet):
         :param include_ext: If true (default), include the extension for the log file type.
         :return: A queryset with the filename annotation added.
         """
+        if include_ext and (
+            column := self.model.filename_field(name_len, lower_case=lower_case)
+        ):
+            # these names are stored when the log is archived
+            return self.annotate(**{field_name: F(column)})
+
         name_str = F("site__name")
         if name_len:
             name_str = Cast(
@@ -536,12 +752,13 @@ class ArchivedSiteLogQuerySet(models.QuerySet):
             )
         return self.annotate(**{field_name: Concat(*parts)})
 
-    def best_format(self):
+    def rank_formats(self):
         """
-        This query fetches a linear history of site logs, but only picks the most appropriate
-        format from the index for each point in time. By default the most appropriate format
-        is the rank ordering defined in :class:`slm.defines.SiteLogFormat` unless otherwise
-        specified in the :setting:`SLM_FORMAT_PRIORITY` mapping.
+        Rank the logs of each site on each day, most recent first and then by
+        format. By default formats are ranked by the rank ordering defined in
+        :class:`slm.defines.SiteLogFormat` unless otherwise specified in the
+        :setting:`SLM_FORMAT_PRIORITY` mapping. The rank is annotated as
+        best_fmt.
         """
         if priorities := getattr(settings, "SLM_FORMAT_PRIORITY"):
             return self.annotate(
@@ -561,7 +778,7 @@ class ArchivedSiteLogQuerySet(models.QuerySet):
                         F("log_format_order").asc(),  # use mapped priority
                     ],
                 ),
-            ).filter(best_fmt=1)
+            )
         else:
             return self.annotate(
                 best_fmt=Window(
@@ -575,7 +792,83 @@ class ArchivedSiteLogQuerySet(models.QuerySet):
                         F("log_format").desc(),
                     ],  # higher format wins
                 ),
-            ).filter(best_fmt=1)
+            )
+
+    def best_format(self):
+        """
+        This query fetches a linear history of site logs, but only picks the most appropriate
+        format from the index for each point in time. By default the most appropriate format
+        is the rank ordering defined in :class:`slm.defines.SiteLogFormat` unless otherwise
+        specified in the :setting:`SLM_FORMAT_PRIORITY` mapping.
+
+        The best format is ranked among the logs in this queryset. When all formats are
+        listed filtering on the stored is_best_format flag gives the same logs without
+        ranking the archive, see :meth:`flag_best_format`.
+        """
+        return self.rank_formats().filter(best_fmt=1)
+
+    def flag_best_format(self) -> int:
+        """
+        Update the stored is_best_format flags of the logs of every site on every day
+        that this queryset has logs on. This must be called when logs are created or
+        deleted.
+
+        :return: The number of logs whose flag changed
+        """
+        days = (
+            self.annotate(day=TruncDate("timestamp"))
+            .filter(index__site=OuterRef("index__site"), day=OuterRef("day"))
+            .order_by()
+        )
+        ranked = (
+            self.model.objects.using(self.db)
+            .annotate(day=TruncDate("timestamp"))
+            .filter(Exists(days))
+            .rank_formats()
+            .order_by()
+            .values("pk", "best_fmt")
+        )
+        sql, params = ranked.query.sql_with_params()
+        table = connections[self.db].ops.quote_name(self.model._meta.db_table)
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET is_best_format = (ranked.best_fmt = 1) "
+                f"FROM ({sql}) AS ranked "
+                f"WHERE {table}.id = ranked.id "
+                f"AND {table}.is_best_format != (ranked.best_fmt = 1)",
+                params,
+            )
+            return cursor.rowcount
+
+    def site_days(self) -> t.Optional[Q]:
+        """
+        Select the logs of every site on every day that this queryset has logs
+        on. These are the logs :meth:`flag_best_format` ranks.
+
+        :return: A Q object, or None if this queryset is empty
+        """
+        site_days = None
+        for site, day in (
+            self.annotate(day=TruncDate("timestamp"))
+            .order_by()
+            .values_list("index__site", "day")
+            .distinct()
+        ):
+            site_day = Q(index__site=site) & Q(timestamp__date=day)
+            site_days = site_day if site_days is None else site_days | site_day
+        return site_days
+
+    def delete(self):
+        """
+        Delete the logs in this queryset. Another log of the same site and day
+        may now be the best format, so the flags of the logs that remain on
+        those days are recomputed once for the whole queryset.
+        """
+        site_days = self.site_days()
+        deleted = super().delete()
+        if site_days is not None:
+            self.model.objects.using(self.db).filter(site_days).flag_best_format()
+        return deleted
 
     def most_recent(self):
         return self.filter(index__valid_range__upper_inf=True)
@@ -583,18 +876,302 @@ class ArchivedSiteLogQuerySet(models.QuerySet):
     def non_current(self):
         return self.filter(index__valid_range__upper_inf=False)
 
+    def listing(
+        self,
+        log_formats: t.Sequence[SiteLogFormat] = (),
+        log_status: t.Sequence[SiteLogStatus] = (),
+        best_format: bool = False,
+        most_recent: bool = False,
+        non_current: bool = False,
+        name_len: t.Optional[int] = None,
+        lower_case: t.Optional[bool] = None,
+        field_name: str = "display",
+    ):
+        """
+        Select archived site logs the way the archive file views list them.
+        Each log is annotated with the name it should be listed under.
+
+        :param log_formats: Restrict logs to these formats
+        :param log_status: Restrict logs to sites in these status states.
+        :param best_format: Include the highest ranking format at each timestamp
+        :param most_recent: Only include the most recent log for each site
+        :param non_current: Only include archived logs that are no longer current
+        :param name_len: Normalize site log names to using this many characters of
+            the site name
+        :param lower_case: Normalize site log names to lower or upper case if True or
+            False
+        :param field_name: The name of the annotated listing name field
+        :return: A queryset of the selected logs
+        """
+        qry = self
+        if log_status:
+            qry = qry.filter(index__site__status__in=log_status)
+        if log_formats:
+            qry = qry.filter(log_format__in=log_formats)
+
+        # the stored best format flags rank every format, so when the listing is
+        # restricted to some formats the best of those must be ranked in the query
+        rank_formats = best_format and log_formats
+        if best_format:
+            qry = qry.best_format() if rank_formats else qry.filter(is_best_format=True)
+
+        if most_recent:
+            qry = qry.most_recent()
+
+        if non_current and not rank_formats:
+            qry = qry.non_current()
+        elif non_current:
+            # we do it this way because in cases where the latest log has multiple indexes
+            # on the same day the last same day index will appear in the results - if we
+            # exclude the last  indexes in the same query it breaks
+            # the windowing exclusion of older same day logs for that latest index date
+            qry = self.model.objects.filter(
+                pk__in=qry, index__valid_range__upper_inf=False
+            )
+
+        if name_len is not None or lower_case is not None:
+            return qry.annotate_filenames(
+                name_len=name_len or None,
+                lower_case=lower_case,
+                field_name=field_name,
+            )
+        return qry.annotate(**{field_name: F("name")})
+
+    def modified_since(self, epoch: datetime):
+        """
+        Only include logs that were written, or whose index began or was
+        superseded, at or after the given epoch - i.e. the logs that have been
+        added to, rendered again in or moved within the archive since then.
+
+        :param epoch: The date time the archive was last synchronized, this
+            should be the :meth:`last_modified` time of that synchronization
+        :return: A queryset of the logs modified after epoch
+        """
+        return self.filter(
+            Q(written__gte=epoch)
+            | Q(index__valid_range__startswith__gte=epoch)
+            | Q(index__valid_range__endswith__gte=epoch)
+        )
+
+    def last_modified(self) -> datetime:
+        """
+        The time a client that has received the logs in this queryset is
+        synchronized to, see :meth:`modified_since`. This is the most recent
+        modification of these logs, but no later than the start of the oldest
+        transaction that is still writing to the database. Logs written by a
+        transaction that commits after this queryset is read are stamped no
+        earlier than the start of that transaction, so they are never skipped
+        by the next synchronization.
+
+        This must be called before the queryset is read. Transactions of other
+        database users are only seen if this user may read their activity.
+
+        :return: The time the logs in this queryset are current to
+        """
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                "SELECT LEAST(MIN(xact_start), CLOCK_TIMESTAMP()) "
+                "FROM pg_stat_activity "
+                "WHERE backend_xid IS NOT NULL AND pid <> pg_backend_pid()"
+            )
+            running = cursor.fetchone()[0]
+        latest = self.order_by().aggregate(
+            latest=Max(
+                Greatest(
+                    "written",
+                    Func(
+                        "index__valid_range",
+                        function="lower",
+                        output_field=DateTimeField(),
+                    ),
+                    Coalesce(
+                        Func(
+                            "index__valid_range",
+                            function="upper",
+                            output_field=DateTimeField(),
+                        ),
+                        "written",
+                    ),
+                )
+            )
+        )["latest"]
+        return min(latest, running) if latest else running
+
+    def tar(
+        self,
+        compress: bool = False,
+        field_name: t.Optional[str] = None,
+        chunk_size: int = 64 * 1024,
+    ) -> t.Generator[bytes, None, None]:
+        """
+        Stream a tar archive of the files in this queryset. Files are read and
+        emitted chunk by chunk so the archive is never held in memory.
+
+        :param compress: Gzip the tar stream if True
+        :param field_name: The annotated field to name members by, by default
+            the archived file name is used
+        :param chunk_size: The size of the chunks to read files in
+        :yield: The bytes of the archive
+        """
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+        def emit(data: bytes) -> bytes:
+            return compressor.compress(data) if compressor else data
+
+        written = 0
+        for archive in self.select_related("index").iterator(chunk_size=100):
+            with archive.file.open("rb") as file:
+                info = tarfile.TarInfo(
+                    getattr(archive, field_name) if field_name else archive.name
+                )
+                info.size = archive.file.size
+                info.mtime = int(archive.index.begin.timestamp())
+                info.mode = 0o644
+                header = info.tobuf(format=tarfile.PAX_FORMAT)
+                yield emit(header)
+                remaining = info.size
+                while remaining > 0:
+                    chunk = file.read(min(chunk_size, remaining))
+                    if not chunk:
+                        # the file is shorter than it was when we started
+                        chunk = tarfile.NUL * remaining
+                    remaining -= len(chunk)
+                    yield emit(chunk)
+            padding = -info.size % tarfile.BLOCKSIZE
+            yield emit(tarfile.NUL * padding)
+            written += len(header) + info.size + padding
+
+        # end of archive marker, padded out to a whole record
+        end = 2 * tarfile.BLOCKSIZE
+        end += -(written + end) % tarfile.RECORDSIZE
+        yield emit(tarfile.NUL * end)
+        if compressor:
+            yield compressor.flush()
+
 
 class ArchivedSiteLog(SiteFile):
     SUB_DIRECTORY = "archive"
 
+    # the content codings precompressed siblings may be kept in, in order of
+    # preference, and the suffixes of the sibling files
+    PRECOMPRESSED = {"br": ".br", "gzip": ".gz"}
+
     index = models.ForeignKey(
         ArchiveIndex, on_delete=models.CASCADE, related_name="files"
     )
 
     name = models.CharField(max_length=50, db_index=True)
 
+    file = models.FileField(
+        upload_to=site_upload_path,
+        storage=archive_storage,
+        null=False,
+        max_length=255,
+        help_text=_("A pointer to the uploaded file on disk."),
+        unique=True,
+    )
+
+    # the site name lengths that listing names are stored for
+    FILENAME_LENGTHS = (4, 9)
+
+    filename_4 = models.CharField(
+        max_length=50,
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text=_("The listing name using 4 characters of the site name."),
+    )
+    filename_4_lower = models.CharField(
+        max_length=50,
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text=_("The lower case listing name using 4 characters of the site name."),
+    )
+    filename_9 = models.CharField(
+        max_length=50,
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text=_("The listing name using 9 characters of the site name."),
+    )
+    filename_9_lower = models.CharField(
+        max_length=50,
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text=_("The lower case listing name using 9 characters of the site name."),
+    )
+
+    written = models.DateTimeField(
+        default=now,
+        db_index=True,
+        help_text=_(
+            "When the file was written to the archive. Files that are rendered "
+            "again are written again."
+        ),
+    )
+
+    is_best_format = models.BooleanField(
+        default=False,
+        db_index=True,
+        help_text=_(
+            "True if this is the best format of the most recent logs of its site on "
+            "the day it was archived."
+        ),
+    )
+
     objects = ArchivedSiteLogManager.from_queryset(ArchivedSiteLogQuerySet)()
 
+    @classmethod
+    def filename_field(
+        cls, name_len: t.Optional[int], lower_case: t.Optional[bool] = False
+    ) -> t.Optional[str]:
+        """
+        Get the stored field holding the listing names of archived logs for the
+        given naming parameters, see
+        :meth:`ArchivedSiteLogQuerySet.annotate_filenames`.
+
+        :param name_len: The number of characters of the site name to use
+        :param lower_case: True if the names should be lower case
+        :return: The name of the field or None if these names are not stored.
+        """
+        if name_len in cls.FILENAME_LENGTHS:
+            return f"filename_{name_len}{'_lower' if lower_case else ''}"
+        return None
+
+    def set_filenames(self):
+        """
+        Set the stored listing names of this log from its site name and the
+        date its index begins. The lower case names are entirely lower case so
+        case insensitive lookups can be exact matches against them.
+        """
+        begin = localtime(self.index.begin)
+        ext = getattr(
+            settings,
+            "SLM_FORMAT_EXTENSIONS",
+            {fmt: fmt.ext for fmt in SiteLogFormat},
+        ).get(self.log_format)
+        for name_len in self.FILENAME_LENGTHS:
+            filename = f"{self.site.name[:name_len]}_{begin:%Y%m%d}"
+            if ext is not None:
+                filename += f".{ext}"
+            setattr(self, f"filename_{name_len}", filename)
+            setattr(self, f"filename_{name_len}_lower", filename.lower())
+
+    def save(self, *args, **kwargs):
+        if self.filename_4 is None:
+            self.set_filenames()
+        super().save(*args, **kwargs)
+        ArchivedSiteLog.objects.filter(pk=self.pk).flag_best_format()
+
+    def delete(self, using=None, keep_parents=False):
+        """
+        Deleting a log may change the best format of its site and day - we use
+        the queryset delete method to update the flags.
+        """
+        return ArchivedSiteLog.objects.using(using).filter(pk=self.pk).delete()
+
     def __str__(self):
         if self.name:
             return f"[{self.index}] {self.name}"
@@ -613,11 +1190,11 @@ class ArchivedSiteLog(SiteFile):
     def parse(self) -> BaseBinder:
         if self.log_format is SiteLogFormat.GEODESY_ML:
             return xsd_parsing.SiteLogBinder(
-                xsd_parsing.SiteLogParser(self.contents, site_name=self.site.name)
+                xsd_parsing.SiteLogParser(self.lines(), site_name=self.site.name)
             )
         elif self.log_format in [SiteLogFormat.LEGACY, SiteLogFormat.ASCII_9CHAR]:
             return legacy_parsing.SiteLogBinder(
-                legacy_parsing.SiteLogParser(self.contents, site_name=self.site.name)
+                legacy_parsing.SiteLogParser(self.lines(), site_name=self.site.name)
             )
         raise NotImplementedError(
             _("{format} is not currently supported for site log parsing.").format(
@@ -634,14 +1211,388 @@ class ArchivedSiteLog(SiteFile):
         :param contents: The bytes of the log file contents.
         :return a decoded string of the contents
         """
-        file_bytes = self.file.open("rb").read()
+        with self.file.open("rb") as file:
+            file_bytes = file.read()
         try:
-            return file_bytes.decode("utf-8")
+            return file_bytes.decode(detect_encoding(file_bytes[: 64 * 1024]))
         except UnicodeDecodeError:
-            try:
-                return file_bytes.decode("ascii")
-            except UnicodeDecodeError:
-                return file_bytes.decode("latin")
+            return file_bytes.decode("latin-1")
+
+    def lines(self) -> t.Generator[str, None, None]:
+        """
+        Iterate over the decoded lines of the log file without reading it into
+        memory, see :func:`slm.parsing.read_lines`.
+
+        :yield: The lines of the log file
+        """
+        if "contents" in self.__dict__:
+            yield from self.contents.split("\n")
+            return
+        with self.file.open("rb") as file:
+            yield from read_lines(file.file)
+
+    def precompressed_path(self, encoding: str) -> Path:
+        """
+        The path of the precompressed sibling of this file in the given
+        content coding. The sibling may not exist.
+
+        :param encoding: A content coding in PRECOMPRESSED
+        :return: The path of the sibling file
+        """
+        return Path(f"{self.file.path}{self.PRECOMPRESSED[encoding]}")
+
+    def precompress(self, encodings: t.Optional[t.Sequence[str]] = None):
+        """
+        Write precompressed siblings of this file so downloads can be served
+        in a compressed content coding without compressing on each request.
+
+        :param encodings: The content codings to write, default is the
+            SLM_ARCHIVE_PRECOMPRESS setting
+        """
+        if encodings is None:
+            encodings = getattr(settings, "SLM_ARCHIVE_PRECOMPRESS", [])
+        if not encodings:
+            return
+        with self.file.open("rb") as file:
+            contents = file.read()
+        for encoding in encodings:
+            if encoding == "gzip":
+                compressed = gzip.compress(contents, mtime=0)
+            elif encoding == "br":
+                try:
+                    import brotli
+                except ImportError as err:
+                    raise ImproperlyConfigured(
+                        "Brotli precompression requires the brotli package."
+                    ) from err
+                compressed = brotli.compress(contents, mode=brotli.MODE_TEXT)
+            else:
+                raise ImproperlyConfigured(
+                    f"Unsupported precompression encoding: {encoding}, use gzip or br."
+                )
+            path = self.precompressed_path(encoding)
+            partial = path.with_name(f"{path.name}.partial")
+            partial.write_bytes(compressed)
+            partial.replace(path)
+
+    def variant(
+        self, accepted: t.Optional[t.Dict[str, float]] = None
+    ) -> t.Tuple[t.IO[bytes], t.Optional[str], str]:
+        """
+        Open the variant of this file to serve to a client that accepts the
+        given content codings. This is the precompressed sibling in the most
+        preferred accepted coding that exists, or the file itself. Ties are
+        broken by the order of PRECOMPRESSED.
+
+        :param accepted: A mapping of accepted content codings to their
+            quality values, see :func:`slm.utils.accepted_encodings`
+        :return: A 3-tuple of the open file, its content coding or None if
+            it is not encoded, and its entity tag
+        """
+        accepted = accepted or {}
+        for encoding in sorted(
+            (
+                encoding
+                for encoding in self.PRECOMPRESSED
+                if accepted.get(encoding, accepted.get("*", 0)) > 0
+            ),
+            key=lambda encoding: -accepted.get(encoding, accepted.get("*", 0)),
+        ):
+            path = self.precompressed_path(encoding)
+            if path.exists():
+                stat = path.stat()
+                return (
+                    path.open("rb"),
+                    encoding,
+                    f'"{stat.st_mtime_ns:x}-{stat.st_size:x}-{encoding}"',
+                )
+        stat = os.stat(self.file.path)
+        return self.file.open("rb"), None, f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
 
     class Meta:
         unique_together = ("index", "log_format")
+        indexes = [
+            # serves the case insensitive name lookups of the archive file views
+            models.Index(Upper("name"), name="slm_archivedsitelog_name_upper")
+        ]
+
+
+class ArchiveRenderJobManager(models.Manager):
+    logger = getLogger("slm.models.index.ArchiveRenderJob")
+
+    def enqueue(self, index, formats):
+        """
+        Queue site log formats to be rendered into the archive for an index.
+
+        :param index: The ArchiveIndex to render files for
+        :param formats: The SiteLogFormats to render
+        """
+        self.bulk_create(
+            [self.model(index=index, log_format=log_format) for log_format in formats],
+            ignore_conflicts=True,
+        )
+
+    def flush(self, sites):
+        """
+        Render the queued files of the current indexes of the given sites now.
+        Queued files are rendered from the published state of their site, so
+        they must be rendered before a new publication replaces that state -
+        otherwise the publication they index would never be archived. This is
+        called before site logs are published.
+
+        :param sites: The Sites or primary keys of the sites about to be
+            published
+        """
+        jobs = self.select_for_update(of=("self",)).filter(
+            Q(index__site__in=sites) & Q(index__valid_range__upper_inf=True)
+        )
+        with transaction.atomic():
+            pending = {}
+            for job in jobs.select_related("index__site"):
+                pending.setdefault(job.index, []).append(job)
+            for index, claimed in pending.items():
+                formats = [
+                    job.log_format
+                    for job in claimed
+                    if not index.files.filter(log_format=job.log_format).exists()
+                ]
+                if formats:
+                    ArchivedSiteLog.objects.from_snapshot(index, formats=formats)
+                self.filter(pk__in=[job.pk for job in claimed]).delete()
+
+    def drain(self, max_attempts=3):
+        """
+        Render queued site log formats one index at a time. Jobs are claimed
+        with SKIP LOCKED so multiple workers may drain the queue concurrently.
+        Jobs that fail are retried up to max_attempts times. Jobs for indexes
+        that are no longer current are dropped - rendering them now would
+        archive a later publication under an older index. Publishing renders
+        the jobs of the current index first (see :meth:`flush`) so this only
+        happens to jobs that could not be rendered.
+
+        :param max_attempts: Jobs that have failed this many times are left
+            in the queue and not retried.
+        :yield: 2-tuples of (index, formats) for each claimed index
+        """
+        while True:
+            with transaction.atomic():
+                pending = self.select_for_update(skip_locked=True, of=("self",)).filter(
+                    attempts__lt=max_attempts
+                )
+                job = pending.select_related("index__site").order_by("queued").first()
+                if job is None:
+                    return
+                jobs = list(pending.filter(index=job.index_id))
+                index = job.index
+                formats = [
+                    claimed.log_format
+                    for claimed in jobs
+                    if not index.files.filter(log_format=claimed.log_format).exists()
+                ]
+                try:
+                    with transaction.atomic():
+                        if index.end is not None:
+                            self.logger.warning(
+                                "Dropped archive render jobs for superseded index %s.",
+                                index,
+                            )
+                        elif formats:
+                            ArchivedSiteLog.objects.from_snapshot(
+                                index, formats=formats, workers=1
+                            )
+                except Exception as err:
+                    self.logger.exception("Unable to render archive for %s.", index)
+                    self.filter(pk__in=[claimed.pk for claimed in jobs]).update(
+                        attempts=F("attempts") + 1, error=str(err)
+                    )
+                else:
+                    self.filter(pk__in=[claimed.pk for claimed in jobs]).delete()
+            yield index, formats
+
+
+class ArchiveRenderJob(models.Model):
+    """
+    A site log format that still has to be rendered into the archive for an
+    index. When SLM_DEFERRED_ARCHIVE is set, publishing queues these jobs
+    instead of rendering every format in the request and the
+    render_archives command drains them. Until a job is drained, requests
+    for its file render it on demand.
+    """
+
+    index = models.ForeignKey(
+        ArchiveIndex, on_delete=models.CASCADE, related_name="render_jobs"
+    )
+
+    log_format = EnumField(SiteLogFormat, null=False)
+
+    queued = models.DateTimeField(default=now, db_index=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    error = models.TextField(default="", blank=True)
+
+    objects = ArchiveRenderJobManager()
+
+    def __str__(self):
+        return f"[{self.index}] {self.log_format}"
+
+    class Meta:
+        unique_together = ("index", "log_format")
+
+
+class ArchiveChangeManager(models.Manager):
+    def record(
+        self,
+        event: ArchiveEvent,
+        indexes: t.Iterable[ArchiveIndex],
+        log_formats: t.Optional[t.Iterable[t.Optional[SiteLogFormat]]] = None,
+    ):
+        """
+        Record changes to the archive in the change feed. Changes are stamped
+        with the id of the current transaction so they only become visible to
+        the feed when every transaction that may have recorded an earlier
+        change has finished.
+
+        :param event: The ArchiveEvent that happened
+        :param indexes: The ArchiveIndexes the event happened to, for
+            ARCHIVED events these are the indexes of the archived files
+        :param log_formats: The formats of the archived files for ARCHIVED
+            events, in the same order as indexes
+        :return: The created ArchiveChanges
+        """
+        from slm.models import Site
+
+        indexes = list(indexes)
+        if not indexes:
+            return []
+        names = dict(
+            Site.objects.using(self.db)
+            .filter(pk__in={index.site_id for index in indexes})
+            .values_list("pk", "name")
+        )
+        with connections[self.db].cursor() as cursor:
+            cursor.execute("SELECT txid_current()")
+            txid = cursor.fetchone()[0]
+        return self.bulk_create(
+            [
+                self.model(
+                    index_id=index.pk,
+                    site_id=index.site_id,
+                    site_name=names[index.site_id],
+                    event=event,
+                    log_format=log_format,
+                    valid_range=index.valid_range,
+                    transaction=txid,
+                )
+                for index, log_format in zip(
+                    indexes, log_formats or [None] * len(indexes)
+                )
+            ]
+        )
+
+
+class ArchiveChangeQuerySet(models.QuerySet):
+    def visible(self):
+        """
+        Only include changes made by transactions that precede every running
+        transaction. Transactions are numbered when they first write, not when
+        they commit, so a change from a transaction that is still running may
+        become visible after changes with larger tokens - holding back changes
+        that are newer than the oldest running transaction guarantees that
+        tokens are never skipped.
+
+        .. note::
+
+            The oldest running transaction is cluster wide - any transaction
+            that has written to any database on the server, not just
+            transactions that changed the archive, holds back the feed until
+            it finishes. Long running writers should commit in batches and
+            idle transactions should be avoided or timed out, see
+            ``idle_in_transaction_session_timeout``.
+        """
+        return self.filter(
+            transaction__lt=RawSQL(
+                "txid_snapshot_xmin(txid_current_snapshot())",
+                [],
+                output_field=models.BigIntegerField(),
+            )
+        )
+
+    def since(self, token: t.Optional[str] = None):
+        """
+        Fetch the visible changes after the given token in the order they
+        were made.
+
+        :param token: The token of the last change the client has seen, or
+            None to fetch all changes.
+        :return: A queryset of the changes after token
+        :raises ValueError: If the token is malformed
+        """
+        changes = self.visible().order_by("transaction", "pk")
+        if token:
+            txid, pk = ArchiveChange.parse_token(token)
+            changes = changes.filter(
+                Q(transaction__gt=txid) | Q(transaction=txid, pk__gt=pk)
+            )
+        return changes
+
+
+class ArchiveChange(models.Model):
+    """
+    An append-only feed of the changes made to the archive index. Sync
+    clients fetch the changes after the token of the last change they have
+    seen, so they only ever read deltas and never rescan the archive.
+
+    Tokens are ordered and stable - changes are only added to the feed after
+    the last visible token.
+    """
+
+    # not a constraint, the id of deleted indexes is kept in the feed
+    index = models.ForeignKey(
+        ArchiveIndex,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="changes",
+    )
+
+    # not a constraint, changes to deleted sites are kept in the feed
+    site = models.ForeignKey(
+        "slm.Site",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="archive_changes",
+    )
+
+    site_name = models.CharField(
+        max_length=50,
+        help_text=_("The name of the site when the change was made."),
+    )
+
+    event = EnumField(ArchiveEvent, null=False)
+
+    log_format = EnumField(SiteLogFormat, null=True, default=None, blank=True)
+
+    valid_range = DateTimeRangeField(null=True, blank=True, default_bounds="[)")
+
+    transaction = models.BigIntegerField(null=False)
+
+    timestamp = models.DateTimeField(default=now)
+
+    objects = ArchiveChangeManager.from_queryset(ArchiveChangeQuerySet)()
+
+    @property
+    def token(self) -> str:
+        return f"{self.transaction}.{self.pk}"
+
+    @staticmethod
+    def parse_token(token: str) -> t.Tuple[int, int]:
+        txid, _, pk = str(token).partition(".")
+        return int(txid), int(pk)
+
+    def __str__(self):
+        return f"[{self.token}] {self.event} {self.index_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["transaction", "id"], name="slm_archivechange_token")
+        ]
@@ -1,25 +1,42 @@
+import heapq
+import itertools
 import json
 from collections import namedtuple
 from datetime import datetime, timezone
 from enum import Enum
 from functools import lru_cache
+from types import MappingProxyType
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
 from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.fields import DateRangeField, DateTimeRangeField
+from django.contrib.postgres.fields.ranges import (
+    DateTimeRangeContains,
+    DateTimeTZRange,
+)
+from django.contrib.postgres.indexes import GistIndex
+from django.contrib.postgres.lookups import Overlap
 from django.core.exceptions import FieldDoesNotExist, ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models, transaction
 from django.db.models import (
+    Case,
     CheckConstraint,
+    Count,
+    Exists,
     ExpressionWrapper,
     F,
+    FilteredRelation,
+    Func,
     Max,
     OuterRef,
     Q,
     Subquery,
     Value,
+    When,
+    Window,
 )
 from django.db.models.functions import (
     Cast,
@@ -32,8 +49,10 @@ from django.db.models.functions import (
     Lower,
     LPad,
     Now,
+    RowNumber,
     Substr,
 )
+from django.db.models.query import ModelIterable
 from django.utils.functional import cached_property, classproperty
 from django.utils.timezone import now
 from django.utils.translation import gettext as _
@@ -64,7 +83,8 @@ def utc_now_date():
 
 
 # a named tuple used as meta information to dynamically determine what the
-# section models are and how to access them from the Site model
+# section models are and how to access them from the Site model. The registry
+# of sections is built once per process, see Site.sections()
 Section = namedtuple(
     "Section",
     [
@@ -72,6 +92,24 @@ Section = namedtuple(
         "accessor",  # the section manager attribute on Site instances
         "cls",  # the section's python model class
         "subsection",  # true if this is a subsection (i.e. multiple instances)
+        "site_log_fields",  # tuple of the section's editable site log fields
+        "valid_time",  # the field that defines when a subsection became valid
+        "order_field",  # the field subsection stacks are ordered by
+        "structure",  # the legacy site log structure of the section's fields
+    ],
+)
+
+# columnar equipment history of a site, see SiteQuerySet.equipment_timelines()
+EquipmentTimeline = namedtuple(
+    "EquipmentTimeline",
+    [
+        "site",  # the Site
+        "start",  # tuple of interval start times, None is unbounded
+        "end",  # tuple of interval end times, None is unbounded
+        "receiver",  # tuple of SiteReceiver primary keys (or None) per interval
+        "antenna",  # tuple of SiteAntenna primary keys (or None) per interval
+        "receivers",  # mapping of SiteReceiver primary keys to field values
+        "antennas",  # mapping of SiteAntenna primary keys to field values
     ],
 )
 
@@ -93,6 +131,82 @@ def bool_condition(*args, **kwargs):
     return ExpressionWrapper(Q(*args, **kwargs), output_field=models.BooleanField())
 
 
+def validity_range(start, end, dates=False):
+    """
+    A half open [start, end) range expression over the given time fields. Null
+    bounds are unbounded. Legacy data has some end times before start times,
+    these rows are collapsed into empty ranges instead of raising an error.
+    The subsection GiST indexes are built on this expression, so lookups must
+    use it verbatim for the planner to match them.
+
+    :param start: The name of (or path to) the field where validity starts
+    :param end: The name of (or path to) the field where validity ends
+    :param dates: True if the fields are dates, False if they are timestamps
+    :return: A range expression
+    """
+    return Func(
+        F(start),
+        Case(When(**{f"{end}__lt": F(start)}, then=F(start)), default=F(end)),
+        Value("[)"),
+        function="DATERANGE" if dates else "TSTZRANGE",
+        output_field=DateRangeField() if dates else DateTimeRangeField(),
+    )
+
+
+def _equipment_intervals(rows, start=None, end=None):
+    """
+    Sweep a site's receiver and antenna rows into the intervals of time during
+    which its equipment did not change. When more than one receiver (or
+    antenna) is valid at once, the most recently installed one is used.
+
+    :param rows: (installed, kind, pk, removed) tuples ordered by installation
+        time, where kind is 0 for receivers and 1 for antennas and installed
+        is never None.
+    :param start: Clip intervals to begin no earlier than this time
+    :param end: Clip intervals to end no later than this time
+    :return: A list of [start, end, receiver, antenna] intervals in time order
+    """
+    active = ({}, {})
+    removals = []
+    intervals = []
+    cursor = None
+
+    def close(until):
+        equipment = [max(stack, key=stack.get) if stack else None for stack in active]
+        if cursor is None or equipment == [None, None]:
+            return
+        lower = cursor if start is None or cursor > start else start
+        upper = until if end is None or (until is not None and until < end) else end
+        if upper is not None and upper <= lower:
+            return
+        if intervals and intervals[-1][1] == lower and intervals[-1][2:] == equipment:
+            intervals[-1][1] = upper
+        else:
+            intervals.append([lower, upper, *equipment])
+
+    for installed, kind, pk, removed in rows:
+        if removed is not None and removed <= installed:
+            continue
+        while removals and removals[0][0] <= installed:
+            removed_at, removed_kind, removed_pk = heapq.heappop(removals)
+            close(removed_at)
+            cursor = removed_at
+            del active[removed_kind][removed_pk]
+        close(installed)
+        cursor = installed
+        active[kind][pk] = installed
+        if removed is not None:
+            heapq.heappush(removals, (removed, kind, pk))
+
+    while removals:
+        removed_at, removed_kind, removed_pk = heapq.heappop(removals)
+        close(removed_at)
+        cursor = removed_at
+        del active[removed_kind][removed_pk]
+    close(None)
+    return intervals
+
+
 class DefaultToStrEncoder(json.JSONEncoder):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -253,16 +367,83 @@ class SiteQuerySet(models.QuerySet):
         )
         return self
 
+    def _modified_q(self):
+        """
+        A filter that is true for sites that have unpublished edits in any
+        section.
+        """
+        modified = Q()
+        for section in self.model.sections():
+            modified |= Q(
+                Exists(
+                    section.cls.objects._current(
+                        published=False, filter=Q(site=OuterRef("pk"))
+                    )
+                )
+            )
+        return modified
+
     def needs_publish(self):
-        qry = self
-        mod_q = Q()
-        for idx, section in enumerate(self.model.sections()):
-            mod_qry = section.cls.objects._current(
-                published=False, filter=Q(site=OuterRef("pk"))
+        return self.filter(self._modified_q()).exists()
+
+    def annotate_publish_flags(self, user):
+        """
+        Annotate the flags the editor needs for each site in this queryset
+        so that lists of sites do not have to compute them one site at a
+        time:
+
+            * needs_publish_: True if the site has unpublished changes
+            * is_publishable_: True if the site has all of the sections
+                required to publish (SLM_REQUIRED_SECTIONS_TO_PUBLISH)
+            * is_moderator_: True if the given user may moderate the site
+            * can_publish_: True if the given user may publish the site
+
+        :meth:`Site.needs_publish` and :meth:`Site.is_publishable` use these
+        annotations when they are present.
+
+        :param user: The user to compute the moderator flags for
+        :return: The annotated queryset
+        """
+        modified = self._modified_q()
+
+        required = Q()
+        for required_section in getattr(
+            settings, "SLM_REQUIRED_SECTIONS_TO_PUBLISH", []
+        ):
+            required &= Q(
+                Exists(
+                    self.model.section(required_section).cls.objects.filter(
+                        site=OuterRef("pk")
+                    )
+                )
             )
-            qry = qry.annotate(**{f"_mod{idx}": Subquery(mod_qry.values("pk")[:1])})
-            mod_q |= Q(**{f"_mod{idx}__isnull": False})
-        return qry.filter(mod_q).exists()
+
+        if user and user.is_authenticated and user.is_superuser:
+            moderator = Value(True)
+        elif user and user.is_authenticated and user.is_moderator():
+            moderator = Exists(
+                self.model.agencies.through.objects.filter(
+                    Q(site=OuterRef("pk")) & Q(agency__in=user.agencies.all())
+                )
+            )
+        else:
+            moderator = Value(False)
+
+        return self.annotate(
+            needs_publish_=Case(
+                When(
+                    status__in=[SiteLogStatus.PROPOSED, SiteLogStatus.UPDATED],
+                    then=Value(True),
+                ),
+                When(status=SiteLogStatus.PUBLISHED, then=Value(False)),
+                default=bool_condition(modified),
+                output_field=models.BooleanField(),
+            ),
+            is_publishable_=bool_condition(required) if required else Value(True),
+            is_moderator_=moderator,
+        ).annotate(
+            can_publish_=bool_condition(Q(is_moderator_=True) & Q(is_publishable_=True))
+        )
 
     def synchronize_denormalized_state(self, skip_form_updates=False):
         """
@@ -274,6 +455,7 @@ class SiteQuerySet(models.QuerySet):
             with modified section info.
         :return:
         """
+        started = now()
         self.update_alert_levels()
 
         aggregate = None
@@ -326,20 +508,503 @@ class SiteQuerySet(models.QuerySet):
             & exists_q
         ).filter(~mod_q).update(status=SiteLogStatus.PUBLISHED)
 
-        # this is the longest operation - there might be a way to squash it
-        # into a single query
         if not skip_form_updates:
-            for site in qry.filter(mod_q):
-                form = site.siteform_set.head()
-                if form.published:
-                    form.pk = None
-                    form.published = False
-                    form.save()
-
-                form.modified_section = ", ".join(site.modified_sections)
-                if site.last_publish and form.report_type == "NEW":
-                    form.report_type = "UPDATE"
-                form.save()
+            self.model.objects.filter(
+                pk__in=qry.filter(mod_q).values("pk")
+            ).synchronize_forms()
+
+        # any changes recorded before we started are now reflected
+        DirtySite.objects.filter(
+            Q(site__in=self.order_by().values("pk")) & Q(timestamp__lte=started)
+        ).delete()
+
+    def synchronize_forms(self):
+        """
+        Rewrite the HEAD form of every site in this queryset so that it
+        reflects the currently modified sections. Sites whose HEAD form is
+        published get a new unpublished form. The number of queries this
+        issues does not depend on the number of sites.
+
+        return: calling queryset for chaining
+        """
+        from slm.models import ArchiveIndex
+
+        sites = self.annotate_modified_sections()
+        if not sites:
+            return self
+
+        head_forms = {
+            form.site_id: form
+            for form in SiteForm.objects.filter(site__in=[site.pk for site in sites])
+            .alias(_superseded=SiteForm.objects.superseded())
+            .filter(Q(published=False) | Q(_superseded=False))
+        }
+
+        previous = {
+            index.site_id: index
+            for index in ArchiveIndex.objects.filter(
+                site__in=[site.pk for site in sites]
+            )
+            .order_by("site", "-valid_range")
+            .distinct("site")
+        }
+        new_forms = []
+        forms = []
+        for site in sites:
+            form = head_forms.get(site.pk, None) or SiteForm(
+                site=site, report_type="NEW"
+            )
+            if form.pk is None or form.published:
+                form.pk = None
+                form.published = False
+                new_forms.append(form)
+            else:
+                forms.append(form)
+
+            form.modified_section = ", ".join(site.modified_sections)
+            form.previous = previous.get(site.pk, None)
+            if form.previous or (site.last_publish and form.report_type == "NEW"):
+                form.report_type = "UPDATE"
+            form.date_prepared = utc_now_date()
+
+        SiteForm.objects.bulk_create(new_forms)
+        SiteForm.objects.bulk_update(
+            forms,
+            fields=["modified_section", "previous", "report_type", "date_prepared"],
+        )
+        return self
+
+    def annotate_modified_sections(self):
+        """
+        Compute :attr:`Site.modified_sections` for every site in this queryset
+        with one query per section model. Subsection dot indexes are computed
+        by the database with a row number window over each site's HEAD
+        stack. This evaluates the queryset.
+
+        :return: A list of Site instances with modified_sections set.
+        """
+        sites = {site.pk: site for site in self}
+        modified = {pk: [] for pk in sites}
+        for section in self.model.sections():
+            if section.cls is SiteForm:
+                continue
+            qry = section.cls.objects.filter(site__in=sites.keys())
+            if section.subsection:
+                prefix = f"{section.cls.section_number()}"
+                if section.cls.subsection_number():
+                    prefix += f".{section.cls.subsection_number()}"
+                # the rows must be numbered over the whole HEAD stack, filtering
+                # out the published rows in the query would number them first
+                for site_id, index, published in (
+                    qry.head()
+                    .annotate(
+                        _index=Window(
+                            RowNumber(),
+                            partition_by=F("site"),
+                            order_by=SiteSubSectionQuerySet.stack_ordering(section.cls),
+                        )
+                    )
+                    .order_by("site", "_index")
+                    .values_list("site", "_index", "published")
+                ):
+                    if not published:
+                        modified[site_id].append(f"{prefix}.{index}")
+            else:
+                for site_id in qry.filter(published=False).values_list(
+                    "site", flat=True
+                ):
+                    modified[site_id].append(str(section.cls.section_number()))
+
+        for pk, site in sites.items():
+            site.modified_sections = modified[pk]
+        return list(sites.values())
+
+    def dirty(self):
+        """
+        Filter this queryset to sites whose denormalized state may be stale.
+        See :class:`DirtySite`.
+        """
+        return self.filter(dirty__isnull=False)
+
+    def publish(self, request=None, silent=False, timestamp=None):
+        """
+        Publish the current HEAD edits of all sites in this queryset. This is
+        the bulk analog of :meth:`Site.publish`. Rather than publishing each
+        section row individually, superseded published rows are deleted and
+        HEAD rows are flipped to published with a handful of set based
+        statements per section model. Sites that have no edits at HEAD and
+        are already in the PUBLISHED state are left untouched.
+
+        :param request: The request that triggered the publish (optional)
+        :param silent: If True, no publish signals will be sent.
+        :param timestamp: Timestamp to use for the publish, if none - will
+            be the time of this call
+        :return: A dictionary mapping each published site to the number of
+            sections and subsections that had changes that were published.
+        """
+        from slm.models import ArchiveRenderJob, StationSummary
+
+        if timestamp is None:
+            timestamp = now()
+        user = request.user if request else None
+
+        with transaction.atomic():
+            sites = {site.pk: site for site in self}
+
+            # this might be an initial PUBLISH when we're in PROPOSED or FORMER
+            to_publish = {
+                pk
+                for pk, site in sites.items()
+                if site.status != SiteLogStatus.PUBLISHED
+            }
+            for section in self.model.sections():
+                to_publish.update(
+                    section.cls.objects.filter(site__in=sites.keys())
+                    .head_edits()
+                    .order_by()
+                    .values_list("site", flat=True)
+                    .distinct()
+                )
+            if not to_publish:
+                return {}
+
+            # every site log we publish must have a HEAD form
+            has_head_form = set(
+                SiteForm.objects.filter(Q(site__in=to_publish) & Q(published=False))
+                .order_by()
+                .values_list("site", flat=True)
+            )
+            published_forms = {
+                form.site_id: form
+                for form in SiteForm.objects.filter(
+                    Q(site__in=to_publish - has_head_form) & Q(published=True)
+                )
+            }
+            modified = {
+                site.pk: site.modified_sections
+                for site in self.model.objects.filter(
+                    pk__in=to_publish - has_head_form
+                ).annotate_modified_sections()
+            }
+            new_forms = []
+            for pk in to_publish - has_head_form:
+                form = published_forms.get(pk, None)
+                if form is None:
+                    form = SiteForm(site=sites[pk], report_type="NEW")
+                form.pk = None
+                form.published = False
+                form.modified_section = ", ".join(modified[pk])
+                new_forms.append(form)
+            SiteForm.objects.bulk_create(new_forms)
+
+            # archive files still queued for the publications we are replacing
+            ArchiveRenderJob.objects.flush(to_publish)
+
+            sections_published = {pk: 0 for pk in to_publish}
+            for section in self.model.sections():
+                for site_id, count in (
+                    section.cls.objects.filter(site__in=to_publish)
+                    .publish_head()
+                    .items()
+                ):
+                    sections_published[site_id] += count
+
+            self.model.objects.filter(pk__in=to_publish).synchronize_denormalized_state(
+                skip_form_updates=True
+            )
+
+            first_publish = {
+                pk for pk in to_publish if sites[pk].status is SiteLogStatus.PROPOSED
+            }
+            self.model.objects.filter(pk__in=first_publish).update(
+                status=SiteLogStatus.PUBLISHED
+            )
+            self.model.objects.filter(pk__in=to_publish).update(
+                last_publish=timestamp,
+                last_update=timestamp,
+                **({"last_user": user} if user else {}),
+            )
+            synchronized = {
+                row["pk"]: row
+                for row in self.model.objects.filter(pk__in=to_publish).values(
+                    "pk", "status", "num_flags", "max_alert"
+                )
+            }
+
+            if getattr(settings, "SLM_STATION_SUMMARY", False):
+                # one rebuild for the batch, the site_published receiver skips
+                # the sites summarized here
+                StationSummary.objects.rebuild(
+                    self.model.objects.filter(pk__in=to_publish)
+                )
+
+        published = {}
+        for pk in to_publish:
+            site = sites[pk]
+            previous_status = site.status
+            for field, value in synchronized[pk].items():
+                setattr(site, field, value)
+            site.last_publish = timestamp
+            site.last_update = timestamp
+            if user:
+                site.last_user = user
+
+            # these are normally sent by the post_save handler, but we do not
+            # call save() on each site
+            slm_signals.site_status_changed.send(
+                sender=self.model,
+                site=site,
+                previous_status=previous_status,
+                new_status=site.status,
+                reverted=False,
+            )
+            site._slm_pre_status = site.status
+            site._slm_last_publish = site.last_publish
+            site._slm_summarized = timestamp
+
+            if not silent:
+                slm_signals.site_published.send(
+                    sender=site,
+                    site=site,
+                    user=user,
+                    timestamp=timestamp,
+                    request=request,
+                    section=None,
+                )
+            published[site] = sections_published[pk]
+        return published
+
+    publish.queryset_only = True
+
+    def with_summary_fields(self, *fields, epoch=None, **renamed_fields):
+        """
+        Annotate the given fields from the
+        :class:`~slm.models.summary.StationSummary` row valid now or at the
+        given epoch onto the site objects in this queryset. This is a cheaper
+        alternative to stacking the other with_*_fields annotators because
+        the summary row is already flattened.
+
+        :param fields: The names of the summary fields to annotate, by default
+            these will include: receiver_type, antenna_type, radome_type
+        :param epoch: The point in time at which the summary should be valid,
+            default is now
+        :param renamed_fields: Named arguments where the names of the arguments
+            are the summary fields to annotate and the values are the names to
+            use for the annotated fields.
+        :return: The queryset with the annotations made
+        """
+        from slm.models import StationSummary
+
+        fields = {
+            **{field: field for field in fields},
+            **{field: name for field, name in renamed_fields.items()},
+        }
+
+        fields = fields or {
+            **{
+                field: field
+                for field in ["receiver_type", "antenna_type", "radome_type"]
+            }
+        }
+
+        summary = StationSummary.objects.filter(site=OuterRef("pk")).at_epoch(epoch)
+        return self._annotate_current(summary, fields, join=True)
+
+    def load_sections(self, epoch=None, published=True, include_deleted=False):
+        """
+        Fetch the published (or HEAD) state of every site log section for all
+        sites in this queryset using a fixed number of queries - one per
+        section model plus any many-to-many prefetches. The section instances
+        are attached to each site under the same attribute names that
+        :meth:`Site.published` and :meth:`Site.head` use, except that
+        subsection stacks are in-memory lists sorted by their order field.
+
+        Serializers and views can use the attached sections without further
+        database hits, see :class:`slm.api.serializers.SiteLogSerializer`.
+
+        :param epoch: A point in time at which to fetch the site log state.
+        :param published: If True (default) fetch the published state, if None
+            fetch the HEAD state.
+        :param include_deleted: Include deleted subsections in HEAD stacks,
+            meaningless if published is True.
+        :return: A list of Site instances with their sections attached.
+        """
+        sites = {site.pk: site for site in self}
+        for site in sites.values():
+            for section in self.model.sections():
+                setattr(site, section.field, [] if section.subsection else None)
+            site.loaded_sections_ = (epoch, bool(published))
+
+        for section, qry in self.section_queries(
+            sites.keys(),
+            epoch=epoch,
+            published=published,
+            include_deleted=include_deleted,
+        ):
+            qry = qry.select_related(
+                *[
+                    field.name
+                    for field in section.cls._meta.concrete_fields
+                    if isinstance(field, models.ForeignKey) and field.name != "site"
+                ]
+            ).prefetch_related(
+                *[field.name for field in section.cls._meta.many_to_many]
+            )
+            for obj in qry:
+                obj.site = sites[obj.site_id]
+                if section.subsection:
+                    getattr(obj.site, section.field).append(obj)
+                else:
+                    setattr(obj.site, section.field, obj)
+        return list(sites.values())
+
+    def section_queries(
+        self, site_ids, epoch=None, published=True, include_deleted=False, sections=None
+    ):
+        """
+        Build the queries that fetch the published (or HEAD) state of site log
+        sections for many sites at once. Subsection stacks are ordered by site
+        and then by their order field. See :meth:`load_sections`.
+
+        :param site_ids: The primary keys of the sites to fetch sections for
+        :param epoch: A point in time at which to fetch the site log state.
+        :param published: If True (default) fetch the published state, if None
+            fetch the HEAD state.
+        :param include_deleted: Include deleted subsections in HEAD stacks,
+            meaningless if published is True.
+        :param sections: The section model classes to fetch, default is all
+        :yield: 2-tuples of (section, queryset)
+        """
+        for section in self.model.sections():
+            if sections is not None and section.cls not in sections:
+                continue
+            qry = section.cls.objects.filter(site__in=site_ids)
+            if section.subsection:
+                edit_q = Q()
+                if epoch and section.valid_time is not None:
+                    edit_q &= Q(**{f"{section.valid_time}__lte": epoch})
+                if not published and not include_deleted:
+                    edit_q &= Q(is_deleted=False)
+                qry = qry.filter(edit_q)
+                if published:
+                    qry = qry.filter(published=True).order_by(
+                        "site", section.order_field, "subsection"
+                    )
+                else:
+                    qry = (
+                        qry.alias(_superseded=section.cls.objects.superseded(edit_q))
+                        .filter(Q(published=False) | Q(_superseded=False))
+                        .order_by(
+                            "site",
+                            *SiteSubSectionQuerySet.stack_ordering(section.cls),
+                        )
+                    )
+            elif published:
+                qry = qry.filter(published=True)
+            else:
+                qry = qry.alias(_superseded=section.cls.objects.superseded()).filter(
+                    Q(published=False) | Q(_superseded=False)
+                )
+            yield section, qry
+
+    def snapshots(self, epoch=None, published=True, sections=None):
+        """
+        Build read-only :class:`~slm.models.snapshot.SiteLogSnapshot` objects
+        for every site in this queryset. This is the lightweight analog of
+        :meth:`load_sections` for bulk read-only work like exports. Sections
+        are fetched as values() rows into slotted records and related objects
+        are fetched once and shared between records.
+
+        :param epoch: A point in time at which to fetch the site log state.
+        :param published: If True (default) fetch the published state, if None
+            fetch the HEAD state.
+        :param sections: The section model classes to fetch, default is all
+        :return: A list of SiteLogSnapshot instances in queryset order
+        """
+        from slm.models.snapshot import SiteLogSnapshot
+
+        return SiteLogSnapshot.build(
+            self, epoch=epoch, published=published, sections=sections
+        )
+
+    def equipment_timelines(
+        self,
+        start=None,
+        end=None,
+        receiver_fields=("receiver_type__model", "serial_number", "firmware"),
+        antenna_fields=("antenna_type__model", "radome_type__model", "serial_number"),
+    ):
+        """
+        Compute the published receiver and antenna pairing history of every
+        site in this queryset. The receivers and antennas of all sites are
+        fetched with one query each, ordered by site and installation time,
+        and merged into a single sorted stream that is swept once to produce
+        the intervals over which each site's equipment did not change.
+
+        Results are columnar - each timeline holds parallel tuples of interval
+        start times, end times, receiver keys and antenna keys. Intervals
+        where a site has neither a receiver nor an antenna are omitted.
+
+        :param start: Only compute the timeline from this point in time
+        :param end: Only compute the timeline up to this point in time
+        :param receiver_fields: The receiver fields to fetch into the
+            receivers mapping of each timeline
+        :param antenna_fields: The antenna fields to fetch into the antennas
+            mapping of each timeline
+        :return: A dictionary mapping site names to EquipmentTimelines
+        """
+        sites = {site.pk: site for site in self}
+        window = None
+        if start is not None or end is not None:
+            window = DateTimeTZRange(start, end, bounds="[)")
+
+        # rows without an install time are valid from the beginning of time
+        beginning = datetime.min.replace(tzinfo=timezone.utc)
+        related = ({}, {})
+        streams = []
+        for kind, (model, fields) in enumerate(
+            [(SiteReceiver, receiver_fields), (SiteAntenna, antenna_fields)]
+        ):
+            rows = model.objects.filter(Q(site__in=sites.keys()) & Q(published=True))
+            if window is not None:
+                rows = rows.filter(Overlap(model.validity(), window))
+            rows = rows.order_by(
+                "site_id", F("installed").asc(nulls_first=True), "subsection"
+            ).values_list("site_id", "installed", "pk", "removed", *fields)
+            related[kind].update({row[2]: row[4:] for row in rows})
+            streams.append(
+                [
+                    (site_id, installed or beginning, kind, pk, removed)
+                    for site_id, installed, pk, removed, *_ in rows
+                ]
+            )
+
+        timelines = {}
+        merged = itertools.groupby(
+            heapq.merge(*streams, key=lambda row: row[:2]), key=lambda row: row[0]
+        )
+        intervals = {
+            site_id: _equipment_intervals(
+                (row[1:] for row in rows), start=start, end=end
+            )
+            for site_id, rows in merged
+        }
+        for pk, site in sites.items():
+            columns = list(zip(*intervals.get(pk, []))) or [(), (), (), ()]
+            columns[0] = tuple(
+                None if begin == beginning else begin for begin in columns[0]
+            )
+            timelines[site.name] = EquipmentTimeline(
+                site,
+                *columns,
+                receivers=MappingProxyType(
+                    {key: related[0][key] for key in columns[2] if key is not None}
+                ),
+                antennas=MappingProxyType(
+                    {key: related[1][key] for key in columns[3] if key is not None}
+                ),
+            )
+        return timelines
 
     def availability(self):
         from slm.models import DataAvailability
@@ -381,13 +1046,72 @@ class SiteQuerySet(models.QuerySet):
             )
         )
 
-    def with_identification_fields(self, *fields, **renamed_fields):
+    def _annotate_current(self, current, fields, join=False, computed=None):
+        """
+        Annotate fields from the current row of a section onto the sites in
+        this queryset.
+
+        :param current: A queryset of section rows correlated to the outer
+            site, ordered such that the first row is the current row.
+        :param fields: A dictionary mapping field accessors to the annotated
+            names.
+        :param join: If False, each field is annotated using its own
+            correlated subquery. If True, the current row is resolved once per
+            site and joined to the site row, all fields are then projected from
+            the joined row. This scales with the number of sections rather than
+            the number of fields.
+        :param computed: A dictionary mapping field names to callables that
+            accept the path prefix of the current row (e.g. "" or
+            "_sitereceiver0__") and return an expression for the field.
+        :return: The queryset with the annotations made
+        """
+        computed = computed or {}
+        if not join:
+            current = current.annotate(
+                **{
+                    field: expression("")
+                    for field, expression in computed.items()
+                    if field in fields
+                }
+            )
+            return self.annotate(
+                **{
+                    name: Subquery(current.values(field)[:1])
+                    for field, name in fields.items()
+                }
+            )
+
+        relation = current.model._meta.get_field("site").related_query_name()
+        alias = f"_{relation}{len(self.query._filtered_relations)}"
+        return self.alias(
+            **{
+                alias: FilteredRelation(
+                    relation,
+                    condition=Q(
+                        **{f"{relation}__pk": Subquery(current.values("pk")[:1])}
+                    ),
+                )
+            }
+        ).annotate(
+            **{
+                name: (
+                    computed[field](f"{alias}__")
+                    if field in computed
+                    else F(f"{alias}__{field}")
+                )
+                for field, name in fields.items()
+            }
+        )
+
+    def with_identification_fields(self, *fields, join=False, **renamed_fields):
         """
         Annotate the given identification fields valid now onto the site
         objects in this queryset.
 
         :param fields: The names of the fields to annotate, by default these
             will include: iers_domes_number, cdp_number
+        :param join: Join the current section row instead of using one
+            subquery per field, see :meth:`_annotate_current`
         :param renamed_fields: Named arguments where the names of the arguments
             are the field accessors for the fields to annotate and the values
             are the names to use for the annotated fields.
@@ -405,14 +1129,9 @@ class SiteQuerySet(models.QuerySet):
         identification = SiteIdentification.objects.filter(
             Q(site=OuterRef("pk")) & Q(published=True)
         )
-        return self.annotate(
-            **{
-                name: Subquery(identification.values(field)[:1])
-                for field, name in fields.items()
-            }
-        )
+        return self._annotate_current(identification, fields, join=join)
 
-    def with_location_fields(self, *fields, **renamed_fields):
+    def with_location_fields(self, *fields, join=False, **renamed_fields):
         """
         Annotate the given location fields valid now or at the given epoch
         onto the site objects in this queryset.
@@ -420,6 +1139,8 @@ class SiteQuerySet(models.QuerySet):
         :param fields: The names of the fields to annotate, by default these
             will include: XYZ, LLH, city, state, and
             country
+        :param join: Join the current section row instead of using one
+            subquery per field, see :meth:`_annotate_current`
         :param renamed_fields: Named arguments where the names of the arguments
             are the field accessors for the fields to annotate and the values
             are the names to use for the annotated fields.
@@ -437,14 +1158,9 @@ class SiteQuerySet(models.QuerySet):
         location = SiteLocation.objects.filter(
             Q(site=OuterRef("pk")) & Q(published=True)
         )
-        return self.annotate(
-            **{
-                name: Subquery(location.values(field)[:1])
-                for field, name in fields.items()
-            }
-        )
+        return self._annotate_current(location, fields, join=join)
 
-    def with_receiver_fields(self, *fields, epoch=None, **renamed_fields):
+    def with_receiver_fields(self, *fields, epoch=None, join=False, **renamed_fields):
         """
         Annotate the given receiver fields valid now or at the given epoch
         onto the site objects in this queryset. The field names should be
@@ -463,6 +1179,8 @@ class SiteQuerySet(models.QuerySet):
                 firmware -> receiver_firmware
         :param epoch: The point in time at which the receiver information
             should be valid for, default is now
+        :param join: Join the current section row instead of using one
+            subquery per field, see :meth:`_annotate_current`
         :param renamed_fields: Named arguments where the names of the arguments
             are the field accessors for the fields to annotate and the values
             are the names to use for the annotated fields.
@@ -479,26 +1197,14 @@ class SiteQuerySet(models.QuerySet):
             "firmware": "receiver_firmware",
         }
 
-        epoch_q = (
-            Q()
-            if epoch is None
-            else (
-                (Q(installed__lte=epoch) | Q(installed__isnull=True))
-                & (Q(removed__gt=epoch) | Q(removed__isnull=True))
-            )
-        )
+        epoch_q = Q() if epoch is None else SiteReceiver.valid_at(epoch)
         receiver = SiteReceiver.objects.filter(
             Q(site=OuterRef("pk")) & Q(published=True) & epoch_q
         ).order_by("-installed")
 
-        return self.annotate(
-            **{
-                name: Subquery(receiver.values(field)[:1])
-                for field, name in fields.items()
-            }
-        )
+        return self._annotate_current(receiver, fields, join=join)
 
-    def with_antenna_fields(self, *fields, epoch=None, **renamed_fields):
+    def with_antenna_fields(self, *fields, epoch=None, join=False, **renamed_fields):
         """
         Annotate the given antenna fields valid now or at the given epoch
         onto the site objects in this queryset. The field names should be
@@ -520,6 +1226,8 @@ class SiteQuerySet(models.QuerySet):
 
         :param epoch: The point in time at which the receiver information
             should be valid for, default is now
+        :param join: Join the current section row instead of using one
+            subquery per field, see :meth:`_annotate_current`
         :param renamed_fields: Named arguments where the names of the arguments
             are the field accessors for the fields to annotate and the values
             are the names to use for the annotated fields.
@@ -538,36 +1246,29 @@ class SiteQuerySet(models.QuerySet):
             "antcal": "antcal",
         }
 
-        epoch_q = (
-            Q()
-            if epoch is None
-            else (
-                (Q(installed__lte=epoch) | Q(installed__isnull=True))
-                & (Q(removed__gt=epoch) | Q(removed__isnull=True))
-            )
-        )
+        epoch_q = Q() if epoch is None else SiteAntenna.valid_at(epoch)
 
         antenna = SiteAntenna.objects.filter(
             Q(site=OuterRef("pk")) & Q(published=True) & epoch_q
         ).order_by("-installed")
-        if "antcal" in fields:
-            antenna = antenna.annotate(
-                antcal=Subquery(
+
+        return self._annotate_current(
+            antenna,
+            fields,
+            join=join,
+            computed={
+                "antcal": lambda prefix: Subquery(
                     AntCal.objects.filter(
-                        Q(antenna=OuterRef("antenna_type"))
-                        & Q(radome=OuterRef("radome_type"))
+                        Q(antenna=OuterRef(f"{prefix}antenna_type"))
+                        & Q(radome=OuterRef(f"{prefix}radome_type"))
                     ).values("method")[:1]
                 )
-            )
-
-        return self.annotate(
-            **{
-                name: Subquery(antenna.values(field)[:1])
-                for field, name in fields.items()
-            }
+            },
         )
 
-    def with_frequency_standard_fields(self, *fields, epoch=None, **renamed_fields):
+    def with_frequency_standard_fields(
+        self, *fields, epoch=None, join=False, **renamed_fields
+    ):
         """
         Annotate the given frequency standard fields valid now or at the given
         epoch onto the site objects in this queryset. The field names should be
@@ -578,6 +1279,8 @@ class SiteQuerySet(models.QuerySet):
                 standard_type -> clock
         :param epoch: The point in time at which the receiver information
             should be valid for, default is now
+        :param join: Join the current section row instead of using one
+            subquery per field, see :meth:`_annotate_current`
         :param renamed_fields: Named arguments where the names of the arguments
             are the field accessors for the fields to annotate and the values
             are the names to use for the annotated fields.
@@ -590,29 +1293,22 @@ class SiteQuerySet(models.QuerySet):
 
         fields = fields or {"standard_type": "clock"}
 
-        epoch_q = (
-            Q()
-            if epoch is None
-            else (
-                (Q(effective_start__lte=epoch) | Q(effective_start__isnull=True))
-                & (Q(effective_end__gt=epoch) | Q(effective_end__isnull=True))
-            )
-        )
+        epoch_q = Q() if epoch is None else SiteFrequencyStandard.valid_at(epoch)
         freq = SiteFrequencyStandard.objects.filter(
             Q(site=OuterRef("pk")) & Q(published=True) & epoch_q
         ).order_by("-effective_start")
 
-        return self.annotate(
-            **{name: Subquery(freq.values(field)[:1]) for field, name in fields.items()}
-        )
+        return self._annotate_current(freq, fields, join=join)
 
-    def with_info_fields(self, *fields, **renamed_fields):
+    def with_info_fields(self, *fields, join=False, **renamed_fields):
         """
         Annotate the given identification fields valid now onto the site
         objects in this queryset.
 
         :param fields: The names of the fields to annotate, by default these
             will include: iers_domes_number, cdp_number
+        :param join: Join the current section row instead of using one
+            subquery per field, see :meth:`_annotate_current`
         :param renamed_fields: Named arguments where the names of the arguments
             are the field accessors for the fields to annotate and the values
             are the names to use for the annotated fields.
@@ -631,12 +1327,7 @@ class SiteQuerySet(models.QuerySet):
         more_info = SiteMoreInformation.objects.filter(
             Q(site=OuterRef("pk")) & Q(published=True)
         )
-        return self.annotate(
-            **{
-                name: Subquery(more_info.values(field)[:1])
-                for field, name in fields.items()
-            }
-        )
+        return self._annotate_current(more_info, fields, join=join)
 
 
 class Site(models.Model):
@@ -743,6 +1434,8 @@ class Site(models.Model):
     )
 
     def needs_publish(self):
+        if "needs_publish_" in self.__dict__:
+            return self.needs_publish_
         if self.status in [SiteLogStatus.PROPOSED, SiteLogStatus.UPDATED]:
             return True
         elif self.status == SiteLogStatus.PUBLISHED:
@@ -788,17 +1481,47 @@ class Site(models.Model):
     def refresh_from_db(self, **kwargs):
         if hasattr(self, "_max_alert"):
             del self._max_alert
+        for flag in [
+            "needs_publish_",
+            "is_publishable_",
+            "is_moderator_",
+            "can_publish_",
+        ]:
+            self.__dict__.pop(flag, None)
         return super().refresh_from_db(**kwargs)
 
     @classproperty
     def alert_fields(cls):
-        from slm.models import Alert
+        """
+        The accessor names of the site alert relations, computed once.
+        """
+        if "alert_fields_" not in cls.__dict__:
+            from slm.models import Alert
 
-        return [
-            field.get_accessor_name()
-            for field in cls._meta.related_objects
-            if issubclass(field.related_model, Alert)
-        ]
+            cls.alert_fields_ = tuple(
+                field.get_accessor_name()
+                for field in cls._meta.related_objects
+                if issubclass(field.related_model, Alert)
+            )
+        return cls.alert_fields_
+
+    @classproperty
+    def alert_relations(cls):
+        """
+        A mapping of site alert classes to their related query names on Site,
+        computed once.
+        """
+        if "alert_relations_" not in cls.__dict__:
+            from slm.models import Alert
+
+            cls.alert_relations_ = MappingProxyType(
+                {
+                    field.related_model: field.name
+                    for field in cls._meta.related_objects
+                    if issubclass(field.related_model, Alert)
+                }
+            )
+        return cls.alert_relations_
 
     @cached_property
     def moderators(self):
@@ -837,22 +1560,62 @@ class Site(models.Model):
 
     @classmethod
     def sections(cls):
-        if hasattr(cls, "sections_"):
+        """
+        The immutable registry of site log sections. The registry is built
+        once per process (when the app is ready) so per request metadata
+        lookups do not have to introspect the models.
+
+        :return: A tuple of :class:`Section` tuples in model field order
+        """
+        if "sections_" in cls.__dict__:
             return cls.sections_
 
-        cls.sections_ = [
-            Section(
-                field=section.name,
-                accessor=section.get_accessor_name(),
-                cls=section.related_model,
-                subsection=SiteSubSection in section.related_model.__mro__,
+        sections = []
+        for section in Site._meta.get_fields():
+            if not (
+                section.related_model and (SiteSection in section.related_model.__mro__)
+            ):
+                continue
+            model = section.related_model
+            site_log_fields = tuple(model.site_log_fields())
+            sections.append(
+                Section(
+                    field=section.name,
+                    accessor=section.get_accessor_name(),
+                    cls=model,
+                    subsection=SiteSubSection in model.__mro__,
+                    site_log_fields=site_log_fields,
+                    valid_time=getattr(model, "valid_time", None),
+                    order_field=getattr(model, "order_field", None),
+                    structure=tuple(model.structure()),
+                )
             )
-            for section in Site._meta.get_fields()
-            if section.related_model and (SiteSection in section.related_model.__mro__)
-        ]
+        cls.sections_ = tuple(sections)
+        cls.sections_by_ = MappingProxyType(
+            {
+                **{section.cls: section for section in cls.sections_},
+                **{section.field: section for section in cls.sections_},
+                **{section.accessor: section for section in cls.sections_},
+            }
+        )
         return cls.sections_
 
+    @classmethod
+    def section(cls, key):
+        """
+        Look up a section in the registry.
+
+        :param key: The section model class, the section field name or the
+            section accessor name.
+        :return: The :class:`Section` tuple
+        :raises KeyError: If no such section exists
+        """
+        cls.sections()
+        return cls.sections_by_[key]
+
     def is_publishable(self):
+        if "is_publishable_" in self.__dict__:
+            return self.is_publishable_
         has_required_sections = Q(id=self.id)
         for required_section in getattr(
             settings, "SLM_REQUIRED_SECTIONS_TO_PUBLISH", []
@@ -972,13 +1735,19 @@ class Site(models.Model):
 
     @cached_property
     def modified_sections(self):
+        # use the HEAD sections if they were already loaded in bulk
+        loaded = getattr(self, "loaded_sections_", None) == (None, False)
         modified_sections = []
         for section in self.sections():
             if section.cls is SiteForm:
                 continue
             if section.subsection:
                 idx = 0
-                for subsection in getattr(self, section.accessor).head().sort():
+                for subsection in (
+                    getattr(self, section.field)
+                    if loaded
+                    else getattr(self, section.accessor).head().sort()
+                ):
                     idx += 1
                     if not subsection.published:
                         dot_index = f"{subsection.section_number()}"
@@ -987,7 +1756,11 @@ class Site(models.Model):
                         dot_index += f".{idx}"
                         modified_sections.append(dot_index)
             else:
-                modified = getattr(self, section.accessor).head()
+                modified = (
+                    getattr(self, section.field)
+                    if loaded
+                    else getattr(self, section.accessor).head()
+                )
                 if modified and not modified.published:
                     modified_sections.append(str(modified.section_number()))
         return modified_sections
@@ -1007,9 +1780,14 @@ class Site(models.Model):
         :return: The number of sections and subsections that had changes
             that were published or 0 if no changes were at HEAD to publish.
         """
+        from slm.models import ArchiveRenderJob
+
         if timestamp is None:
             timestamp = now()
 
+        # archive files still queued for the publication we are replacing
+        ArchiveRenderJob.objects.flush([self.pk])
+
         form = self.siteform_set.head()
         if form is None:
             SiteForm.objects.create(site=self, published=False, report_type="NEW")
@@ -1077,6 +1855,9 @@ class Site(models.Model):
             (date, {receiver: <receiver>, antenna: <antenna>}),
             (date, {receiver: <receiver>, antenna: <antenna>})
         ]
+
+        Use :meth:`SiteQuerySet.equipment_timelines` to compute equipment
+        histories for many sites at once.
         """
         equipment = {}
         self.published()
@@ -1127,6 +1908,78 @@ class Site(models.Model):
             self.refresh_from_db()
 
 
+class DirtySiteManager(models.Manager):
+    def mark(self, *sites):
+        """
+        Record that the denormalized state of the given sites may be stale.
+
+        :param sites: Site instances or primary keys
+        """
+        timestamp = now()
+        self.bulk_create(
+            [
+                self.model(site_id=getattr(site, "pk", site), timestamp=timestamp)
+                for site in set(sites)
+                if site is not None
+            ],
+            update_conflicts=True,
+            unique_fields=["site"],
+            update_fields=["timestamp"],
+        )
+
+    def drain(self, batch_size=500):
+        """
+        Synchronize the denormalized state of all dirty sites in batches. Rows
+        are claimed with SKIP LOCKED so multiple workers may drain the dirty
+        set concurrently.
+
+        :param batch_size: The maximum number of sites to synchronize in one
+            transaction.
+        :yield: The list of site primary keys synchronized in each batch.
+        """
+        while True:
+            with transaction.atomic():
+                site_ids = list(
+                    self.select_for_update(skip_locked=True)
+                    .order_by("timestamp")
+                    .values_list("site", flat=True)[:batch_size]
+                )
+                if not site_ids:
+                    return
+                Site.objects.filter(pk__in=site_ids).synchronize_denormalized_state()
+                # also clears marks left behind by sites that were deleted
+                self.filter(site__in=site_ids).delete()
+            yield site_ids
+
+
+class DirtySite(models.Model):
+    """
+    Sites whose denormalized state (num_flags, max_alert, status and the
+    modified sections on the HEAD form) may not reflect the normal data.
+    Section saves, flag changes and alert changes mark sites as dirty and the
+    synchronize command drains the set, recomputing only the affected sites.
+
+    Marks may be recorded while a site is being deleted, so there is no
+    database constraint on the site relation. Orphaned marks are removed when
+    the set is drained.
+    """
+
+    site = models.OneToOneField(
+        "slm.Site",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        primary_key=True,
+        related_name="dirty",
+    )
+
+    timestamp = models.DateTimeField(default=now, db_index=True)
+
+    objects = DirtySiteManager()
+
+    def __str__(self):
+        return f"{self.site.name}: {self.timestamp}"
+
+
 class SiteSectionManager(gis_models.Manager):
     is_head = False
 
@@ -1153,9 +2006,29 @@ class SiteSectionManager(gis_models.Manager):
         )
 
 
+class TrackedModelIterable(ModelIterable):
+    """
+    Yield section instances that track changes to their site log fields.
+    """
+
+    def __iter__(self):
+        for obj in super().__iter__():
+            yield obj.track_changes()
+
+
 class SiteSectionQueryset(gis_models.QuerySet):
     is_head = False
 
+    def track_changes(self):
+        """
+        Fetch instances that capture their initial field values, see
+        :meth:`SiteSection.track_changes`. Use this when fetching instances
+        that will be edited and validated.
+        """
+        qry = self._chain()
+        qry._iterable_class = TrackedModelIterable
+        return qry
+
     def editable_by(self, user):
         if user.is_superuser:
             return self
@@ -1193,6 +2066,46 @@ class SiteSectionQueryset(gis_models.QuerySet):
         ret.is_head = self.is_head
         return ret
 
+    def superseded(self, filter=None):
+        """
+        An expression that is True if there is an unpublished edit at HEAD for
+        the row's site. Published rows for which this is True are not at HEAD.
+
+        :param filter: An optional Q object the unpublished edit must match.
+        """
+        return Exists(
+            self.model.objects.filter(
+                (filter or Q()) & Q(site=OuterRef("site")) & Q(published=False)
+            )
+        )
+
+    def head_edits(self):
+        """
+        Fetch the rows in this queryset that are waiting to be published.
+        """
+        return self.filter(published=False)
+
+    def publish_head(self):
+        """
+        Publish all HEAD edits in this queryset using set based statements
+        instead of publishing each row individually. Any previously published
+        rows superseded by the HEAD edits are deleted.
+
+        :return: A dictionary mapping site primary keys to the number of
+            sections that were published for that site.
+        """
+        published = dict(
+            self.head_edits()
+            .order_by()
+            .values("site")
+            .annotate(count=Count("pk"))
+            .values_list("site", "count")
+        )
+        if published:
+            self.filter(Q(site__in=published.keys()) & Q(published=True)).delete()
+            self.head_edits().update(published=True)
+        return published
+
     def sort(self, reverse=False):
         return self
 
@@ -1230,6 +2143,24 @@ class SiteLocationQueryset(SiteSectionQueryset):
         )
 
 
+class SiteFormQueryset(SiteSectionQueryset):
+    def publish_head(self):
+        """
+        Forms also record the date they were prepared and the index of the
+        previous log when they are published.
+        """
+        from slm.models import ArchiveIndex
+
+        self.head_edits().update(
+            date_prepared=utc_now_date(),
+            previous=Subquery(
+                ArchiveIndex.objects.filter(site=OuterRef("site")).values("pk")[:1]
+            ),
+        )
+        self.head_edits().filter(previous__isnull=False).update(report_type="UPDATE")
+        return super().publish_head()
+
+
 class SiteSection(gis_models.Model):
     site = models.ForeignKey("slm.Site", on_delete=models.CASCADE)
 
@@ -1286,6 +2217,8 @@ class SiteSection(gis_models.Model):
             part of a larger site publish)
         :return: True if a change was published, False otherwise.
         """
+        from slm.models import ArchiveRenderJob
+
         if not self.publishable():
             return False
 
@@ -1293,6 +2226,11 @@ class SiteSection(gis_models.Model):
             timestamp = now()
 
         with transaction.atomic():
+            if update_site:
+                # archive files still queued for the publication we are
+                # replacing
+                ArchiveRenderJob.objects.flush([self.site_id])
+
             if getattr(self, "is_deleted", False):
                 self.delete()
             else:
@@ -1430,24 +2368,30 @@ class SiteSection(gis_models.Model):
         """
         Return the editable fields for the given sitelog section
         """
-        return [
-            field.name
-            for field in cls._meta.fields
-            if field.name
-            not in {
-                "id",
-                "site",
-                "edited",
-                "published",
-                "error",
-                "subsection",
-                "is_deleted",
-                "deleted",
-                "_flags",
-                "inserted",
-                "num_flags",
-            }
-        ]
+        fields = cls.__dict__.get("_site_log_fields_", None)
+        if fields is None:
+            fields = cls._site_log_fields_ = tuple(
+                field.name
+                for field in cls._meta.fields
+                if field.name not in cls.non_site_log_fields
+            )
+        return list(fields)
+
+    non_site_log_fields = frozenset(
+        {
+            "id",
+            "site",
+            "edited",
+            "published",
+            "error",
+            "subsection",
+            "is_deleted",
+            "deleted",
+            "_flags",
+            "inserted",
+            "num_flags",
+        }
+    )
 
     @classmethod
     def structure(cls):
@@ -1475,29 +2419,51 @@ class SiteSection(gis_models.Model):
             return getattr(cls, field).verbose_name
         return cls._meta.get_field(field).verbose_name
 
-    def __init__(self, *args, **kwargs):
+    @classmethod
+    def tracked_fields(cls):
+        """
+        The site log fields whose initial values are captured by
+        :meth:`track_changes`. Relations are not tracked. This list is
+        computed once per model.
         """
-        After our model is initialized we cache the values of the fields. This
-        is used by get_initial_value to eliminate the need for another database
-        round trip.
+        fields = cls.__dict__.get("_tracked_fields_", None)
+        if fields is None:
+            fields = tuple(
+                field
+                for field in cls.site_log_fields()
+                if not isinstance(
+                    cls._meta.get_field(field),
+                    (models.ManyToManyField, models.ForeignKey),
+                )
+            )
+            cls._tracked_fields_ = fields
+        return fields
 
-        :param args:
-        :param kwargs:
+    def track_changes(self):
+        """
+        Capture the current values of the tracked fields. These are returned
+        by get_initial_value, which eliminates the need for another database
+        round trip when the instance is validated after it has been edited.
+        Instances are not tracked by default because most reads never edit
+        them - use :meth:`SiteSectionQueryset.track_changes` to fetch tracked
+        instances.
+
+        :return: This instance
         """
-        super().__init__(*args, **kwargs)
-        self._init_values_ = {}
         deferred = self.get_deferred_fields()
-        for field in self.site_log_fields():
-            if field not in deferred and not isinstance(
-                self._meta.get_field(field), (models.ManyToManyField, models.ForeignKey)
-            ):
-                self._init_values_[field] = getattr(self, field)
+        self._init_values_ = {
+            field: getattr(self, field)
+            for field in self.tracked_fields()
+            if field not in deferred
+        }
+        return self
 
     def get_initial_value(self, field):
         """
-        Get the current value of the field at the time of initialization. This
-        call may result in a database lookup if the field was deferred on
-        initialization. The field must be in the model's site_log_fields().
+        Get the value of the field at the time changes started being tracked.
+        If changes are not being tracked or the field was deferred, the value
+        is fetched from the database. The field must be in the model's
+        site_log_fields().
 
         :param field:
         :return:
@@ -1506,11 +2472,16 @@ class SiteSection(gis_models.Model):
             raise ValueError(
                 f"Field {field} is not a site log field for {self.__class__}"
             )
-        if field not in self._init_values_:
-            current = self.__class__.objects.filter(pk=self.pk).first()
-            for field in self.site_log_fields():
-                self._init_values_[field] = getattr(current, field)
-        return self._init_values_[field]
+        init_values = self.__dict__.setdefault("_init_values_", {})
+        if field not in init_values:
+            current = (
+                self.__class__.objects.filter(pk=self.pk).first()
+                if self.pk is not None
+                else None
+            )
+            for site_log_field in self.site_log_fields():
+                init_values[site_log_field] = getattr(current or self, site_log_field)
+        return init_values[field]
 
     def sort(self):
         """
@@ -1560,21 +2531,6 @@ class SiteSubSectionManager(SiteSectionManager):
 class SiteSubSectionQuerySet(SiteSectionQueryset):
     is_head = False
 
-    def last(self):
-        """
-        The technique we use to restrict head() is to order by unpublished vs
-        published and then use DISTINCT on subsection to pick the first
-        row for each subsection - this unfortunately breaks when last() is used
-        because it will pull out the published version instead of one exists.
-        We work around that here by pulling out the last from the original
-        query rather than asking the database to do it. first() is unaffected
-        by this problem.
-        """
-        if self.is_head:
-            for sct in reversed(self):
-                return sct
-        return super().last()
-
     def published(self, subsection=None, epoch=None):
         return self._current(subsection=subsection, epoch=epoch, published=True)
 
@@ -1626,58 +2582,107 @@ class SiteSubSectionQuerySet(SiteSectionQueryset):
             section_q &= Q(published=False) | Q(is_deleted=True)
 
         if subsection is not None:
-            return self.filter(Q(subsection=subsection) & section_q).first()
+            return (
+                self.filter(Q(subsection=subsection) & section_q)
+                .order_by("published")
+                .first()
+            )
 
-        elif published is not None:
-            qry = self.filter(section_q).order_by(self.model.order_field, "subsection")
+        qry = self.filter(section_q)
+        if published is None:
+            # there is at most one published and one unpublished row per
+            # subsection, so HEAD is every unpublished row plus the published
+            # rows that have no unpublished edit
+            qry = qry.alias(_superseded=self.superseded(section_q)).filter(
+                Q(published=False) | Q(_superseded=False)
+            )
+        if published is None:
+            qry = qry.order_by(*self.stack_ordering(self.model))
         else:
-            ordering = ["subsection", "published"]
-
-            qry = self.filter(section_q).order_by(*ordering).distinct("subsection")
-
+            qry = qry.order_by(self.model.order_field, "subsection")
         qry.is_head = self.is_head
         return qry
 
-    def sort(self, reverse=False):
+    def superseded(self, filter=None):
+        """
+        An expression that is True if there is an unpublished edit at HEAD for
+        the row's subsection. Published rows for which this is True are not at
+        HEAD.
+
+        :param filter: An optional Q object the unpublished edit must match.
         """
-        When fetching head() lists - we must sort in memory because changes to
-        the sort field can screw up the head() selection. In short - if
-        you call head() on a subsection and ordering matters, call sort next.
-        This does not alter the query but instead runs the query and returns
-        an in-memory list that is sorted. It should therefore not be called
-        on large querysets on that pull from more than one site.
+        return Exists(
+            self.model.objects.filter(
+                (filter or Q())
+                & Q(site=OuterRef("site"))
+                & Q(subsection=OuterRef("subsection"))
+                & Q(published=False)
+            )
+        )
 
-        This will be fixed in the data model architectural refactor when the
-        edit tables are separated from the published tables.
+    def head_edits(self):
+        """
+        Fetch the rows in this queryset that are waiting to be published. This
+        includes published subsections that have been marked for deletion.
+        """
+        return self.filter(Q(published=False) | Q(is_deleted=True))
 
-        :param reverse: Reverse the sorted order
-        :return: An iterable of sorted objects
-        """
-
-        class OrderTuple:
-            def __init__(self, field, subsection):
-                self.field = field
-                self.subsection = subsection
-
-            def __lt__(self, other):
-                """
-                Custom < operator allows for None values of field to be
-                ignored - there's some old/bad data we have to allow
-                """
-                if other.field is not None and self.field is not None:
-                    if self.field < other.field:
-                        return True
-                return self.subsection < other.subsection
-
-        sorted_sections = sorted(
-            (obj for obj in self),
-            key=lambda o: OrderTuple(getattr(o, o.order_field), o.subsection)
-            if getattr(self.model, "order_field", None)
-            else lambda o: o.subsection,
+    def publish_head(self):
+        """
+        Publish all HEAD edits in this queryset using set based statements
+        instead of publishing each subsection individually. Published rows
+        that are superseded by an unpublished edit or that were marked for
+        deletion are deleted.
+
+        :return: A dictionary mapping site primary keys to the number of
+            subsections that were published for that site.
+        """
+        published = dict(
+            self.head_edits()
+            .order_by()
+            .values("site")
+            .annotate(count=Count("subsection", distinct=True))
+            .values_list("site", "count")
         )
+        if published:
+            self.filter(Q(site__in=published.keys()) & Q(published=True)).alias(
+                _superseded=self.superseded()
+            ).filter(Q(is_deleted=True) | Q(_superseded=True)).delete()
+            self.filter(published=False).update(published=True)
+        return published
+
+    @classmethod
+    def stack_ordering(cls, model, reverse=False):
+        """
+        The database ordering of subsection stacks. Some legacy data has nulls
+        in the order field, those rows are sorted first and ties are broken by
+        the subsection identifier.
+
+        :param model: The subsection model class
+        :param reverse: Reverse the sorted order
+        :return: A tuple of order_by() expressions
+        """
         if reverse:
-            return list(reversed(sorted_sections))
-        return list(sorted_sections)
+            return (
+                F(model.order_field).desc(nulls_last=True),
+                F("subsection").desc(),
+            )
+        return (
+            F(model.order_field).asc(nulls_first=True),
+            F("subsection").asc(),
+        )
+
+    def sort(self, reverse=False):
+        """
+        Order the subsection stack by its order field. If you call head() on
+        a subsection and ordering matters, call sort next. The ordering is
+        done by the database, so the result remains a lazy queryset that may
+        be sliced, paginated or span multiple sites.
+
+        :param reverse: Reverse the sorted order
+        :return: The ordered queryset
+        """
+        return self.order_by(*self.stack_ordering(self.model, reverse=reverse))
 
 
 class SiteSubSection(SiteSection):
@@ -1753,6 +2758,49 @@ class SiteSubSection(SiteSection):
     def order_field(cls):
         return cls.valid_time if cls.valid_time else "subsection"
 
+    @classproperty
+    def invalid_time(cls):
+        """
+        The field that defines when this subsection stopped being valid, or
+        None if the subsection has no time range of validity.
+        """
+        return {"installed": "removed", "effective_start": "effective_end"}.get(
+            cls.valid_time, None
+        )
+
+    @classmethod
+    def validity(cls, prefix=""):
+        """
+        The [valid_time, invalid_time) range expression of this subsection.
+        Subsections with time ranges of validity have a GiST index on this
+        expression.
+
+        :param prefix: A relation path prefix (e.g. "sitereceiver__") if the
+            expression is used from a related model
+        :return: A range expression
+        """
+        return validity_range(
+            f"{prefix}{cls.valid_time}",
+            f"{prefix}{cls.invalid_time}",
+            dates=not isinstance(
+                cls._meta.get_field(cls.valid_time), models.DateTimeField
+            ),
+        )
+
+    @classmethod
+    def valid_at(cls, epoch, prefix=""):
+        """
+        A filter condition that is true for subsections that were valid at
+        the given epoch. This is a range containment test that can use the
+        GiST validity index.
+
+        :param epoch: The point in time
+        :param prefix: A relation path prefix (e.g. "sitereceiver__") if the
+            condition is used from a related model
+        :return: A Q object
+        """
+        return Q(DateTimeRangeContains(cls.validity(prefix=prefix), epoch))
+
     @property
     def heading(self):
         """
@@ -1830,6 +2878,8 @@ class SiteForm(SiteSection):
           Modified/Added Sections : (n.n,n.n,...)
     """
 
+    objects = SiteSectionManager.from_queryset(SiteFormQueryset)()
+
     @classmethod
     def structure(cls):
         return [
@@ -2576,6 +3626,9 @@ class SiteReceiver(SiteSubSection):
         indexes = [
             models.Index(fields=("site", "subsection", "published", "installed")),
             models.Index(fields=("subsection", "published", "installed")),
+            GistIndex(
+                validity_range("installed", "removed"), name="slm_receiver_validity"
+            ),
         ]
 
 
@@ -2815,6 +3868,9 @@ class SiteAntenna(SiteSubSection):
         indexes = [
             models.Index(fields=("site", "subsection", "published", "installed")),
             models.Index(fields=("subsection", "published", "installed")),
+            GistIndex(
+                validity_range("installed", "removed"), name="slm_antenna_validity"
+            ),
         ]
 
 
@@ -3093,6 +4149,10 @@ class SiteFrequencyStandard(SiteSubSection):
         indexes = [
             models.Index(fields=("site", "subsection", "published", "effective_start")),
             models.Index(fields=("subsection", "published", "effective_start")),
+            GistIndex(
+                validity_range("effective_start", "effective_end", dates=True),
+                name="slm_frequency_validity",
+            ),
         ]
 
 
@@ -3205,6 +4265,10 @@ class SiteCollocation(SiteSubSection):
         indexes = [
             models.Index(fields=("site", "subsection", "published", "effective_start")),
             models.Index(fields=("subsection", "published", "effective_start")),
+            GistIndex(
+                validity_range("effective_start", "effective_end", dates=True),
+                name="slm_collocation_validity",
+            ),
         ]
 
 
@@ -3415,6 +4479,15 @@ class SiteHumiditySensor(MeteorologicalInstrumentation):
         db_index=True,
     )
 
+    class Meta(MeteorologicalInstrumentation.Meta):
+        indexes = [
+            *MeteorologicalInstrumentation.Meta.indexes,
+            GistIndex(
+                validity_range("effective_start", "effective_end", dates=True),
+                name="slm_humidity_validity",
+            ),
+        ]
+
 
 class SitePressureSensor(MeteorologicalInstrumentation):
     """
@@ -3477,6 +4550,15 @@ class SitePressureSensor(MeteorologicalInstrumentation):
         db_index=True,
     )
 
+    class Meta(MeteorologicalInstrumentation.Meta):
+        indexes = [
+            *MeteorologicalInstrumentation.Meta.indexes,
+            GistIndex(
+                validity_range("effective_start", "effective_end", dates=True),
+                name="slm_pressure_validity",
+            ),
+        ]
+
 
 class SiteTemperatureSensor(MeteorologicalInstrumentation):
     """
@@ -3556,6 +4638,15 @@ class SiteTemperatureSensor(MeteorologicalInstrumentation):
         db_index=True,
     )
 
+    class Meta(MeteorologicalInstrumentation.Meta):
+        indexes = [
+            *MeteorologicalInstrumentation.Meta.indexes,
+            GistIndex(
+                validity_range("effective_start", "effective_end", dates=True),
+                name="slm_temperature_validity",
+            ),
+        ]
+
 
 class SiteWaterVaporRadiometer(MeteorologicalInstrumentation):
     """
@@ -3611,6 +4702,15 @@ class SiteWaterVaporRadiometer(MeteorologicalInstrumentation):
         db_index=True,
     )
 
+    class Meta(MeteorologicalInstrumentation.Meta):
+        indexes = [
+            *MeteorologicalInstrumentation.Meta.indexes,
+            GistIndex(
+                validity_range("effective_start", "effective_end", dates=True),
+                name="slm_water_vapor_validity",
+            ),
+        ]
+
 
 class SiteOtherInstrumentation(SiteSubSection):
     """
@@ -3777,6 +4877,15 @@ class SiteRadioInterferences(Condition):
         db_index=True,
     )
 
+    class Meta(Condition.Meta):
+        indexes = [
+            *Condition.Meta.indexes,
+            GistIndex(
+                validity_range("effective_start", "effective_end", dates=True),
+                name="slm_interference_validity",
+            ),
+        ]
+
 
 class SiteMultiPathSources(Condition):
     """
@@ -3809,6 +4918,15 @@ class SiteMultiPathSources(Condition):
         db_index=True,
     )
 
+    class Meta(Condition.Meta):
+        indexes = [
+            *Condition.Meta.indexes,
+            GistIndex(
+                validity_range("effective_start", "effective_end", dates=True),
+                name="slm_multipath_validity",
+            ),
+        ]
+
 
 class SiteSignalObstructions(Condition):
     """
@@ -3841,6 +4959,15 @@ class SiteSignalObstructions(Condition):
         db_index=True,
     )
 
+    class Meta(Condition.Meta):
+        indexes = [
+            *Condition.Meta.indexes,
+            GistIndex(
+                validity_range("effective_start", "effective_end", dates=True),
+                name="slm_obstruction_validity",
+            ),
+        ]
+
 
 class SiteLocalEpisodicEffects(SiteSubSection):
     """
@@ -3922,6 +5049,10 @@ class SiteLocalEpisodicEffects(SiteSubSection):
         indexes = [
             models.Index(fields=("site", "subsection", "published", "effective_start")),
             models.Index(fields=("subsection", "published", "effective_start")),
+            GistIndex(
+                validity_range("effective_start", "effective_end", dates=True),
+                name="slm_episodic_validity",
+            ),
         ]
 
 
@@ -0,0 +1,235 @@
+"""
+Read-only, in-memory snapshots of site logs for bulk work like exports, SINEX
+generation and index rebuilds. Building full model instances for every
+section row is expensive - each instance carries Django's model state and
+copies of its site log field values. Snapshots are built from values() rows
+into slotted, immutable records instead. Related objects (equipment, archive
+indexes, satellite systems, ...) are fetched once and shared between all
+records that reference them.
+
+Records behave like their section models for read access - model properties
+and methods are available on them - so templates written against the models
+render snapshots unchanged. Anything that writes to the database or relies
+on model state will not work on a record.
+
+Use :meth:`~slm.models.sitelog.SiteQuerySet.snapshots` to build snapshots.
+"""
+
+import inspect
+import typing as t
+from types import MethodType
+
+from django.db import models
+from django.utils.functional import cached_property
+
+
+class RelatedRecords(tuple):
+    """
+    An immutable sequence of the related objects of a many-to-many field.
+    Supports the small part of the related manager interface templates use.
+    """
+
+    __slots__ = ()
+
+    def all(self):
+        return self
+
+    def count(self):
+        return len(self)
+
+    def exists(self):
+        return bool(self)
+
+
+class SectionRecord:
+    """
+    Base class for immutable, slotted section records. Concrete record
+    classes are generated for each section model by :func:`record_class`.
+    Attribute access that is not a field falls back to the section model so
+    that its properties and methods run against the record.
+    """
+
+    __slots__ = ()
+
+    model_: t.Type[models.Model]
+
+    def __init__(self, **values):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{self.__class__.__name__} is immutable.")
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        attr = inspect.getattr_static(self.model_, name)
+        if isinstance(attr, property):
+            return attr.fget(self)
+        if isinstance(attr, cached_property):
+            return attr.func(self)
+        if inspect.isfunction(attr):
+            return MethodType(attr, self)
+        return getattr(self.model_, name)
+
+    def __str__(self):
+        return self.model_.__str__(self)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}: {self.pk}>"
+
+
+_record_classes: t.Dict[t.Type[models.Model], t.Type[SectionRecord]] = {}
+
+
+def record_class(model: t.Type[models.Model]) -> t.Type[SectionRecord]:
+    """
+    Get the slotted record class for the given section model.
+
+    :param model: The section model class
+    :return: A SectionRecord subclass with a slot for every field
+    """
+    if model not in _record_classes:
+        slots = {"site"}
+        for field in model._meta.concrete_fields:
+            slots.add(field.attname)
+            slots.add(field.name)
+        slots.update(field.name for field in model._meta.many_to_many)
+        _record_classes[model] = type(
+            f"{model.__name__}Record",
+            (SectionRecord,),
+            {"__slots__": tuple(sorted(slots)), "model_": model},
+        )
+    return _record_classes[model]
+
+
+class SiteLogSnapshot:
+    """
+    An immutable snapshot of the published (or HEAD) state of a site log.
+    Sections are available under the same attribute names that
+    :meth:`~slm.models.sitelog.Site.published` uses. Subsection stacks are
+    tuples of records in order.
+    """
+
+    __slots__ = ("site", "epoch", "published", "sections")
+
+    def __init__(self, site, sections, epoch=None, published=True):
+        object.__setattr__(self, "site", site)
+        object.__setattr__(self, "sections", sections)
+        object.__setattr__(self, "epoch", epoch)
+        object.__setattr__(self, "published", bool(published))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SiteLogSnapshot is immutable.")
+
+    def __getattr__(self, name):
+        try:
+            return self.sections[name]
+        except KeyError as err:
+            raise AttributeError(name) from err
+
+    def __repr__(self):
+        return f"<SiteLogSnapshot: {self.site.name}>"
+
+    @classmethod
+    def build(cls, sites, epoch=None, published=True, sections=None):
+        """
+        Build snapshots for many sites with one query per section model plus
+        one query per related model.
+
+        :param sites: A Site queryset
+        :param epoch: A point in time at which to fetch the site log state.
+        :param published: If True (default) fetch the published state, if None
+            fetch the HEAD state.
+        :param sections: The section model classes to fetch, default is all
+        :return: A list of SiteLogSnapshot instances in queryset order
+        """
+        site_map = {site.pk: site for site in sites}
+        stacks = {pk: {} for pk in site_map}
+        for section, qry in sites.section_queries(
+            site_map.keys(), epoch=epoch, published=published, sections=sections
+        ):
+            for stack in stacks.values():
+                stack[section.field] = [] if section.subsection else None
+            for record in records(section.cls, qry, site_map):
+                if section.subsection:
+                    stacks[record.site_id][section.field].append(record)
+                else:
+                    stacks[record.site_id][section.field] = record
+            if section.subsection:
+                for stack in stacks.values():
+                    stack[section.field] = tuple(stack[section.field])
+
+        return [
+            cls(site, stacks[pk], epoch=epoch, published=published)
+            for pk, site in site_map.items()
+        ]
+
+
+def records(model, queryset, sites) -> t.List[SectionRecord]:
+    """
+    Fetch the rows of a section queryset as slotted records. Foreign keys and
+    many-to-many relations are resolved with one query per related model and
+    the related objects are shared between records.
+
+    :param model: The section model class
+    :param queryset: A queryset of the section model
+    :param sites: A dictionary mapping site primary keys to Site instances
+    :return: A list of records in queryset order
+    """
+    Record = record_class(model)
+    fields = [field for field in model._meta.concrete_fields if field.name != "site"]
+    rows = list(
+        queryset.values(*[field.attname for field in model._meta.concrete_fields])
+    )
+    if not rows:
+        return []
+
+    related = {}
+    for field in fields:
+        if not field.is_relation:
+            continue
+        ids = {row[field.attname] for row in rows} - {None}
+        related[field] = (
+            field.related_model._base_manager.in_bulk(
+                ids, field_name=field.target_field.attname
+            )
+            if ids
+            else {}
+        )
+
+    pk_name = model._meta.pk.attname
+    many = {}
+    for field in model._meta.many_to_many:
+        links = list(
+            field.remote_field.through.objects.filter(
+                **{f"{field.m2m_field_name()}__in": [row[pk_name] for row in rows]}
+            ).values_list(
+                f"{field.m2m_field_name()}_id", f"{field.m2m_reverse_field_name()}_id"
+            )
+        )
+        # preserve the related model's default ordering
+        targets = {
+            obj.pk: obj
+            for obj in field.related_model.objects.filter(
+                pk__in={target for _, target in links}
+            )
+        }
+        position = {pk: idx for idx, pk in enumerate(targets)}
+        groups = {}
+        for source, target in sorted(links, key=lambda link: position[link[1]]):
+            groups.setdefault(source, []).append(targets[target])
+        many[field.name] = groups
+
+    objects = []
+    for row in rows:
+        values = {**row, "site": sites[row["site_id"]]}
+        for field, objs in related.items():
+            values[field.name] = objs.get(row[field.attname], None)
+        for name, groups in many.items():
+            values[name] = RelatedRecords(groups.get(row[pk_name], []))
+        objects.append(Record(**values))
+    return objects
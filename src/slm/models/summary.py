@@ -0,0 +1,280 @@
+"""
+A read optimized projection of the published site log data that is most often
+needed by the public APIs (station list, map and SINEX). Site log data is
+normalized across a large number of section tables, the station summary
+flattens the facts that matter into one row per site per interval of time
+during which the site's equipment did not change.
+
+The summary is rebuilt for a site whenever it is published while the
+``SLM_STATION_SUMMARY`` setting is enabled and may be rebuilt in full using the
+``build_summary`` command.
+"""
+
+import typing as t
+from datetime import date, datetime, time, timezone
+
+from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.contrib.postgres.fields.ranges import DateTimeTZRange, RangeOperators
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from django_enum import EnumField
+
+from slm.defines import AntennaCalibrationMethod, FrequencyStandardType, ISOCountry
+
+
+def _as_datetime(value: t.Optional[t.Union[date, datetime]]) -> t.Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.combine(value, time.min, tzinfo=timezone.utc)
+
+
+class StationSummaryManager(models.Manager):
+    def rebuild(self, sites):
+        """
+        Rebuild the summary rows for the given sites from their published
+        site log data. The published data is loaded in bulk so the number of
+        queries does not depend on the number of sites.
+
+        :param sites: A Site queryset
+        :return: The number of summary rows created
+        """
+        from slm.models import AntCal
+
+        sites = sites.load_sections(published=True)
+        antcals = {}
+        pairs = {
+            (antenna.antenna_type_id, antenna.radome_type_id)
+            for site in sites
+            for antenna in site.siteantenna
+        }
+        if pairs:
+            pair_q = Q()
+            for antenna_type, radome_type in pairs:
+                pair_q |= Q(antenna=antenna_type) & Q(radome=radome_type)
+            antcals = {
+                (antenna, radome): method
+                for antenna, radome, method in AntCal.objects.filter(
+                    pair_q
+                ).values_list("antenna", "radome", "method")
+            }
+
+        summaries = []
+        for site in sites:
+            summaries.extend(self.summarize(site, antcals=antcals))
+
+        with transaction.atomic():
+            self.filter(site__in=[site.pk for site in sites]).delete()
+            self.bulk_create(summaries)
+        return len(summaries)
+
+    def summarize(self, site, antcals=None):
+        """
+        Build the (unsaved) summary rows for a site from its published
+        sections. The sections must already be loaded onto the site using
+        :meth:`~slm.models.sitelog.SiteQuerySet.load_sections`.
+
+        :param site: The Site to summarize
+        :param antcals: A dictionary mapping (antenna, radome) primary keys to
+            calibration methods.
+        :return: A list of StationSummary instances in time order
+        """
+        antcals = antcals or {}
+        receivers = site.sitereceiver
+        antennas = site.siteantenna
+        standards = site.sitefrequencystandard
+
+        def active(sections, start, end, epoch):
+            current = None
+            for section in sections:
+                begin = _as_datetime(getattr(section, start))
+                finish = _as_datetime(getattr(section, end))
+                if (begin is None or begin <= epoch) and (
+                    finish is None or finish > epoch
+                ):
+                    if current is None or (
+                        begin
+                        and (
+                            _as_datetime(getattr(current, start)) is None
+                            or begin > _as_datetime(getattr(current, start))
+                        )
+                    ):
+                        current = section
+            return current
+
+        boundaries = sorted(
+            {
+                boundary
+                for boundary in [
+                    *[_as_datetime(rcv.installed) for rcv in receivers],
+                    *[_as_datetime(rcv.removed) for rcv in receivers],
+                    *[_as_datetime(ant.installed) for ant in antennas],
+                    *[_as_datetime(ant.removed) for ant in antennas],
+                    *[_as_datetime(std.effective_start) for std in standards],
+                    *[_as_datetime(std.effective_end) for std in standards],
+                ]
+                if boundary is not None
+            }
+        )
+
+        ident = site.siteidentification
+        location = site.sitelocation
+        info = site.sitemoreinformation
+        common = {
+            "site": site,
+            "domes_number": ident.iers_domes_number if ident else "",
+            "cdp_number": ident.cdp_number if ident else "",
+            "city": location.city if location else "",
+            "state": location.state if location else "",
+            "country": location.country if location else None,
+            "xyz": location.xyz if location else None,
+            "llh": location.llh if location else None,
+            "data_center": info.primary if info else "",
+            "secondary_data_center": info.secondary if info else "",
+        }
+
+        summaries = []
+        intervals = list(zip([None, *boundaries], [*boundaries, None]))
+        for begin, end in intervals[1:] or intervals:
+            receiver = active(receivers, "installed", "removed", begin)
+            antenna = active(antennas, "installed", "removed", begin)
+            standard = active(standards, "effective_start", "effective_end", begin)
+            equipment = (
+                receiver.pk if receiver else None,
+                antenna.pk if antenna else None,
+                standard.pk if standard else None,
+            )
+            if summaries and summaries[-1].equipment_ == equipment:
+                # nothing changed - extend the previous interval
+                summaries[-1].valid_range = DateTimeTZRange(
+                    summaries[-1].valid_range.lower, end
+                )
+                continue
+
+            summary = self.model(
+                **common,
+                valid_range=DateTimeTZRange(begin, end),
+                receiver_type=receiver.receiver_type.model if receiver else "",
+                receiver_serial_number=receiver.serial_number if receiver else "",
+                receiver_firmware=receiver.firmware if receiver else "",
+                receiver_installed=receiver.installed if receiver else None,
+                receiver_removed=receiver.removed if receiver else None,
+                antenna_type=antenna.antenna_type.model if antenna else "",
+                radome_type=(
+                    antenna.radome_type.model if antenna and antenna.radome_type else ""
+                ),
+                antenna_serial_number=antenna.serial_number if antenna else "",
+                antenna_marker_une=antenna.marker_une if antenna else None,
+                antenna_alignment=antenna.alignment if antenna else None,
+                antenna_installed=antenna.installed if antenna else None,
+                antenna_removed=antenna.removed if antenna else None,
+                antcal=(
+                    antcals.get((antenna.antenna_type_id, antenna.radome_type_id))
+                    if antenna
+                    else None
+                ),
+                frequency_standard=standard.standard_type if standard else None,
+            )
+            summary.equipment_ = equipment
+            summaries.append(summary)
+        return summaries
+
+
+class StationSummaryQuerySet(models.QuerySet):
+    def current(self):
+        """
+        Filter to the summary rows that are valid now.
+        """
+        return self.filter(valid_range__upper_inf=True)
+
+    def at_epoch(self, epoch=None):
+        """
+        Filter to the summary rows that are valid at the given epoch.
+
+        :param epoch: The point in time, default is now
+        """
+        if epoch is None:
+            return self.current()
+        return self.filter(valid_range__contains=epoch)
+
+
+class StationSummary(models.Model):
+    """
+    One row per site per interval of time during which the site's receiver,
+    antenna and frequency standard did not change. Location, identification
+    and data center facts are taken from the current published site log and
+    are the same for every interval.
+    """
+
+    site = models.ForeignKey(
+        "slm.Site", on_delete=models.CASCADE, null=False, related_name="summaries"
+    )
+
+    # bounds are inclusive/exclusive
+    valid_range = DateTimeRangeField(null=False, default_bounds="[)", db_index=True)
+
+    domes_number = models.CharField(max_length=9, blank=True, default="")
+    cdp_number = models.CharField(max_length=50, blank=True, default="")
+
+    city = models.CharField(max_length=50, blank=True, default="")
+    state = models.CharField(max_length=50, blank=True, default="")
+    country = EnumField(
+        ISOCountry,
+        strict=False,
+        max_length=100,
+        blank=True,
+        null=True,
+        default=None,
+        db_index=True,
+    )
+    xyz = gis_models.PointField(srid=7789, dim=3, null=True, blank=True)
+    llh = gis_models.PointField(srid=4979, dim=3, null=True, blank=True)
+
+    receiver_type = models.CharField(max_length=50, blank=True, default="")
+    receiver_serial_number = models.CharField(max_length=50, blank=True, default="")
+    receiver_firmware = models.CharField(max_length=50, blank=True, default="")
+    receiver_installed = models.DateTimeField(null=True, blank=True)
+    receiver_removed = models.DateTimeField(null=True, blank=True)
+
+    antenna_type = models.CharField(max_length=50, blank=True, default="")
+    radome_type = models.CharField(max_length=50, blank=True, default="")
+    antenna_serial_number = models.CharField(max_length=128, blank=True, default="")
+    antenna_marker_une = gis_models.PointField(srid=0, dim=3, null=True, blank=True)
+    antenna_alignment = models.FloatField(null=True, blank=True)
+    antenna_installed = models.DateTimeField(null=True, blank=True)
+    antenna_removed = models.DateTimeField(null=True, blank=True)
+    antcal = EnumField(AntennaCalibrationMethod, null=True, blank=True)
+
+    frequency_standard = EnumField(
+        FrequencyStandardType, max_length=50, strict=False, null=True, blank=True
+    )
+
+    data_center = models.CharField(max_length=50, blank=True, default="")
+    secondary_data_center = models.CharField(max_length=50, blank=True, default="")
+
+    objects = StationSummaryManager.from_queryset(StationSummaryQuerySet)()
+
+    def __str__(self):
+        return (
+            f"{self.site.name} | {self.valid_range.lower or '-∞'} - "
+            f"{self.valid_range.upper or 'present'}"
+        )
+
+    class Meta:
+        verbose_name = _("Station Summary")
+        verbose_name_plural = _("Station Summaries")
+        ordering = ("site", "valid_range")
+        indexes = [
+            models.Index(fields=("site", "valid_range")),
+        ]
+        constraints = [
+            ExclusionConstraint(
+                name="no_overlapping_summaries_per_site",
+                expressions=[
+                    ("site", RangeOperators.EQUAL),
+                    ("valid_range", RangeOperators.OVERLAPS),
+                ],
+            )
+        ]
@@ -74,6 +74,14 @@ def site_upload_path(instance: "SiteFile", filename: str) -> str:
                         new_path = current_path.with_name(
                             f"{current_path.stem}_{archive.index.valid_range.lower.strftime('%H%M%S')}{current_path.suffix}"
                         )
+                        for encoding in archive.PRECOMPRESSED:
+                            sibling = archive.precompressed_path(encoding)
+                            if sibling.exists():
+                                sibling.rename(
+                                    new_path.with_name(
+                                        f"{new_path.name}{sibling.suffix}"
+                                    )
+                                )
                         archive.file.name = archive.file.name.replace(
                             current_path.name, new_path.name
                         )
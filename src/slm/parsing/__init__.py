@@ -1,8 +1,13 @@
+import codecs
+import io
+import mmap
+import os
 import re
 import typing as t
 from dataclasses import dataclass
 from datetime import date, datetime, timezone
 from functools import partial
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 from dateutil.parser import parse as parse_date
@@ -337,6 +342,99 @@ class BaseSection:
         return parameter
 
 
+def detect_encoding(sample: bytes) -> str:
+    """
+    Detect the encoding of a site log from a sample of its bytes. The site log
+    format has been around since the early 1990s so we may encounter exotic
+    encodings - anything that is not utf-8 (or ascii) is read as latin-1.
+
+    :param sample: The first bytes of the log
+    :return: The name of the encoding
+    """
+    try:
+        # the sample may end part way through a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return "latin-1"
+    return "utf-8"
+
+
+def _stream_lines(
+    source: t.IO[bytes], sample_size: int = 64 * 1024
+) -> t.Generator[str, None, None]:
+    """
+    Decode the lines of a binary stream as it is read, see :func:`read_lines`.
+    """
+    buffer = source.read(sample_size)
+    encoding = detect_encoding(buffer)
+
+    def decode(line: bytes) -> str:
+        try:
+            return line.decode(encoding)
+        except UnicodeDecodeError:
+            return line.decode("latin-1")
+
+    while chunk := source.read(io.DEFAULT_BUFFER_SIZE):
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        yield from map(decode, lines)
+    yield from map(decode, buffer.split(b"\n"))
+
+
+def read_lines(
+    source: Union[str, bytes, Path, t.IO[bytes]], sample_size: int = 64 * 1024
+) -> t.Generator[str, None, None]:
+    """
+    Iterate over the lines of a site log without reading it into memory. Files
+    on disk are memory mapped, other streams (e.g. decompressed archive files)
+    are read in chunks, and each line is decoded as it is read, using the
+    encoding detected from the first sample_size bytes. Lines that are
+    not valid in the detected encoding are decoded as latin-1.
+
+    Lines are split on newlines and do not include them, so the lines are the
+    same as ``contents.split("\\n")``.
+
+    :param source: The log contents, the path of the log file or an open
+        binary file
+    :param sample_size: The number of bytes to detect the encoding from
+    :yield: The lines of the log
+    """
+    if isinstance(source, str):
+        yield from source.split("\n")
+        return
+    if isinstance(source, Path):
+        with open(source, "rb") as file:
+            yield from read_lines(file, sample_size=sample_size)
+        return
+    if not isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        try:
+            fileno = source.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            # streams that are not backed by a file (e.g. decompressed
+            # contents) are decoded as they are read
+            yield from _stream_lines(source, sample_size=sample_size)
+            return
+        else:
+            if not os.fstat(fileno).st_size:
+                yield ""
+                return
+            with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+                yield from read_lines(mapped, sample_size=sample_size)
+            return
+
+    encoding = detect_encoding(source[:sample_size])
+    start, end = 0, len(source)
+    while True:
+        stop = source.find(b"\n", start)
+        line = source[start : end if stop < 0 else stop]
+        try:
+            yield line.decode(encoding)
+        except UnicodeDecodeError:
+            yield line.decode("latin-1")
+        if stop < 0:
+            return
+        start = stop + 1
+
+
 class BaseParser:
     """
     A base parser that tracks findings at specific lines.
@@ -436,10 +534,19 @@ class BaseParser:
             )
         self._findings_[finding.lineno] = finding
 
-    def __init__(self, site_log: Union[str, List[str]], site_name: str = None) -> None:
+    def __init__(
+        self, site_log: Union[str, t.Iterable[str]], site_name: str = None
+    ) -> None:
         """
-        :param site_log: The entire site log contents as a string or as a list
-            of lines
+        Parsers keep every line of the log in :attr:`lines` - parsers look
+        ahead and behind by line number and findings are reported against
+        the lines they were found on. An iterator over the lines (see
+        :func:`read_lines`) is copied into a list, so it avoids holding the
+        encoded and decoded contents alongside the lines but the log itself
+        is still held in memory.
+
+        :param site_log: The entire site log contents as a string, a list of
+            lines or an iterable over the lines
         :param site_name: The expected 9-character site name of this site or
             None (default) if name is unknown
         """
@@ -449,9 +556,13 @@ class BaseParser:
             self.lines = site_log.split("\n")
         elif isinstance(site_log, list):
             self.lines = site_log
+        elif isinstance(site_log, t.Iterable) and not isinstance(
+            site_log, (bytes, bytearray)
+        ):
+            self.lines = list(site_log)
         else:
             raise ValueError(
-                f"Expected site_log input to be string or list of lines, "
+                f"Expected site_log input to be string or lines, "
                 f"given: {type(site_log)}."
             )
 
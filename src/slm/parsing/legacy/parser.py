@@ -16,7 +16,7 @@ only on syntax.
 """
 
 import re
-from typing import List, Optional, Union
+from typing import Iterable, Optional, Union
 
 from slm.parsing import (
     BaseParameter,
@@ -169,12 +169,15 @@ class SiteLogParser(BaseParser):
     # last subheading observed and true if activated
     _sub_heading_: SubHeading = SubHeading("", False)
 
-    def __init__(self, site_log: Union[str, List[str]], site_name: str = None) -> None:
+    def __init__(
+        self, site_log: Union[str, Iterable[str]], site_name: str = None
+    ) -> None:
         """
         Parse the ASCII Site Log format into data structures.
 
-        :param site_log: The entire site log contents as a string or as a list
-            of lines
+        :param site_log: The entire site log contents as a string, a list of
+            lines or an iterable over the lines (see
+            :class:`~slm.parsing.BaseParser`)
         :param site_name: The expected 9-character site name of this site or
             None (default) if name is unknown
         """
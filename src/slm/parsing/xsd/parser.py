@@ -1,5 +1,5 @@
 from threading import Lock
-from typing import Dict, List, Union
+from typing import Dict, Iterable, Union
 
 from lxml import etree
 
@@ -51,15 +51,23 @@ class SiteLogParser(BaseParser):
     namespaces: Dict[str, str] = {"gco": None, "geo": None, "gmd": None, "gml": None}
     doc: etree.XML
 
-    def __init__(self, site_log: Union[str, List[str]], site_name: str = None) -> None:
+    def __init__(
+        self, site_log: Union[str, Iterable[str]], site_name: str = None
+    ) -> None:
         """
 
-        :param site_log:
+        :param site_log: The document as a string, a list of lines or an
+            iterable over the lines (see :class:`~slm.parsing.BaseParser`)
         :param site_name:
         """
         super().__init__(site_log=site_log, site_name=site_name)
         try:
-            self.doc = etree.fromstring("\n".join(self.lines).encode())
+            # feed the document to lxml line by line rather than joining the
+            # lines into another full copy of the document
+            parser = etree.XMLParser()
+            for lineno, line in enumerate(self.lines):
+                parser.feed(f"\n{line}".encode() if lineno else line.encode())
+            self.doc = parser.close()
 
             try:
                 self.xsd = GeodesyMLVersion(
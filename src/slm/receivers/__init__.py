@@ -13,8 +13,15 @@ def register():
             event_loggers,
             index,
             migration,
+            summary,
         )
 
         _registered = (
-            event_loggers and cleanup and index and alerts and migration and cache
+            event_loggers
+            and cleanup
+            and index
+            and alerts
+            and migration
+            and cache
+            and summary
         )
@@ -7,7 +7,7 @@ from django.dispatch import Signal, receiver
 from django.utils.module_loading import import_string
 
 from slm import signals as slm_signals
-from slm.models import Site
+from slm.models import Agency, DirtySite, Site
 
 logger = logging.getLogger(f"{__name__}")
 
@@ -72,6 +72,17 @@ for alert, config in getattr(settings, "SLM_AUTOMATED_ALERTS", {}).items():
         do_connect("rescind", rescind)
 
 
+def mark_dirty(alert):
+    """
+    Alerts on agencies affect the max alert level of all of their sites. We
+    record these sites as dirty rather than updating them all inline.
+    """
+    if isinstance(getattr(alert, "agency", None), Agency):
+        DirtySite.objects.mark(
+            *Site.objects.filter(agencies=alert.agency).values_list("pk", flat=True)
+        )
+
+
 @receiver(slm_signals.alert_issued)
 def send_alert_emails(sender, alert, **kwargs):
     if alert.send_email:
@@ -79,9 +90,11 @@ def send_alert_emails(sender, alert, **kwargs):
 
     if hasattr(alert, "site") and isinstance(alert.site, Site):
         Site.objects.filter(pk=alert.site.pk).update_alert_levels()
+    mark_dirty(alert)
 
 
 @receiver(slm_signals.alert_cleared)
 def handle_alert_cleared(sender, alert, **kwargs):
     if hasattr(alert, "site") and isinstance(alert.site, Site):
         Site.objects.filter(pk=alert.site.pk).update_alert_levels()
+    mark_dirty(alert)
@@ -34,7 +34,20 @@ def cleanup(file_path):
 @receiver(pre_delete, sender=SiteFile)
 @receiver(pre_delete, sender=GeodesyMLInvalid)
 def file_deleted(sender, instance, using, **kwargs):
-    if os.path.exists(instance.file.path):
+    if isinstance(instance, ArchivedSiteLog):
+        # archived files may share their contents with other archived files so
+        # they must be deleted through their storage
+        storage, name, path = (
+            instance.file.storage,
+            instance.file.name,
+            instance.file.path,
+        )
+        for encoding in instance.PRECOMPRESSED:
+            if (sibling := instance.precompressed_path(encoding)).exists():
+                transaction.on_commit(lambda sibling=sibling: cleanup(sibling))
+        if os.path.exists(path):
+            transaction.on_commit(lambda: (storage.delete(name), cleanup(path)))
+    elif os.path.exists(instance.file.path):
         transaction.on_commit(lambda: cleanup(instance.file.path))
     if hasattr(instance, "thumbnail") and instance.thumbnail:
         if os.path.exists(instance.thumbnail.path):
@@ -1,7 +1,25 @@
+from django.db.models.signals import pre_delete
 from django.dispatch import receiver
 
 from slm import signals as slm_signals
-from slm.defines import SiteLogStatus
+from slm.defines import SiteFileUploadStatus, SiteLogStatus
+from slm.models import Site
+
+
+# these must be connected before the receivers that render the site log again
+@receiver(slm_signals.site_published)
+@receiver(slm_signals.site_file_published)
+@receiver(slm_signals.site_file_unpublished)
+def invalidate_renders(sender, site, **kwargs):
+    from slm.api.serializers import SiteLogSerializer
+
+    SiteLogSerializer.invalidate(site)
+
+
+@receiver(slm_signals.site_file_deleted)
+def invalidate_renders_if_published_file_deleted(sender, site, upload, **kwargs):
+    if upload.status is SiteFileUploadStatus.PUBLISHED:
+        invalidate_renders(sender, site)
 
 
 @receiver(slm_signals.site_status_changed)
@@ -66,3 +84,17 @@ def log_file_deleted(sender, site, user, timestamp, request, upload, **kwargs):
         SLMFileType.ATTACHMENT,
     ]:
         ArchiveIndex.objects.regenerate(site, log_format=SiteLogFormat.GEODESY_ML)
+
+
+@receiver(pre_delete, sender=Site)
+def site_deleted(sender, instance, using, **kwargs):
+    """
+    The indexes of a deleted site are deleted with it by the cascade, record
+    their deletion in the change feed so mirrors remove the site's logs.
+    """
+    from slm.defines import ArchiveEvent
+    from slm.models import ArchiveChange
+
+    ArchiveChange.objects.using(using).record(
+        ArchiveEvent.DELETED, instance.indexes.using(using).all()
+    )
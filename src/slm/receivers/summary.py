@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.dispatch import receiver
+
+from slm import signals as slm_signals
+
+
+@receiver(slm_signals.site_published)
+def summarize_site(sender, site, timestamp=None, **kwargs):
+    """
+    Keep the station summary in sync with the published site log data. Only
+    publishing changes the published data, and bulk publishes rebuild the
+    summary of all of their sites at once.
+    """
+    from slm.models import Site, StationSummary
+
+    if not getattr(settings, "SLM_STATION_SUMMARY", False):
+        return
+    if timestamp and getattr(site, "_slm_summarized", None) == timestamp:
+        return
+    StationSummary.objects.rebuild(Site.objects.filter(pk=site.pk))
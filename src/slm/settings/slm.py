@@ -263,3 +263,73 @@ SLM_COORDINATE_MODE = CoordinateMode(
 SLM_IMMUTABLE_INDEX = env(
     "SLM_IMMUTABLE_INDEX", default=get_setting("SLM_IMMUTABLE_INDEX", True)
 )
+
+# if True, the public station list, the station map and SINEX generation will
+# read the current station facts from the materialized station summary table
+# instead of the normalized site log section tables. The summary is maintained
+# on publish and may be rebuilt with the build_summary command.
+SLM_STATION_SUMMARY = env(
+    "SLM_STATION_SUMMARY", default=get_setting("SLM_STATION_SUMMARY", False)
+)
+
+# the number of threads used to render the site log formats when a new index
+# is archived on publish. All formats are rendered from one snapshot of the
+# site log, if this is 1 they are rendered one after another.
+SLM_ARCHIVE_RENDER_WORKERS = env(
+    "SLM_ARCHIVE_RENDER_WORKERS",
+    int,
+    default=get_setting("SLM_ARCHIVE_RENDER_WORKERS", 1),
+)
+
+# if True, publishing a site log queues its archived site log files to be
+# rendered by the render_archives command instead of rendering them while the
+# moderator waits. Queued files are rendered on demand if they are requested
+# before the queue is drained.
+SLM_DEFERRED_ARCHIVE = env(
+    "SLM_DEFERRED_ARCHIVE", default=get_setting("SLM_DEFERRED_ARCHIVE", False)
+)
+
+# if True, archived site log files are stored once per distinct content. Each
+# archived file is a hard link to a blob named by the hash of its contents so
+# re-archiving identical site logs does not write any new data. Existing files
+# are left as they are.
+SLM_ARCHIVE_DEDUPLICATE = env(
+    "SLM_ARCHIVE_DEDUPLICATE", default=get_setting("SLM_ARCHIVE_DEDUPLICATE", False)
+)
+
+# compress deduplicated archive files at rest, may be None, "gzip" or "zstd".
+# zstd requires the zstandard package (pip install igs-slm[zstd]). Files are
+# decompressed transparently when they are read.
+SLM_ARCHIVE_COMPRESSION = env(
+    "SLM_ARCHIVE_COMPRESSION",
+    default=get_setting("SLM_ARCHIVE_COMPRESSION", None),
+)
+
+# the content codings ("br" and/or "gzip") to keep precompressed copies of
+# archived site log files in. The copies are written when files are archived
+# and are served to clients that accept them. Brotli requires the brotli
+# package (pip install igs-slm[brotli]).
+SLM_ARCHIVE_PRECOMPRESS = env(
+    "SLM_ARCHIVE_PRECOMPRESS",
+    list,
+    default=get_setting("SLM_ARCHIVE_PRECOMPRESS", []),
+)
+
+# the alias of the cache published site log renders are kept in, renders are
+# keyed by site, publication, format and attachments and are invalidated per
+# site when the site or its files are published. The default cache is cleared
+# whenever anything is published, so renders are only cached once a dedicated
+# cache alias is configured.
+SLM_RENDER_CACHE = env(
+    "SLM_RENDER_CACHE", str, default=get_setting("SLM_RENDER_CACHE", None)
+)
+
+# the number of seconds published site log renders are cached for, 0 disables
+# the render cache. Defaults to a day when SLM_RENDER_CACHE is set, otherwise 0
+SLM_RENDER_CACHE_TIMEOUT = env(
+    "SLM_RENDER_CACHE_TIMEOUT",
+    int,
+    default=get_setting(
+        "SLM_RENDER_CACHE_TIMEOUT", 60 * 60 * 24 if SLM_RENDER_CACHE else 0
+    ),
+)
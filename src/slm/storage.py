@@ -0,0 +1,298 @@
+"""
+File storage backends used by the SLM.
+"""
+
+import gzip
+import hashlib
+import io
+import os
+import tempfile
+import typing as t
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    A file system storage that keeps one copy of each distinct file. Contents
+    are written once to a blob named by their SHA-256 hash and every stored
+    file name is a hard link to its blob. Saving contents that are already
+    stored skips the write entirely. The link count of a blob is its
+    reference count - a blob is removed when the last name that links to it
+    is deleted.
+
+    Blobs may be compressed at rest with gzip or zstd (requires the zstandard
+    package). Compressed files are decompressed transparently as they are
+    read, so files written before compression was enabled (or before this
+    storage was used) can be read alongside compressed ones. The sizes of
+    compressed files are read from their compression metadata and the hash
+    of each blob is recorded in an extended attribute where the file system
+    supports them, so neither requires reading the contents.
+
+    Hard links require the blobs and file names to be on the same file
+    system, blobs are stored under ``BLOB_DIRECTORY`` in the storage location.
+    """
+
+    BLOB_DIRECTORY = Path("archive") / ".blobs"
+
+    GZIP_MAGIC = b"\x1f\x8b"
+    ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+    # the extended attribute blobs record the hash of their contents in
+    DIGEST_ATTRIBUTE = "user.slm.sha256"
+
+    compression: t.Optional[str] = None
+
+    def __init__(self, compression=None, **kwargs):
+        if compression not in {None, "gzip", "zstd"}:
+            raise ImproperlyConfigured(
+                f"Unsupported archive compression: {compression}, use gzip or zstd."
+            )
+        if compression == "zstd":
+            try:
+                import zstandard  # noqa: F401
+            except ImportError as err:
+                raise ImproperlyConfigured(
+                    "zstd compression requires the zstandard package."
+                ) from err
+        self.compression = compression
+        super().__init__(**kwargs)
+
+    def blob(self, digest: str) -> str:
+        """
+        The name of the blob for the given content hash.
+        """
+        return (self.BLOB_DIRECTORY / digest[:2] / digest).as_posix()
+
+    def compress(self, data: bytes) -> bytes:
+        if self.compression == "gzip":
+            return gzip.compress(data, mtime=0)
+        if self.compression == "zstd":
+            import zstandard
+
+            return zstandard.ZstdCompressor().compress(data)
+        return data
+
+    def decompressor(self, magic: bytes) -> t.Optional[t.Callable]:
+        """
+        Get a callable that wraps a binary file in a stream of its decompressed
+        contents, or None if the file is not compressed.
+
+        :param magic: The first bytes of the file
+        """
+        if magic.startswith(self.GZIP_MAGIC):
+            return lambda file: gzip.GzipFile(fileobj=file, mode="rb")
+        if magic.startswith(self.ZSTD_MAGIC):
+            import zstandard
+
+            return zstandard.ZstdDecompressor().stream_reader
+        return None
+
+    def decompressed_size(self, file) -> int:
+        """
+        The size of the decompressed contents of a blob, read from the
+        compression metadata without decompressing it. Gzip blobs record
+        their size in the trailer and zstd blobs in the frame header.
+
+        :param file: The open binary blob file, positioned at its start
+        :return: The size of the contents in bytes
+        """
+        header = file.read(18)
+        if header.startswith(self.GZIP_MAGIC):
+            file.seek(-4, os.SEEK_END)
+            return int.from_bytes(file.read(4), "little")
+        if header.startswith(self.ZSTD_MAGIC):
+            import zstandard
+
+            size = zstandard.frame_content_size(header)
+            if size >= 0:
+                return size
+            # the frame does not record its size, count the contents
+            file.seek(0)
+            size = 0
+            with zstandard.ZstdDecompressor().stream_reader(file) as stream:
+                while chunk := stream.read(io.DEFAULT_BUFFER_SIZE):
+                    size += len(chunk)
+            return size
+        return os.fstat(file.fileno()).st_size
+
+    def _save(self, name, content):
+        content.seek(0)
+        data = content.read()
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+
+        blob = self.path(self.blob(digest))
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            # write to a unique temporary name first so a partially written
+            # blob is never linked, threads storing the same contents each
+            # write their own copy and the last replace wins
+            fd, partial = tempfile.mkstemp(dir=os.path.dirname(blob), suffix=".partial")
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    file.write(self.compress(data))
+                os.chmod(partial, self.file_permissions_mode or 0o644)
+                try:
+                    os.setxattr(partial, self.DIGEST_ATTRIBUTE, digest.encode())
+                except (AttributeError, OSError):
+                    # extended attributes are not supported, deletes hash the
+                    # contents to find the blob instead
+                    pass
+                os.replace(partial, blob)
+            except BaseException:
+                if os.path.exists(partial):
+                    os.remove(partial)
+                raise
+
+        while True:
+            path = self.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.link(blob, path)
+            except FileExistsError:
+                name = self.get_available_name(name)
+            else:
+                break
+        return str(name).replace("\\", "/")
+
+    def _open(self, name, mode="rb"):
+        file = super()._open(name, mode)
+        if "r" not in mode or "+" in mode:
+            return file
+        magic = file.read(len(self.ZSTD_MAGIC))
+        file.seek(0)
+        decompressor = self.decompressor(magic)
+        if decompressor:
+            size = self.decompressed_size(file)
+            file.seek(0)
+            decompressed = File(
+                io.BufferedReader(DecompressedReader(file, size, decompressor)),
+                name=file.name,
+            )
+            decompressed.size = size
+            return decompressed
+        return file
+
+    def size(self, name):
+        with super()._open(name, "rb") as file:
+            return self.decompressed_size(file)
+
+    def digest(self, name) -> str:
+        """
+        The SHA-256 hash of a stored file's contents. This is read from the
+        blob's extended attributes when the file system supports them,
+        otherwise the contents are hashed as they are streamed.
+
+        :param name: The stored file name
+        :return: The hex digest of the contents
+        """
+        try:
+            return os.getxattr(self.path(name), self.DIGEST_ATTRIBUTE).decode()
+        except (AttributeError, OSError):
+            pass
+        sha256 = hashlib.sha256()
+        with self.open(name) as file:
+            while chunk := file.read(io.DEFAULT_BUFFER_SIZE):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def delete(self, name):
+        if not name:
+            raise ValueError("The name must be given to delete().")
+        path = self.path(name)
+        try:
+            links = os.stat(path).st_nlink
+        except FileNotFoundError:
+            return
+        blob = None
+        if links == 2:
+            # this is the last name that links to a blob, remove the blob too
+            blob = self.path(self.blob(self.digest(name)))
+            if not (os.path.exists(blob) and os.path.samefile(blob, path)):
+                blob = None
+        super().delete(name)
+        if blob and os.stat(blob).st_nlink == 1:
+            os.remove(blob)
+
+
+class DecompressedReader(io.RawIOBase):
+    """
+    A raw stream of the decompressed contents of a compressed blob. Contents
+    are decompressed as they are read, so they are never held in memory. The
+    size is known up front so seeking relative to the end (as FileResponse
+    does to set Content-Length) decompresses nothing. Seeking backwards
+    restarts decompression from the start of the blob.
+
+    :param file: The open binary blob file
+    :param size: The size of the decompressed contents
+    :param decompressor: A callable that wraps the blob file in a stream of
+        its decompressed contents
+    """
+
+    def __init__(self, file, size: int, decompressor: t.Callable):
+        self.file = file
+        self.size = size
+        self.decompressor = decompressor
+        self.stream = decompressor(file)
+        self.position = 0
+        self.offset = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self.position = offset
+        return offset
+
+    def readinto(self, buffer):
+        if self.position < self.offset:
+            self.file.seek(0)
+            self.stream = self.decompressor(self.file)
+            self.offset = 0
+        while self.offset < self.position:
+            skipped = self.stream.read(
+                min(self.position - self.offset, io.DEFAULT_BUFFER_SIZE)
+            )
+            if not skipped:
+                break
+            self.offset += len(skipped)
+        data = self.stream.read(len(buffer))
+        buffer[: len(data)] = data
+        self.offset += len(data)
+        self.position = self.offset
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self.file.close()
+        super().close()
+
+
+def archive_storage():
+    """
+    The storage for archived site log files. This is content addressed if
+    the SLM_ARCHIVE_DEDUPLICATE setting is enabled.
+    """
+    if getattr(settings, "SLM_ARCHIVE_DEDUPLICATE", False):
+        return ContentAddressedStorage(
+            compression=getattr(settings, "SLM_ARCHIVE_COMPRESSION", None)
+        )
+    return default_storage
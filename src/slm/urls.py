@@ -73,6 +73,7 @@ APIS = {
         ("download", public_views.SiteLogDownloadViewSet),
         ("files", public_views.SiteFileUploadViewSet),
         ("archive", public_views.ArchiveViewSet),
+        ("changes", public_views.ArchiveChangeViewSet),
         ("agency", public_views.AgencyViewSet),
         ("network", public_views.NetworkViewSet),
     ],
@@ -9,6 +9,8 @@ from django.conf import settings
 from django.contrib.gis.geos import Point
 from django.core import serializers
 from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from PIL import ExifTags, Image
 
 PROTOCOL = getattr(settings, "SLM_HTTP_PROTOCOL", None)
@@ -292,16 +294,71 @@ def http_accepts(accepted_types, mimetype):
     return False
 
 
+def accepted_encodings(accept_encoding: str) -> t.Dict[str, float]:
+    """
+    Parse an Accept-Encoding header into a mapping of content codings to
+    their quality values.
+
+    :param accept_encoding: The value of the Accept-Encoding header
+    :return: A dictionary mapping lower case content codings to quality values
+    """
+    accepted = {}
+    for coding in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in coding.split(";"))
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.lower()] = quality
+    return accepted
+
+
+def archived_file_response(request, archived, filename, as_attachment=False):
+    """
+    Build the response for a download of an archived site log file. If the
+    client accepts a content coding the file was precompressed in, the
+    precompressed variant is served with the matching Content-Encoding.
+
+    :param request: The download request
+    :param archived: The ArchivedSiteLog to serve
+    :param filename: The filename to serve the file under
+    :param as_attachment: Serve the file as an attachment
+    :return: A FileResponse, or a 304 response if the client's copy is current
+    """
+    file, encoding, etag = archived.variant(
+        accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    )
+    if not_modified := get_conditional_response(request, etag=etag):
+        file.close()
+        patch_vary_headers(not_modified, ["Accept-Encoding"])
+        return not_modified
+    response = FileResponse(file, filename=filename, as_attachment=as_attachment)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers["ETag"] = etag
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
 class SectionEncoder(json.JSONEncoder):
     def default(self, obj):
         from django.db.models import Manager, Model, QuerySet
 
-        from slm.models import Equipment, Manufacturer, SiteSection
+        from slm.models import Equipment, Manufacturer, Site, SiteSection
 
         if hasattr(obj, "isoformat"):
             return obj.isoformat()
         if isinstance(obj, SiteSection):
-            return {field: getattr(obj, field) for field in obj.site_log_fields()}
+            return {
+                field: getattr(obj, field)
+                for field in Site.section(type(obj)).site_log_fields
+            }
         if isinstance(obj, Equipment):
             return {field: getattr(obj, field) for field in ["model", "manufacturer"]}
         if isinstance(obj, Manufacturer):
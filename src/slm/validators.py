@@ -216,7 +216,7 @@ class TimeRangeBookendValidator(SLMValidator):
         super().__init__(*args, severity=severity, **kwargs)
 
     def __call__(self, instance, field, value):
-        sections = (
+        sections = list(
             getattr(
                 instance.site,
                 instance._meta.get_field("site").remote_field.get_accessor_name(),
@@ -224,6 +224,8 @@ class TimeRangeBookendValidator(SLMValidator):
             .head()
             .sort(reverse=True)
         )
+        if not sections:
+            return
         last = sections[0]
         for section in sections[1:]:
             # todo - this should be unnecessary when validation system is made
@@ -128,6 +128,7 @@ class StationContextView(SLMView):
         self.site = (
             Site.objects.filter(name__iexact=self.station)
             .editable_by(self.request.user)
+            .annotate_publish_flags(self.request.user)
             .first()
         )
         initial = None
@@ -165,13 +166,9 @@ class StationContextView(SLMView):
                 "station": self.station if self.station else None,
                 "site": self.site if self.site else None,
                 "agencies": self.agencies,
-                "is_moderator": (
-                    self.site.is_moderator(self.request.user) if self.site else None
-                ),
+                "is_moderator": self.site.is_moderator_ if self.site else None,
                 # some non-moderators may be able to publish a some changes
-                "can_publish": (
-                    self.site.can_publish(self.request.user) if self.site else None
-                ),
+                "can_publish": self.site.can_publish_ if self.site else None,
                 "is_publishable": self.site.is_publishable() if self.site else None,
                 "link_view": (
                     "slm:edit"
@@ -1,6 +1,9 @@
+import gzip
+from io import BytesIO
 from pathlib import Path
 from unittest import TestCase
 
+from slm.parsing import read_lines
 from slm.parsing.legacy.binding import SiteLogBinder
 from slm.parsing.legacy.parser import Error, SiteLogParser
 
@@ -44,3 +47,25 @@ class TestLegacyParser(TestCase):
         self.assertFalse(parsed.name_matched)
         self.assertEqual("AAA200USA", parsed.site_name)
         self.assertIsInstance(parsed.findings[0], Error)
+
+    def test_read_lines(self):
+        path = file_dir / "AAA200USA_20220909.log"
+        self.assertEqual(list(read_lines(path)), self.AAA200USA.split("\n"))
+        self.assertEqual(
+            list(read_lines(path.read_bytes())), self.AAA200USA.split("\n")
+        )
+        self.assertEqual(list(read_lines("caf\xe9".encode("latin-1"))), ["caf\xe9"])
+
+        # streams that are not backed by a file are read in chunks
+        with gzip.GzipFile(fileobj=BytesIO(gzip.compress(path.read_bytes()))) as gz:
+            self.assertEqual(list(read_lines(gz)), self.AAA200USA.split("\n"))
+        self.assertEqual(
+            list(read_lines(BytesIO(path.read_bytes()), sample_size=7)),
+            self.AAA200USA.split("\n"),
+        )
+        self.assertEqual(list(read_lines(BytesIO(b""))), [""])
+
+        streamed = SiteLogParser(read_lines(path), site_name="AAA200USA")
+        parsed = SiteLogParser(self.AAA200USA, site_name="AAA200USA")
+        self.assertEqual(streamed.lines, parsed.lines)
+        self.assertEqual(streamed.findings.keys(), parsed.findings.keys())
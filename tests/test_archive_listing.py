@@ -0,0 +1,178 @@
+"""
+Best format selection of archived site log listings. The stored is_best_format
+flags must select the same logs as ranking the formats in the query.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.postgres.fields.ranges import DateTimeTZRange
+from django.db.models import OuterRef, Subquery
+from django.test import TestCase
+
+from slm.defines import SiteLogFormat, SLMFileType
+from slm.models import ArchivedSiteLog, ArchiveIndex, Site
+
+FORMATS = [
+    SiteLogFormat.LEGACY,
+    SiteLogFormat.GEODESY_ML,
+    SiteLogFormat.ASCII_9CHAR,
+    SiteLogFormat.JSON,
+]
+
+
+def build_archive(sites, indexes):
+    """
+    Build an archive with a log of each format for each index. Two indexes
+    begin on each day so only the later of them should be listed.
+    """
+    begin = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    archives = []
+    for site in sites:
+        site_indexes = ArchiveIndex.objects.bulk_create(
+            [
+                ArchiveIndex(
+                    site=site,
+                    valid_range=DateTimeTZRange(
+                        begin + timedelta(hours=12 * idx),
+                        (begin + timedelta(hours=12 * (idx + 1)))
+                        if idx < indexes - 1
+                        else None,
+                    ),
+                )
+                for idx in range(indexes)
+            ]
+        )
+        archives.extend(
+            ArchivedSiteLog(
+                site=site,
+                index=index,
+                log_format=log_format,
+                file_type=SLMFileType.SITE_LOG,
+                name=f"{site.name}_{index.pk}.{log_format.ext}",
+                file=f"archive/{site.name}/{index.pk}.{log_format.ext}",
+            )
+            for index in site_indexes
+            for log_format in FORMATS
+        )
+    ArchivedSiteLog.objects.bulk_create(archives, batch_size=5000)
+    # bulk_create stamps the creation time, archived logs are stamped with the
+    # time their index begins
+    ArchivedSiteLog.objects.filter(site__in=sites).update(
+        timestamp=Subquery(
+            ArchiveIndex.objects.filter(pk=OuterRef("index")).values("begin")[:1]
+        )
+    )
+    ArchivedSiteLog.objects.filter(site__in=sites).flag_best_format()
+
+
+class TestArchiveListing(TestCase):
+    def test_best_format(self):
+        site = Site.objects.create(name="AAA200USA")
+        build_archive([site], 4)
+
+        ranked = set(ArchivedSiteLog.objects.best_format().values_list("pk", flat=True))
+        flagged = set(
+            ArchivedSiteLog.objects.filter(is_best_format=True).values_list(
+                "pk", flat=True
+            )
+        )
+        self.assertEqual(ranked, flagged)
+        self.assertEqual(len(flagged), 2)
+
+        # deleting the best log of a day promotes the next best
+        best = ArchivedSiteLog.objects.filter(is_best_format=True).first()
+        best.delete()
+        self.assertEqual(
+            set(ArchivedSiteLog.objects.best_format().values_list("pk", flat=True)),
+            set(
+                ArchivedSiteLog.objects.filter(is_best_format=True).values_list(
+                    "pk", flat=True
+                )
+            ),
+        )
+
+        listed = ArchivedSiteLog.objects.listing(best_format=True, non_current=True)
+        self.assertTrue(all(log.is_best_format for log in listed))
+        self.assertFalse(any(log.index.end is None for log in listed))
+
+    def test_delete_flags(self):
+        site = Site.objects.create(name="AAA200USA")
+        build_archive([site], 4)
+
+        def assert_flags():
+            self.assertEqual(
+                set(ArchivedSiteLog.objects.best_format().values_list("pk", flat=True)),
+                set(
+                    ArchivedSiteLog.objects.filter(is_best_format=True).values_list(
+                        "pk", flat=True
+                    )
+                ),
+            )
+
+        # deleting the best logs of every day promotes the next best at once
+        ArchivedSiteLog.objects.filter(is_best_format=True).delete()
+        assert_flags()
+        self.assertEqual(ArchivedSiteLog.objects.filter(is_best_format=True).count(), 2)
+
+        # pruning the later index of a day flags the logs of the earlier one
+        later, earlier = ArchiveIndex.objects.filter(site=site).most_recent_first()[:2]
+        ArchiveIndex.objects.filter(pk=later.pk).prune()
+        assert_flags()
+        self.assertTrue(
+            ArchivedSiteLog.objects.filter(is_best_format=True, index=earlier).exists()
+        )
+        self.assertEqual(ArchivedSiteLog.objects.filter(is_best_format=True).count(), 2)
+
+    def test_non_current(self):
+        sites = Site.objects.bulk_create(
+            [Site(name=f"S{idx:03}00USA") for idx in range(3)]
+        )
+        build_archive(sites, 6)
+
+        ranked = set(
+            ArchivedSiteLog.objects.filter(
+                pk__in=ArchivedSiteLog.objects.best_format(),
+                index__valid_range__upper_inf=False,
+            ).values_list("pk", flat=True)
+        )
+        flagged = set(
+            ArchivedSiteLog.objects.filter(
+                index__valid_range__upper_inf=False, is_best_format=True
+            ).values_list("pk", flat=True)
+        )
+        self.assertEqual(ranked, flagged)
+        # the current index shares its day with the index before it
+        self.assertEqual(len(flagged), 3 * 2)
+
+    def test_modified_since(self):
+        site = Site.objects.create(name="AAA200USA")
+        build_archive([site], 4)
+        synced = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        ArchivedSiteLog.objects.update(written=synced)
+        synchronized = ArchivedSiteLog.objects.last_modified()
+        self.assertEqual(synchronized, synced)
+        self.assertFalse(
+            ArchivedSiteLog.objects.modified_since(
+                synchronized + timedelta(seconds=1)
+            ).exists()
+        )
+
+        # a file rendered again under an index that began long before the last
+        # synchronization is modified since then
+        index = ArchiveIndex.objects.filter(site=site).oldest_first().first()
+        ArchivedSiteLog.objects.filter(
+            index=index, log_format=SiteLogFormat.GEODESY_ML
+        ).delete()
+        rendered = ArchivedSiteLog.objects.archived(
+            index, SiteLogFormat.GEODESY_ML, "<xml/>"
+        )
+        rendered.save()
+        self.assertEqual(
+            list(
+                ArchivedSiteLog.objects.modified_since(
+                    synchronized + timedelta(seconds=1)
+                ).values_list("pk", flat=True)
+            ),
+            [rendered.pk],
+        )
+        self.assertGreater(ArchivedSiteLog.objects.last_modified(), synchronized)
@@ -0,0 +1,126 @@
+"""
+Deleting archive indexes must repair the ranges of the indexes that remain.
+The index that immediately precedes a run of adjacent deleted indexes is
+extended over them, gaps between indexes are never closed.
+"""
+
+from datetime import datetime, timezone
+
+from django.contrib.postgres.fields.ranges import DateTimeTZRange
+from django.test import TestCase
+
+from slm.defines import ArchiveEvent, SiteLogStatus
+from slm.models import ArchiveChange, ArchiveIndex, Site, SiteForm
+
+
+def epoch(year):
+    return datetime(2000 + year, 1, 1, tzinfo=timezone.utc)
+
+
+class TestArchivePrune(TestCase):
+    site = None
+
+    def setUp(self):
+        self.site = Site.objects.create(name="AAA200USA")
+        super().setUp()
+
+    def build(self, *ranges):
+        """
+        Create an index for each (begin, end) pair of years from 2000, an end
+        of None is open.
+        """
+        return ArchiveIndex.objects.bulk_create(
+            [
+                ArchiveIndex(
+                    site=self.site,
+                    valid_range=DateTimeTZRange(
+                        epoch(begin), epoch(end) if end is not None else None
+                    ),
+                )
+                for begin, end in ranges
+            ]
+        )
+
+    def ranges(self):
+        return [
+            (
+                index.valid_range.lower.year - 2000,
+                index.valid_range.upper.year - 2000
+                if index.valid_range.upper
+                else None,
+            )
+            for index in ArchiveIndex.objects.filter(site=self.site).oldest_first()
+        ]
+
+    def prune(self, *indexes, batch_size=500):
+        return ArchiveIndex.objects.filter(
+            pk__in=[index.pk for index in indexes]
+        ).prune(batch_size=batch_size)
+
+    def test_middle(self):
+        indexes = self.build((0, 1), (1, 2), (2, None))
+        self.prune(indexes[1])
+        self.assertEqual(self.ranges(), [(0, 2), (2, None)])
+
+    def test_run(self):
+        indexes = self.build((0, 1), (1, 2), (2, 3), (3, 4), (4, None))
+        self.prune(*indexes[1:4])
+        self.assertEqual(self.ranges(), [(0, 4), (4, None)])
+
+    def test_run_split_by_batches(self):
+        indexes = self.build((0, 1), (1, 2), (2, 3), (3, 4), (4, None))
+        batches = []
+        total, _ = ArchiveIndex.objects.filter(
+            pk__in=[index.pk for index in indexes[1:4]]
+        ).prune(batch_size=2, progress=batches.append)
+        self.assertEqual(batches, [2, 1])
+        self.assertEqual(total, 3)
+        self.assertEqual(self.ranges(), [(0, 4), (4, None)])
+
+    def test_current(self):
+        SiteForm.objects.create(site=self.site, published=True, report_type="NEW")
+        Site.objects.filter(pk=self.site.pk).update(
+            status=SiteLogStatus.PUBLISHED, last_publish=epoch(2)
+        )
+        indexes = self.build((0, 1), (1, 2), (2, None))
+        self.prune(indexes[2])
+        self.assertEqual(self.ranges(), [(0, 1), (1, None)])
+
+        # the site's published log is no longer archived
+        self.assertEqual(
+            Site.objects.get(pk=self.site.pk).status, SiteLogStatus.UPDATED
+        )
+        self.assertTrue(
+            SiteForm.objects.filter(site=self.site, published=False).exists()
+        )
+
+    def test_leading(self):
+        indexes = self.build((0, 1), (1, 2), (2, None))
+        self.prune(indexes[0])
+        self.assertEqual(self.ranges(), [(1, 2), (2, None)])
+
+    def test_gaps(self):
+        indexes = self.build((0, 1), (1, 2), (2, 3), (4, 5), (5, None))
+
+        # the first index is extended up to the gap, the deleted index after
+        # the gap has no adjacent predecessor and its range is left uncovered
+        self.prune(*indexes[1:4])
+        self.assertEqual(self.ranges(), [(0, 3), (5, None)])
+
+    def test_site_deleted(self):
+        indexes = self.build((0, 1), (1, None))
+        self.prune(indexes[0])
+        Site.objects.filter(pk=self.site.pk).delete()
+        self.assertFalse(ArchiveIndex.objects.filter(site_id=self.site.pk).exists())
+
+        # the site's feed history outlives it and records the cascaded deletes
+        self.assertEqual(
+            list(
+                ArchiveChange.objects.filter(
+                    site_id=self.site.pk, event=ArchiveEvent.DELETED
+                )
+                .order_by("pk")
+                .values_list("index_id", "site_name")
+            ),
+            [(indexes[0].pk, "AAA200USA"), (indexes[1].pk, "AAA200USA")],
+        )
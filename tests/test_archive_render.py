@@ -0,0 +1,164 @@
+"""
+Deferred rendering of archived site log files. Queued files must be rendered
+from the publication their index points to, or not at all.
+"""
+
+from datetime import datetime, timezone
+
+from django.test import TestCase, override_settings
+
+from slm.defines import EquipmentState, SiteLogFormat
+from slm.models import (
+    ArchivedSiteLog,
+    ArchiveIndex,
+    ArchiveRenderJob,
+    Receiver,
+    Site,
+    SiteReceiver,
+)
+
+FORMATS = [SiteLogFormat.LEGACY, SiteLogFormat.ASCII_9CHAR, SiteLogFormat.GEODESY_ML]
+
+
+class TestArchiveRender(TestCase):
+    site = None
+    index = None
+
+    def setUp(self):
+        self.site = Site.objects.create(
+            name="AAA200USA", last_publish=datetime(2020, 1, 1, tzinfo=timezone.utc)
+        )
+        SiteReceiver.objects.create(
+            site=self.site,
+            receiver_type=Receiver.objects.create(
+                model="JAVAD TRE_3 DELTA", state=EquipmentState.ACTIVE
+            ),
+            serial_number="1",
+            installed=datetime(2000, 1, 1, tzinfo=timezone.utc),
+            published=True,
+        )
+        self.index = ArchiveIndex.objects.create(
+            site=self.site, begin=self.site.last_publish, end=None
+        )
+        super().setUp()
+
+    def supersede(self):
+        """Index a later publication of the site."""
+        return ArchiveIndex.objects.create(
+            site=self.site, begin=datetime(2021, 1, 1, tzinfo=timezone.utc), end=None
+        )
+
+    def test_drain(self):
+        ArchiveRenderJob.objects.enqueue(
+            self.index, [SiteLogFormat.LEGACY, SiteLogFormat.ASCII_9CHAR]
+        )
+        self.assertEqual(self.index.render_jobs.count(), 2)
+
+        drained = list(ArchiveRenderJob.objects.drain())
+        self.assertEqual(len(drained), 1)
+        self.assertEqual(drained[0][0], self.index)
+        self.assertCountEqual(
+            drained[0][1], [SiteLogFormat.LEGACY, SiteLogFormat.ASCII_9CHAR]
+        )
+        self.assertFalse(ArchiveRenderJob.objects.exists())
+        self.assertCountEqual(
+            self.index.files.values_list("log_format", flat=True),
+            [SiteLogFormat.LEGACY, SiteLogFormat.ASCII_9CHAR],
+        )
+
+    def test_drain_retries(self):
+        # JSON is not rendered so its job fails every attempt
+        ArchiveRenderJob.objects.enqueue(self.index, [SiteLogFormat.JSON])
+
+        self.assertEqual(len(list(ArchiveRenderJob.objects.drain(max_attempts=2))), 2)
+        job = ArchiveRenderJob.objects.get()
+        self.assertEqual(job.attempts, 2)
+        self.assertTrue(job.error)
+
+        # failed jobs are left in the queue
+        self.assertEqual(list(ArchiveRenderJob.objects.drain(max_attempts=2)), [])
+        self.assertFalse(self.index.files.exists())
+
+    def test_drain_superseded(self):
+        ArchiveRenderJob.objects.enqueue(self.index, [SiteLogFormat.LEGACY])
+        self.supersede()
+        self.assertIsNotNone(ArchiveIndex.objects.get(pk=self.index.pk).end)
+
+        self.assertEqual(len(list(ArchiveRenderJob.objects.drain())), 1)
+        self.assertFalse(ArchiveRenderJob.objects.exists())
+        self.assertFalse(self.index.files.exists())
+
+    def test_flush(self):
+        ArchiveRenderJob.objects.enqueue(
+            self.index, [SiteLogFormat.LEGACY, SiteLogFormat.GEODESY_ML]
+        )
+        ArchiveRenderJob.objects.flush([self.site])
+        self.assertFalse(ArchiveRenderJob.objects.exists())
+        self.assertCountEqual(
+            self.index.files.values_list("log_format", flat=True),
+            [SiteLogFormat.LEGACY, SiteLogFormat.GEODESY_ML],
+        )
+
+    def test_publish_flushes(self):
+        ArchiveRenderJob.objects.enqueue(self.index, [SiteLogFormat.LEGACY])
+        Site.objects.get(pk=self.site.pk).publish(silent=True)
+        self.assertFalse(ArchiveRenderJob.objects.exists())
+        self.assertTrue(
+            self.index.files.filter(log_format=SiteLogFormat.LEGACY).exists()
+        )
+
+    def test_from_index_on_demand(self):
+        ArchiveRenderJob.objects.enqueue(self.index, [SiteLogFormat.LEGACY])
+        index = ArchiveIndex.objects.get(pk=self.index.pk)
+        archived = ArchivedSiteLog.objects.from_index(
+            index, SiteLogFormat.LEGACY, generate=False
+        )
+        self.assertIsNotNone(archived)
+        self.assertEqual(archived.index, index)
+        self.assertFalse(ArchiveRenderJob.objects.exists())
+
+    def test_from_index_superseded(self):
+        ArchiveRenderJob.objects.enqueue(self.index, [SiteLogFormat.LEGACY])
+        self.supersede()
+        index = ArchiveIndex.objects.get(pk=self.index.pk)
+
+        # the site's current state is not the publication of this index
+        self.assertIsNone(
+            ArchivedSiteLog.objects.from_index(
+                index, SiteLogFormat.LEGACY, generate=False
+            )
+        )
+        self.assertFalse(index.files.exists())
+
+    @override_settings(SLM_RENDER_CACHE_TIMEOUT=0)
+    def test_from_snapshot(self):
+        rendered = {
+            archived.log_format: archived.contents
+            for archived in ArchivedSiteLog.objects.from_snapshot(
+                self.index, formats=FORMATS, workers=1
+            )
+        }
+        self.assertIn("JAVAD TRE_3 DELTA", rendered[SiteLogFormat.LEGACY])
+
+        # formats rendered on several threads are identical
+        self.index.files.all().delete()
+        self.assertEqual(
+            {
+                archived.log_format: archived.contents
+                for archived in ArchivedSiteLog.objects.from_snapshot(
+                    self.index, formats=FORMATS, workers=len(FORMATS)
+                )
+            },
+            rendered,
+        )
+
+        # and identical to the files rendered one format at a time
+        index = ArchiveIndex.objects.get(pk=self.index.pk)
+        for log_format in FORMATS:
+            with self.subTest(log_format=log_format):
+                self.assertEqual(
+                    ArchivedSiteLog.objects.from_index(
+                        index, log_format, regenerate=True
+                    ).contents,
+                    rendered[log_format],
+                )
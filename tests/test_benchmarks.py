@@ -0,0 +1,179 @@
+"""
+Opt-in benchmarks. These seed large datasets, so they are skipped unless the
+SLM_BENCHMARK environment variable is set. Query plans and timings are logged
+to the slm.benchmarks logger, to see them run:
+
+    SLM_BENCHMARK=1 pytest tests/test_benchmarks.py -o log_cli=true \
+        --log-cli-level=INFO
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from timeit import default_timer
+from unittest import skipUnless
+
+from django.db.models import Q
+from django.test import TestCase
+
+from slm.defines import EquipmentState
+from slm.models import ArchivedSiteLog, Receiver, Site, SiteReceiver
+from tests.test_archive_listing import build_archive
+
+logger = logging.getLogger("slm.benchmarks")
+
+
+@skipUnless(os.environ.get("SLM_BENCHMARK"), "set SLM_BENCHMARK=1 to run")
+class TestSectionReadBenchmarks(TestCase):
+    """
+    HEAD and published reads of 20k receivers over 1000 sites, one in ten of
+    which has an unpublished edit.
+    """
+
+    SITES = 1000
+    RECEIVERS = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        receiver = Receiver.objects.create(
+            model="JAVAD TRE_3 DELTA", state=EquipmentState.ACTIVE
+        )
+        sites = Site.objects.bulk_create(
+            [Site(name=f"S{idx:03}00USA") for idx in range(cls.SITES)]
+        )
+        begin = datetime(2000, 1, 1, tzinfo=timezone.utc)
+        rows = []
+        for site in sites:
+            for idx in range(cls.RECEIVERS):
+                rows.append(
+                    SiteReceiver(
+                        site=site,
+                        subsection=idx,
+                        published=True,
+                        receiver_type=receiver,
+                        serial_number=str(idx),
+                        installed=begin + timedelta(days=100 * idx),
+                    )
+                )
+                if idx % 10 == 0:
+                    rows.append(
+                        SiteReceiver(
+                            site=site,
+                            subsection=idx,
+                            published=False,
+                            receiver_type=receiver,
+                            serial_number=f"{idx} edited",
+                            installed=begin + timedelta(days=100 * idx),
+                        )
+                    )
+        SiteReceiver.objects.bulk_create(rows, batch_size=5000)
+
+    def explain(self, name, qry):
+        logger.info("%s:\n%s", name, qry.explain(analyze=True))
+
+    def test_head(self):
+        """
+        Compare the HEAD anti-join to the DISTINCT ON read it replaced.
+        """
+        head = SiteReceiver.objects.head()
+        distinct_on = (
+            SiteReceiver.objects.filter(Q(is_deleted=False))
+            .order_by("site", "subsection", "published")
+            .distinct("site", "subsection")
+        )
+        self.assertEqual(
+            set(head.values_list("pk", flat=True)),
+            set(distinct_on.values_list("pk", flat=True)),
+        )
+        self.assertEqual(head.count(), self.SITES * self.RECEIVERS)
+        self.explain("head() before: DISTINCT ON", distinct_on)
+        self.explain("head() after: NOT EXISTS", head)
+
+    def test_published(self):
+        """
+        Published reads were already plain filters, their plan is logged for
+        comparison with head().
+        """
+        published = SiteReceiver.objects.published()
+        self.assertEqual(published.count(), self.SITES * self.RECEIVERS)
+        self.assertNotIn("DISTINCT", str(published.query))
+        self.explain("published()", published)
+
+
+@skipUnless(os.environ.get("SLM_BENCHMARK"), "set SLM_BENCHMARK=1 to run")
+class TestInstantiationBenchmarks(TestCase):
+    def test_instantiation(self):
+        """
+        Instantiation cost of 10k SiteReceiver rows with and without change
+        tracking.
+        """
+        site = Site.objects.create(name="AAA200USA")
+        receiver = SiteReceiver.objects.create(
+            site=site,
+            receiver_type=Receiver.objects.create(
+                model="JAVAD TRE_3 DELTA", state=EquipmentState.ACTIVE
+            ),
+            serial_number="0",
+            installed=datetime(2000, 1, 1, tzinfo=timezone.utc),
+        )
+        fields = [field.attname for field in SiteReceiver._meta.concrete_fields]
+        row = SiteReceiver.objects.filter(pk=receiver.pk).values_list(*fields)[0]
+
+        start = default_timer()
+        untracked = [SiteReceiver.from_db("default", fields, row) for _ in range(10000)]
+        untracked_time = default_timer() - start
+
+        start = default_timer()
+        tracked = [
+            SiteReceiver.from_db("default", fields, row).track_changes()
+            for _ in range(10000)
+        ]
+        tracked_time = default_timer() - start
+
+        self.assertNotIn("_init_values_", untracked[0].__dict__)
+        self.assertEqual(tracked[0].get_initial_value("serial_number"), "0")
+        logger.info(
+            "10k SiteReceivers: %.3fs untracked, %.3fs tracked",
+            untracked_time,
+            tracked_time,
+        )
+
+
+@skipUnless(os.environ.get("SLM_BENCHMARK"), "set SLM_BENCHMARK=1 to run")
+class TestArchiveListingBenchmarks(TestCase):
+    def test_best_format(self):
+        """
+        Compare the stored best format flags to ranking the formats in the
+        query on a 100k file archive.
+        """
+        build_archive(
+            Site.objects.bulk_create(
+                [Site(name=f"S{idx:03}00USA") for idx in range(100)]
+            ),
+            250,
+        )
+        self.assertEqual(ArchivedSiteLog.objects.count(), 100000)
+
+        start = default_timer()
+        ranked = set(
+            ArchivedSiteLog.objects.filter(
+                pk__in=ArchivedSiteLog.objects.best_format(),
+                index__valid_range__upper_inf=False,
+            ).values_list("pk", flat=True)
+        )
+        window = default_timer() - start
+
+        start = default_timer()
+        flagged = set(
+            ArchivedSiteLog.objects.filter(
+                index__valid_range__upper_inf=False, is_best_format=True
+            ).values_list("pk", flat=True)
+        )
+        stored = default_timer() - start
+
+        self.assertEqual(ranked, flagged)
+        logger.info(
+            "best format of 100k archived logs: %.3fs ranked, %.3fs stored",
+            window,
+            stored,
+        )
@@ -0,0 +1,234 @@
+"""
+Bulk publication of site logs. Publishing the HEAD of a site must flip its
+edits to published, delete the rows they supersede or that were marked for
+deletion and prepare the site form, all with set based statements.
+"""
+
+from datetime import datetime, timezone
+
+from django.contrib.postgres.fields.ranges import DateTimeTZRange
+from django.test import TestCase, override_settings
+
+from slm import signals as slm_signals
+from slm.defines import EquipmentState, SiteLogStatus
+from slm.models import (
+    ArchiveIndex,
+    Receiver,
+    Site,
+    SiteForm,
+    SiteIdentification,
+    SiteLocation,
+    SiteReceiver,
+)
+from slm.models.sitelog import utc_now_date
+
+
+def epoch(year):
+    return datetime(year, 1, 1, tzinfo=timezone.utc)
+
+
+@override_settings(
+    SLM_DEFERRED_ARCHIVE=True,
+    SLM_REQUIRED_SECTIONS_TO_PUBLISH=[
+        "siteform",
+        "siteidentification",
+        "sitelocation",
+        "sitereceiver",
+    ],
+)
+class TestPublish(TestCase):
+    site = None
+    receivers = None
+    index = None
+
+    def setUp(self):
+        self.site = Site.objects.create(name="AAA200USA")
+        SiteForm.objects.create(site=self.site, published=True, report_type="NEW")
+        SiteIdentification.objects.create(
+            site=self.site, published=True, iers_domes_number="10000M001"
+        )
+        receiver = Receiver.objects.create(
+            model="JAVAD TRE_3 DELTA", state=EquipmentState.ACTIVE
+        )
+        self.receivers = [
+            SiteReceiver.objects.create(
+                site=self.site,
+                receiver_type=receiver,
+                serial_number=str(idx),
+                installed=epoch(2000 + idx),
+            )
+            for idx in range(3)
+        ]
+        SiteReceiver.objects.filter(site=self.site).update(published=True)
+        self.index = ArchiveIndex.objects.create(
+            site=self.site, valid_range=DateTimeTZRange(epoch(2000), None)
+        )
+        Site.objects.filter(pk=self.site.pk).update(
+            status=SiteLogStatus.UPDATED, last_publish=epoch(2000)
+        )
+
+        # edit the identification, add a location, edit the first receiver,
+        # delete the second and add a fourth
+        SiteIdentification.objects.create(
+            site=self.site, published=False, iers_domes_number="10000M002"
+        )
+        SiteLocation.objects.create(site=self.site, published=False, city="Boulder")
+        edit = SiteReceiver.objects.get(pk=self.receivers[0].pk)
+        edit.pk = None
+        edit.published = False
+        edit.serial_number = "edited"
+        edit.save()
+        SiteReceiver.objects.filter(pk=self.receivers[1].pk).update(is_deleted=True)
+        SiteReceiver.objects.create(
+            site=self.site,
+            receiver_type=receiver,
+            serial_number="3",
+            installed=epoch(2003),
+        )
+        super().setUp()
+
+    def capture(self, signal):
+        sent = []
+
+        def handler(**kwargs):
+            sent.append(kwargs)
+
+        signal.connect(handler)
+        self.addCleanup(signal.disconnect, handler)
+        return sent
+
+    def assertPublishedReceivers(self):
+        self.assertEqual(
+            [rcv.serial_number for rcv in self.site.sitereceiver_set.published()],
+            ["edited", "2", "3"],
+        )
+        self.assertFalse(
+            SiteReceiver.objects.filter(site=self.site).head_edits().exists()
+        )
+
+    def test_publish(self):
+        published = self.capture(slm_signals.site_published)
+        status_changed = self.capture(slm_signals.site_status_changed)
+        timestamp = datetime(2010, 1, 1, tzinfo=timezone.utc)
+        self.assertEqual(
+            Site.objects.filter(pk=self.site.pk).publish(timestamp=timestamp),
+            {self.site: 6},
+        )
+
+        self.assertPublishedReceivers()
+        self.assertEqual(
+            list(
+                SiteIdentification.objects.filter(site=self.site).values_list(
+                    "iers_domes_number", "published"
+                )
+            ),
+            [("10000M002", True)],
+        )
+        self.assertEqual(
+            list(
+                SiteLocation.objects.filter(site=self.site).values_list(
+                    "city", "published"
+                )
+            ),
+            [("Boulder", True)],
+        )
+
+        form = SiteForm.objects.get(site=self.site)
+        self.assertTrue(form.published)
+        self.assertEqual(form.report_type, "UPDATE")
+        self.assertEqual(form.previous, self.index)
+        self.assertEqual(form.date_prepared, utc_now_date())
+        prefix = f"{SiteReceiver.section_number()}"
+        if SiteReceiver.subsection_number():
+            prefix += f".{SiteReceiver.subsection_number()}"
+        self.assertEqual(
+            form.modified_section.split(", "),
+            [
+                str(SiteIdentification.section_number()),
+                str(SiteLocation.section_number()),
+                f"{prefix}.1",
+                f"{prefix}.3",
+            ],
+        )
+
+        site = Site.objects.get(pk=self.site.pk)
+        self.assertEqual(site.status, SiteLogStatus.PUBLISHED)
+        self.assertEqual(site.last_publish, timestamp)
+        self.assertFalse(Site.objects.filter(pk=self.site.pk).needs_publish())
+
+        self.assertEqual(len(published), 1)
+        self.assertEqual(published[0]["site"], self.site)
+        self.assertEqual(published[0]["timestamp"], timestamp)
+        self.assertEqual(len(status_changed), 1)
+        self.assertEqual(status_changed[0]["previous_status"], SiteLogStatus.UPDATED)
+        self.assertEqual(status_changed[0]["new_status"], SiteLogStatus.PUBLISHED)
+
+        # there is nothing left to publish
+        self.assertEqual(Site.objects.filter(pk=self.site.pk).publish(), {})
+        self.assertEqual(len(published), 1)
+
+    def test_publish_silent(self):
+        published = self.capture(slm_signals.site_published)
+        status_changed = self.capture(slm_signals.site_status_changed)
+        Site.objects.filter(pk=self.site.pk).publish(silent=True)
+        self.assertPublishedReceivers()
+        self.assertFalse(published)
+        self.assertEqual(len(status_changed), 1)
+
+    def test_section_publish_head(self):
+        self.assertEqual(
+            SiteIdentification.objects.filter(site=self.site).publish_head(),
+            {self.site.pk: 1},
+        )
+        self.assertEqual(
+            list(
+                SiteIdentification.objects.filter(site=self.site).values_list(
+                    "iers_domes_number", "published"
+                )
+            ),
+            [("10000M002", True)],
+        )
+
+        # a new section has no published row to replace
+        self.assertEqual(
+            SiteLocation.objects.filter(site=self.site).publish_head(),
+            {self.site.pk: 1},
+        )
+        self.assertTrue(SiteLocation.objects.get(site=self.site).published)
+
+        # nothing is left to publish
+        self.assertEqual(
+            SiteIdentification.objects.filter(site=self.site).publish_head(), {}
+        )
+        self.assertEqual(SiteIdentification.objects.filter(site=self.site).count(), 1)
+
+    def test_subsection_publish_head(self):
+        # the edit, the deletion and the addition are three subsections
+        self.assertEqual(
+            SiteReceiver.objects.filter(site=self.site).publish_head(),
+            {self.site.pk: 3},
+        )
+        self.assertPublishedReceivers()
+        self.assertEqual(SiteReceiver.objects.filter(site=self.site).count(), 3)
+        self.assertEqual(SiteReceiver.objects.filter(site=self.site).publish_head(), {})
+
+    def test_form_publish_head(self):
+        SiteForm.objects.create(site=self.site, published=False, report_type="NEW")
+        self.assertEqual(
+            SiteForm.objects.filter(site=self.site).publish_head(),
+            {self.site.pk: 1},
+        )
+        form = SiteForm.objects.get(site=self.site)
+        self.assertTrue(form.published)
+        self.assertEqual(form.report_type, "UPDATE")
+        self.assertEqual(form.previous, self.index)
+        self.assertEqual(form.date_prepared, utc_now_date())
+
+        # the first log of a site has no previous log and remains a new report
+        site = Site.objects.create(name="BBB200USA")
+        SiteForm.objects.create(site=site, published=False, report_type="NEW")
+        SiteForm.objects.filter(site=site).publish_head()
+        form = SiteForm.objects.get(site=site)
+        self.assertTrue(form.published)
+        self.assertIsNone(form.previous)
+        self.assertEqual(form.report_type, "NEW")
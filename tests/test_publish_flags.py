@@ -0,0 +1,79 @@
+"""
+The publish flags annotated onto editor station lists must agree with the
+flags computed one site at a time.
+"""
+
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.test import TestCase, override_settings
+
+from slm.defines import EquipmentState, SiteLogStatus
+from slm.models import Agency, Receiver, Site, SiteReceiver
+
+
+@override_settings(SLM_REQUIRED_SECTIONS_TO_PUBLISH=["sitereceiver"])
+class TestPublishFlags(TestCase):
+    users = None
+
+    def setUp(self):
+        agency = Agency.objects.create(name="Test Agency 1")
+        other_agency = Agency.objects.create(name="Test Agency 2")
+        receiver = Receiver.objects.create(
+            model="JAVAD TRE_3 DELTA", state=EquipmentState.ACTIVE
+        )
+        moderate = Permission.objects.get(codename="moderate_sites")
+
+        def user(name, agencies, moderator=False, superuser=False):
+            create = (
+                get_user_model().objects.create_superuser
+                if superuser
+                else get_user_model().objects.create_user
+            )
+            usr = create(
+                email=f"{name}@example.com",
+                password="password",
+                first_name="Test",
+                last_name=name,
+            )
+            usr.agencies.add(*agencies)
+            if moderator:
+                usr.user_permissions.add(moderate)
+            return usr
+
+        self.users = [
+            user("superuser", [], superuser=True),
+            user("moderator", [agency], moderator=True),
+            user("other_moderator", [other_agency], moderator=True),
+            user("editor", [agency]),
+            None,
+        ]
+
+        # a site of each status with no receiver, a published receiver and
+        # an unpublished receiver
+        for status in SiteLogStatus:
+            for idx, published in enumerate([None, True, False]):
+                site = Site.objects.create(name=f"A{int(status)}{idx}000USA")
+                site.agencies.add(agency)
+                if published is not None:
+                    SiteReceiver.objects.create(
+                        site=site,
+                        receiver_type=receiver,
+                        serial_number="1",
+                        installed=datetime(2000, 1, 1, tzinfo=timezone.utc),
+                        published=published,
+                    )
+                Site.objects.filter(pk=site.pk).update(status=status)
+        super().setUp()
+
+    def test_annotate_publish_flags(self):
+        for usr in self.users:
+            annotated = Site.objects.annotate_publish_flags(usr).order_by("pk")
+            for site, unannotated in zip(annotated, Site.objects.order_by("pk")):
+                with self.subTest(user=usr, site=site.name):
+                    self.assertEqual(site.needs_publish(), unannotated.needs_publish())
+                    self.assertEqual(
+                        site.is_publishable(), unannotated.is_publishable()
+                    )
+                    self.assertEqual(site.can_publish_, unannotated.can_publish(usr))
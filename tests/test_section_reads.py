@@ -0,0 +1,404 @@
+"""
+HEAD and published reads of site log sections. There is at most one published
+and one unpublished row per section (or per subsection) so both reads should
+be plain filters - no DISTINCT ON and no in-memory workarounds.
+"""
+
+from datetime import date, datetime, timezone
+
+from django.db.models import Q
+from django.test import TestCase, override_settings
+
+from slm.defines import EquipmentState
+from slm.models import Receiver, Site, SiteFrequencyStandard, SiteReceiver
+
+
+class TestSectionReads(TestCase):
+    site = None
+    receivers = None
+
+    def setUp(self):
+        self.site = Site.objects.create(name="AAA200USA")
+        receiver = Receiver.objects.create(
+            model="JAVAD TRE_3 DELTA", state=EquipmentState.ACTIVE
+        )
+        self.receivers = [
+            SiteReceiver.objects.create(
+                site=self.site,
+                receiver_type=receiver,
+                serial_number=str(idx),
+                installed=datetime(2000 + idx, 1, 1, tzinfo=timezone.utc),
+            )
+            for idx in range(3)
+        ]
+        SiteReceiver.objects.filter(site=self.site).update(published=True)
+
+        # edit the first receiver and delete the second
+        edit = SiteReceiver.objects.get(pk=self.receivers[0].pk)
+        edit.pk = None
+        edit.published = False
+        edit.serial_number = "edited"
+        edit.save()
+        SiteReceiver.objects.filter(pk=self.receivers[1].pk).update(is_deleted=True)
+        super().setUp()
+
+    def test_head(self):
+        head = list(self.site.sitereceiver_set.head())
+        self.assertEqual(
+            [(rcv.serial_number, rcv.published) for rcv in head],
+            [("edited", False), ("2", True)],
+        )
+        self.assertEqual(self.site.sitereceiver_set.head().last().serial_number, "2")
+        self.assertEqual(
+            [
+                rcv.serial_number
+                for rcv in self.site.sitereceiver_set.head(include_deleted=True)
+            ],
+            ["edited", "1", "2"],
+        )
+
+        loaded = Site.objects.filter(pk=self.site.pk).load_sections(published=None)
+        self.assertEqual(
+            [rcv.serial_number for rcv in loaded[0].sitereceiver], ["edited", "2"]
+        )
+
+    def test_published(self):
+        self.assertEqual(
+            [rcv.serial_number for rcv in self.site.sitereceiver_set.published()],
+            ["0", "1", "2"],
+        )
+
+    def test_query_plans(self):
+        # see TestSectionReadBenchmarks for the query plans on a seeded dataset
+        for qry in [SiteReceiver.objects.head(), SiteReceiver.objects.published()]:
+            self.assertNotIn("DISTINCT", str(qry.query))
+
+    def test_section_registry(self):
+        self.assertIs(Site.sections(), Site.sections())
+        section = Site.section(SiteReceiver)
+        self.assertIs(Site.section(section.field), section)
+        self.assertIs(Site.section(section.accessor), section)
+        self.assertEqual(list(section.site_log_fields), SiteReceiver.site_log_fields())
+        self.assertEqual(list(section.structure), list(SiteReceiver.structure()))
+        self.assertTrue(section.subsection)
+
+        self.assertTrue(Site.objects.filter(pk=self.site.pk).needs_publish())
+        SiteReceiver.objects.filter(site=self.site).delete()
+        self.assertFalse(Site.objects.filter(pk=self.site.pk).needs_publish())
+
+    def test_annotate_modified_sections(self):
+        site = Site.objects.get(pk=self.site.pk)
+        annotated = Site.objects.filter(pk=self.site.pk).annotate_modified_sections()
+        self.assertEqual(annotated[0].modified_sections, site.modified_sections)
+        self.assertIn(
+            f"{SiteReceiver.section_number()}.1", annotated[0].modified_sections
+        )
+
+    def test_annotate_modified_subsection_index(self):
+        """
+        Edits to a subsection that is not first in its stack are numbered by
+        their position in the whole HEAD stack.
+        """
+        site = Site.objects.create(name="BBB200USA")
+        receiver = Receiver.objects.get(model="JAVAD TRE_3 DELTA")
+        receivers = [
+            SiteReceiver.objects.create(
+                site=site,
+                receiver_type=receiver,
+                serial_number=str(idx),
+                installed=datetime(2000 + idx, 1, 1, tzinfo=timezone.utc),
+            )
+            for idx in range(3)
+        ]
+        SiteReceiver.objects.filter(site=site).update(published=True)
+
+        edit = SiteReceiver.objects.get(pk=receivers[2].pk)
+        edit.pk = None
+        edit.published = False
+        edit.serial_number = "edited"
+        edit.save()
+
+        prefix = f"{SiteReceiver.section_number()}"
+        if SiteReceiver.subsection_number():
+            prefix += f".{SiteReceiver.subsection_number()}"
+
+        annotated = Site.objects.filter(pk=site.pk).annotate_modified_sections()
+        self.assertEqual(annotated[0].modified_sections, [f"{prefix}.3"])
+        self.assertEqual(
+            annotated[0].modified_sections,
+            Site.objects.get(pk=site.pk).modified_sections,
+        )
+
+    def test_snapshots(self):
+        from slm.api.serializers import SiteLogSerializer
+
+        snapshot = Site.objects.filter(pk=self.site.pk).snapshots()[0]
+        self.assertEqual(
+            [rcv.serial_number for rcv in snapshot.sitereceiver], ["0", "1", "2"]
+        )
+        self.assertEqual(
+            snapshot.sitereceiver[0].receiver_type.model, "JAVAD TRE_3 DELTA"
+        )
+        with self.assertRaises(AttributeError):
+            snapshot.sitereceiver[0].serial_number = "changed"
+
+        self.assertEqual(
+            SiteLogSerializer(instance=snapshot).text,
+            SiteLogSerializer(instance=Site.objects.get(pk=self.site.pk)).text,
+        )
+
+    def test_head_context(self):
+        from slm.api.serializers import SiteLogSerializer
+
+        serializer = SiteLogSerializer(
+            instance=Site.objects.get(pk=self.site.pk), published=None
+        )
+        context = serializer.context
+        self.assertEqual(
+            [rcv.serial_number for rcv in context["receiver"]], ["edited", "2"]
+        )
+
+        # subsection stacks are fetched once, when the context is built
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [rcv.serial_number for rcv in context["receiver"]], ["edited", "2"]
+            )
+            self.assertEqual(context["graphic"], "")
+
+    def test_instantiation(self):
+        """
+        Initial values are only captured when changes are tracked, see
+        TestInstantiationBenchmarks for the instantiation cost.
+        """
+        fields = [field.attname for field in SiteReceiver._meta.concrete_fields]
+        row = SiteReceiver.objects.filter(pk=self.receivers[2].pk).values_list(*fields)[
+            0
+        ]
+
+        untracked = SiteReceiver.from_db("default", fields, row)
+        self.assertNotIn("_init_values_", untracked.__dict__)
+
+        tracked = SiteReceiver.from_db("default", fields, row).track_changes()
+        self.assertEqual(tracked._init_values_["serial_number"], "2")
+        tracked.serial_number = "changed"
+        with self.assertNumQueries(0):
+            self.assertEqual(tracked.get_initial_value("serial_number"), "2")
+
+        tracked = SiteReceiver.objects.filter(pk=self.receivers[2].pk).track_changes()[
+            0
+        ]
+        tracked.serial_number = "changed"
+        with self.assertNumQueries(0):
+            self.assertEqual(tracked.get_initial_value("serial_number"), "2")
+
+        untracked = SiteReceiver.objects.get(pk=self.receivers[2].pk)
+        untracked.serial_number = "changed"
+        self.assertEqual(untracked.get_initial_value("serial_number"), "2")
+
+    def assertValidAt(self, model, epochs):
+        """
+        valid_at() must select the same rows as comparing the start and end of
+        validity, where null bounds are unbounded.
+        """
+        start, end = model.valid_time, model.invalid_time
+        for epoch in epochs:
+            compared = model.objects.filter(
+                Q(site=self.site)
+                & (Q(**{f"{start}__lte": epoch}) | Q(**{f"{start}__isnull": True}))
+                & (Q(**{f"{end}__gt": epoch}) | Q(**{f"{end}__isnull": True}))
+            )
+            contained = model.objects.filter(Q(site=self.site) & model.valid_at(epoch))
+            self.assertEqual(
+                set(contained.values_list("pk", flat=True)),
+                set(compared.values_list("pk", flat=True)),
+                f"{model.__name__} at {epoch}",
+            )
+
+    def test_valid_at(self):
+        SiteReceiver.objects.filter(pk=self.receivers[0].pk).update(
+            removed=datetime(2001, 1, 1, tzinfo=timezone.utc)
+        )
+        epoch = datetime(2001, 6, 1, tzinfo=timezone.utc)
+        valid = SiteReceiver.objects.filter(
+            Q(site=self.site) & Q(published=True) & SiteReceiver.valid_at(epoch)
+        )
+        # the lookup must use the indexed range expression
+        self.assertIn("TSTZRANGE", str(valid.query))
+        self.assertEqual([rcv.serial_number for rcv in valid], ["1"])
+        self.assertEqual(
+            Site.objects.filter(pk=self.site.pk)
+            .with_receiver_fields(epoch=epoch)
+            .get()
+            .receiver_sn,
+            "1",
+        )
+
+        # the second receiver has not been removed, the third was removed
+        # before it was installed and is never valid
+        SiteReceiver.objects.filter(pk=self.receivers[2].pk).update(
+            removed=datetime(2001, 6, 1, tzinfo=timezone.utc)
+        )
+        epochs = [
+            datetime(year, 1, 1, tzinfo=timezone.utc) for year in range(1999, 2004)
+        ]
+        epochs.append(epoch)
+        for at in epochs:
+            self.assertFalse(
+                SiteReceiver.objects.filter(
+                    Q(pk=self.receivers[2].pk) & SiteReceiver.valid_at(at)
+                ).exists()
+            )
+        self.assertValidAt(SiteReceiver, epochs)
+
+        # frequency standards are valid over dates but are queried with
+        # timestamps
+        SiteFrequencyStandard.objects.bulk_create(
+            [
+                SiteFrequencyStandard(
+                    site=self.site,
+                    subsection=idx,
+                    effective_start=start,
+                    effective_end=end,
+                )
+                for idx, (start, end) in enumerate(
+                    [
+                        (date(2000, 1, 1), date(2001, 1, 1)),
+                        (date(2001, 1, 1), None),
+                        (date(2003, 1, 1), date(2002, 1, 1)),
+                        (None, date(2000, 6, 1)),
+                    ]
+                )
+            ]
+        )
+        self.assertIn(
+            "DATERANGE",
+            str(
+                SiteFrequencyStandard.objects.filter(
+                    SiteFrequencyStandard.valid_at(epoch)
+                ).query
+            ),
+        )
+        self.assertValidAt(
+            SiteFrequencyStandard,
+            [
+                *epochs,
+                datetime(2000, 5, 31, 23, 59, tzinfo=timezone.utc),
+                datetime(2000, 6, 1, 12, tzinfo=timezone.utc),
+                datetime(2002, 6, 1, tzinfo=timezone.utc),
+            ],
+        )
+
+    def test_equipment_timelines(self):
+        def epoch(year):
+            return datetime(year, 1, 1, tzinfo=timezone.utc)
+
+        timeline = Site.objects.filter(pk=self.site.pk).equipment_timelines()[
+            self.site.name
+        ]
+        self.assertEqual(timeline.start, (epoch(2000), epoch(2001), epoch(2002)))
+        self.assertEqual(timeline.end, (epoch(2001), epoch(2002), None))
+        self.assertEqual(
+            timeline.receiver, tuple(receiver.pk for receiver in self.receivers)
+        )
+        self.assertEqual(timeline.antenna, (None, None, None))
+        self.assertEqual(timeline.receivers[self.receivers[2].pk][1], "2")
+
+        clipped = Site.objects.filter(pk=self.site.pk).equipment_timelines(
+            start=datetime(2001, 6, 1, tzinfo=timezone.utc), end=epoch(2003)
+        )[self.site.name]
+        self.assertEqual(
+            clipped.start, (datetime(2001, 6, 1, tzinfo=timezone.utc), epoch(2002))
+        )
+        self.assertEqual(clipped.end, (epoch(2002), epoch(2003)))
+        self.assertEqual(clipped.receiver, (self.receivers[1].pk, self.receivers[2].pk))
+
+    @override_settings(
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "render": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "render",
+            },
+        },
+        SLM_RENDER_CACHE="render",
+        SLM_RENDER_CACHE_TIMEOUT=60,
+    )
+    def test_render_cache(self):
+        from django.core.files.base import ContentFile
+
+        from slm import signals as slm_signals
+        from slm.api.serializers import SiteLogSerializer
+        from slm.defines import GeodesyMLVersion, SiteFileUploadStatus, SiteLogFormat
+        from slm.models import SiteFileUpload
+
+        Site.objects.filter(pk=self.site.pk).update(
+            last_publish=datetime(2003, 1, 1, tzinfo=timezone.utc)
+        )
+        site = Site.objects.get(pk=self.site.pk)
+        serializer = SiteLogSerializer(instance=site)
+        key = serializer.cache_key(SiteLogFormat.LEGACY)
+        rendered = serializer.format(SiteLogFormat.LEGACY)
+        self.assertEqual(SiteLogSerializer.render_cache().get(key), rendered)
+        self.assertEqual(
+            SiteLogSerializer(instance=site).format(SiteLogFormat.LEGACY), rendered
+        )
+
+        # head renders are not cached
+        self.assertIsNone(
+            SiteLogSerializer(instance=site, published=None).cache_key(
+                SiteLogFormat.LEGACY
+            )
+        )
+
+        SiteLogSerializer.invalidate(site)
+        self.assertNotEqual(serializer.cache_key(SiteLogFormat.LEGACY), key)
+
+        # publishing a file invalidates the GeodesyML render, even if the
+        # attachments listed are unchanged
+        upload = SiteFileUpload.objects.create(
+            site=site,
+            name="notes.pdf",
+            file=ContentFile(b"%PDF-1.4", name="notes.pdf"),
+            mimetype="application/pdf",
+            status=SiteFileUploadStatus.PUBLISHED,
+        )
+        version = GeodesyMLVersion.latest()
+        key = SiteLogSerializer(instance=site).cache_key(
+            SiteLogFormat.GEODESY_ML, version=version
+        )
+        rendered = SiteLogSerializer(instance=site).format(
+            SiteLogFormat.GEODESY_ML, version=version
+        )
+        self.assertEqual(SiteLogSerializer.render_cache().get(key), rendered)
+
+        slm_signals.site_file_published.send(
+            sender=self,
+            site=site,
+            user=None,
+            timestamp=site.last_publish,
+            request=None,
+            upload=upload,
+        )
+        published = SiteLogSerializer(instance=site).cache_key(
+            SiteLogFormat.GEODESY_ML, version=version
+        )
+        self.assertNotEqual(published, key)
+        self.assertIsNone(SiteLogSerializer.render_cache().get(published))
+
+        # clearing the default cache on publish does not drop renders
+        self.assertIsNotNone(SiteLogSerializer.render_cache().get(key))
+
+    def test_render_cache_default(self):
+        from slm.api.serializers import SiteLogSerializer
+        from slm.defines import SiteLogFormat
+
+        # renders are only cached once a dedicated cache is configured, the
+        # default cache is cleared whenever anything is published
+        Site.objects.filter(pk=self.site.pk).update(
+            last_publish=datetime(2003, 1, 1, tzinfo=timezone.utc)
+        )
+        self.assertIsNone(
+            SiteLogSerializer(instance=Site.objects.get(pk=self.site.pk)).cache_key(
+                SiteLogFormat.LEGACY
+            )
+        )
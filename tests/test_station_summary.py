@@ -0,0 +1,122 @@
+"""
+The station summary flattens the published receiver, antenna and frequency
+standard history of a site into one row per interval of unchanged equipment.
+"""
+
+from datetime import datetime, timezone
+
+from django.contrib.postgres.fields.ranges import DateTimeTZRange
+from django.test import TestCase, override_settings
+
+from slm.defines import EquipmentState, SiteLogStatus
+from slm.management.commands.generate_sinex import Command as GenerateSinex
+from slm.models import Receiver, Site, SiteReceiver, StationSummary
+
+
+def epoch(year):
+    return datetime(year, 1, 1, tzinfo=timezone.utc)
+
+
+class TestStationSummary(TestCase):
+    site = None
+
+    def setUp(self):
+        self.site = Site.objects.create(name="AAA200USA")
+        receiver = Receiver.objects.create(
+            model="JAVAD TRE_3 DELTA", state=EquipmentState.ACTIVE
+        )
+        for idx in range(3):
+            SiteReceiver.objects.create(
+                site=self.site,
+                receiver_type=receiver,
+                serial_number=str(idx),
+                installed=epoch(2000 + idx),
+                removed=epoch(2001 + idx) if idx < 2 else None,
+            )
+        super().setUp()
+
+    def publish(self):
+        return Site.objects.filter(pk=self.site.pk).publish(silent=True)
+
+    def test_summarize(self):
+        SiteReceiver.objects.filter(site=self.site).update(published=True)
+        site = Site.objects.filter(pk=self.site.pk).load_sections(published=True)[0]
+        summaries = StationSummary.objects.summarize(site)
+        self.assertEqual(
+            [summary.valid_range for summary in summaries],
+            [
+                DateTimeTZRange(epoch(2000), epoch(2001)),
+                DateTimeTZRange(epoch(2001), epoch(2002)),
+                DateTimeTZRange(epoch(2002), None),
+            ],
+        )
+        self.assertEqual(
+            [summary.receiver_serial_number for summary in summaries],
+            ["0", "1", "2"],
+        )
+        self.assertEqual(summaries[-1].receiver_type, "JAVAD TRE_3 DELTA")
+        self.assertEqual(summaries[-1].antenna_type, "")
+        self.assertIsNone(summaries[-1].receiver_removed)
+
+    def test_rebuild(self):
+        SiteReceiver.objects.filter(site=self.site).update(published=True)
+        sites = Site.objects.filter(pk=self.site.pk)
+        self.assertEqual(StationSummary.objects.rebuild(sites), 3)
+        self.assertEqual(StationSummary.objects.rebuild(sites), 3)
+        self.assertEqual(StationSummary.objects.filter(site=self.site).count(), 3)
+        self.assertEqual(
+            StationSummary.objects.current().get(site=self.site).receiver_serial_number,
+            "2",
+        )
+        self.assertEqual(
+            StationSummary.objects.at_epoch(datetime(2001, 6, 1, tzinfo=timezone.utc))
+            .get(site=self.site)
+            .receiver_serial_number,
+            "1",
+        )
+
+        # unpublished edits are not summarized
+        SiteReceiver.objects.filter(site=self.site, serial_number="2").update(
+            published=False
+        )
+        self.assertEqual(StationSummary.objects.rebuild(sites), 2)
+        self.assertFalse(StationSummary.objects.current().exists())
+
+    def test_publish(self):
+        self.publish()
+        self.assertFalse(StationSummary.objects.exists())
+
+        with override_settings(SLM_STATION_SUMMARY=True):
+            edit = SiteReceiver.objects.get(site=self.site, serial_number="2")
+            edit.pk = None
+            edit.published = False
+            edit.serial_number = "3"
+            edit.save()
+            self.publish()
+            self.assertEqual(
+                StationSummary.objects.current()
+                .get(site=self.site)
+                .receiver_serial_number,
+                "3",
+            )
+
+    def test_generate_sinex(self):
+        self.publish()
+        self.assertEqual(
+            Site.objects.get(pk=self.site.pk).status, SiteLogStatus.PUBLISHED
+        )
+        StationSummary.objects.rebuild(Site.objects.filter(pk=self.site.pk))
+
+        def sections(summary):
+            command = GenerateSinex()
+            command.summary = summary
+            command.sites = Site.objects.filter(pk=self.site.pk)
+            command.snapshots = (
+                [] if summary else command.sites.snapshots(sections=[SiteReceiver])
+            )
+            return list(command.site_receivers()), list(command.site_ids())
+
+        receivers, site_ids = sections(summary=True)
+        self.assertEqual((receivers, site_ids), sections(summary=False))
+        self.assertEqual(len(receivers), 6)
+        self.assertTrue(receivers[2].startswith(" aaa2  A ---- P "))
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+from django.core.files.base import ContentFile
+
+from slm.parsing import read_lines
+from slm.storage import ContentAddressedStorage
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_content_addressed_storage(tmp_path, compression):
+    storage = ContentAddressedStorage(compression=compression, location=tmp_path)
+    contents = b"AAA200USA Site Information Form\n" * 100
+
+    first = storage.save("archive/AAA200USA/aaa2_20000101.log", ContentFile(contents))
+    second = storage.save("archive/AAA200USA/aaa2_20010101.log", ContentFile(contents))
+    other = storage.save("archive/AAA200USA/aaa2_20020101.log", ContentFile(b"other"))
+
+    blobs = list((tmp_path / storage.BLOB_DIRECTORY).rglob("*"))
+    assert len([blob for blob in blobs if blob.is_file()]) == 2
+    assert os.stat(storage.path(first)).st_nlink == 3
+
+    with storage.open(second) as file:
+        assert file.size == len(contents)
+        assert file.read() == contents
+        file.seek(0)
+        assert list(read_lines(file)) == contents.decode().split("\n")
+    assert storage.size(first) == len(contents)
+    if compression:
+        assert os.path.getsize(storage.path(first)) < len(contents)
+
+    storage.delete(first)
+    assert os.stat(storage.path(second)).st_nlink == 2
+    storage.delete(second)
+    storage.delete(other)
+    assert not [
+        blob
+        for blob in (tmp_path / storage.BLOB_DIRECTORY).rglob("*")
+        if blob.is_file()
+    ]
+
+
+def test_concurrent_saves(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    storage = ContentAddressedStorage(compression="gzip", location=tmp_path)
+    contents = b"AAA200USA Site Information Form\n" * 100
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        names = list(
+            executor.map(
+                lambda idx: storage.save(
+                    f"archive/AAA200USA/aaa2_{2000 + idx}0101.log",
+                    ContentFile(contents),
+                ),
+                range(32),
+            )
+        )
+
+    blobs = [
+        blob
+        for blob in (tmp_path / storage.BLOB_DIRECTORY).rglob("*")
+        if blob.is_file()
+    ]
+    assert len(blobs) == 1
+    assert not blobs[0].name.endswith(".partial")
+    assert os.stat(blobs[0]).st_nlink == len(names) + 1
+    for name in names:
+        with storage.open(name) as file:
+            assert file.read() == contents
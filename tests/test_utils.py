@@ -235,3 +235,16 @@ def test_xyz_roundtrip(xyz):
     assert xyz[0] == pytest.approx(converted[0], abs=1e-3)
     assert xyz[1] == pytest.approx(converted[1], abs=1e-3)
     assert xyz[2] == pytest.approx(converted[2], abs=1e-3)
+
+
+def test_accepted_encodings():
+    from slm.utils import accepted_encodings
+
+    assert accepted_encodings("") == {}
+    assert accepted_encodings("gzip, deflate, br;q=0.9, *;q=0") == {
+        "gzip": 1.0,
+        "deflate": 1.0,
+        "br": 0.9,
+        "*": 0.0,
+    }
+    assert accepted_encodings("GZIP;q=bad") == {"gzip": 0.0}